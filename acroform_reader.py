@@ -0,0 +1,397 @@
+"""
+acroform_reader.py
+Fast, read-only access to the form field values of a PDF (or FDF) file.
+
+PdfReader.get_fields() parses far more of the document than the field values
+need.  For the PDFs md2pdfform produces (classic xref tables, no encryption)
+AcroFormReader memory-maps the file, jumps straight to the xref entries it
+needs and resolves only /Root → /AcroForm → /Fields plus each field's /Kids,
+/T and /V.  Anything outside that subset raises FastPathUnsupported, and the
+caller falls back to PyPDF2.
+
+Values are returned in PyPDF2's shapes: text strings as str, names as
+'/Name' strings, integers as int.
+"""
+
+import mmap
+import re
+
+
+class FastPathUnsupported(Exception):
+    """Raised when a PDF uses a feature the fast reader does not handle."""
+
+
+class _Name(str):
+    """A PDF name object, kept as '/Name' like PyPDF2's NameObject."""
+
+
+class _Ref(tuple):
+    """An indirect reference (object number, generation)."""
+
+
+_WS_RE = re.compile(rb'(?:[\x00\t\n\x0c\r ]+|%[^\r\n]*)*')
+_REGULAR = rb'[^\x00\t\n\x0c\r ()<>\[\]{}/%]'
+_TOKEN_RE = re.compile(_REGULAR + rb'+')
+_NAME_RE = re.compile(rb'/(' + _REGULAR + rb'*)')
+_REF_RE = re.compile(rb'(\d+)[\x00\t\n\x0c\r ]+(\d+)[\x00\t\n\x0c\r ]+R(?!' + _REGULAR + rb')')
+_INT_RE = re.compile(rb'[+-]?\d+$')
+_REAL_RE = re.compile(rb'[+-]?(?:\d+\.\d*|\.\d+)$')
+_OBJ_HEADER_RE = re.compile(rb'[\x00\t\n\x0c\r ]*(\d+)[\x00\t\n\x0c\r ]+(\d+)[\x00\t\n\x0c\r ]+obj')
+_XREF_ENTRY_RE = re.compile(rb'(\d{10}) (\d{5}) ([nf])')
+_NAME_ESCAPE_RE = re.compile(rb'#([0-9A-Fa-f]{2})')
+_STRING_SPECIAL_RE = re.compile(rb'[()\\]')
+_STRING_ESCAPES = {
+    ord('n'): b'\n', ord('r'): b'\r', ord('t'): b'\t', ord('b'): b'\b',
+    ord('f'): b'\f', ord('('): b'(', ord(')'): b')', ord('\\'): b'\\',
+}
+
+# PDFDocEncoding differs from Latin-1 only in these ranges.
+_PDFDOC_OVERRIDES = {
+    0x18: '˘', 0x19: 'ˇ', 0x1a: 'ˆ', 0x1b: '˙',
+    0x1c: '˝', 0x1d: '˛', 0x1e: '˚', 0x1f: '˜',
+    0x80: '•', 0x81: '†', 0x82: '‡', 0x83: '…',
+    0x84: '—', 0x85: '–', 0x86: 'ƒ', 0x87: '⁄',
+    0x88: '‹', 0x89: '›', 0x8a: '−', 0x8b: '‰',
+    0x8c: '„', 0x8d: '“', 0x8e: '”', 0x8f: '‘',
+    0x90: '’', 0x91: '‚', 0x92: '™', 0x93: 'ﬁ',
+    0x94: 'ﬂ', 0x95: 'Ł', 0x96: 'Œ', 0x97: 'Š',
+    0x98: 'Ÿ', 0x99: 'Ž', 0x9a: 'ı', 0x9b: 'ł',
+    0x9c: 'œ', 0x9d: 'š', 0x9e: 'ž', 0xa0: '€',
+}
+_PDFDOC_UNDEFINED = {0x7f, 0x9f, 0xad}
+
+
+def _decode_pdf_string(raw):
+    """Decode a PDF text string the way PyPDF2 does (BOM → UTF-16, else PDFDocEncoding)."""
+    if raw[:2] == b'\xfe\xff':
+        return raw[2:].decode('utf-16-be', errors='ignore')
+    if raw[:3] == b'\xef\xbb\xbf':
+        return raw[3:].decode('utf-8', errors='ignore')
+    if any(b in _PDFDOC_UNDEFINED for b in raw):
+        return raw  # PyPDF2 keeps these as ByteStringObject
+    return ''.join(_PDFDOC_OVERRIDES.get(b) or chr(b) for b in raw)
+
+
+# Value of a field that is present but was not decoded (see get_fields).
+SKIPPED = object()
+
+
+class AcroFormReader:
+    """Minimal, lazy PDF object reader over a memory-mapped file or buffer."""
+
+    def __init__(self, buf):
+        self.buf = buf
+        self.xref_sections = []   # list of [(first_obj, count, entries_offset)]
+        self.trailer = {}
+        self._cache = {}
+        self._load_xref()
+
+    # ---- xref / trailer ---------------------------------------------------
+
+    def _load_xref(self):
+        buf = self.buf
+        tail_start = max(0, len(buf) - 1024)
+        idx = buf.rfind(b'startxref', tail_start)
+        if idx < 0:
+            raise FastPathUnsupported("no startxref")
+        m = _TOKEN_RE.match(buf, _WS_RE.match(buf, idx + 9).end())
+        if not m:
+            raise FastPathUnsupported("bad startxref")
+        offset = int(m.group())
+
+        seen = set()
+        while offset is not None:
+            if offset in seen:
+                raise FastPathUnsupported("xref loop")
+            seen.add(offset)
+            trailer = self._read_xref_section(offset)
+            if '/XRefStm' in trailer:
+                raise FastPathUnsupported("hybrid xref")
+            for key, value in trailer.items():
+                self.trailer.setdefault(key, value)   # newest section wins
+            offset = trailer.get('/Prev')
+
+    def _read_xref_section(self, offset):
+        buf = self.buf
+        pos = _WS_RE.match(buf, offset).end()
+        if buf[pos:pos + 4] != b'xref':
+            raise FastPathUnsupported("xref stream")
+        pos += 4
+        subsections = []
+        while True:
+            pos = _WS_RE.match(buf, pos).end()
+            if buf[pos:pos + 7] == b'trailer':
+                break
+            first = _TOKEN_RE.match(buf, pos)
+            count = first and _TOKEN_RE.match(buf, _WS_RE.match(buf, first.end()).end())
+            if not (first and count):
+                raise FastPathUnsupported("bad xref subsection")
+            n_first, n_count = int(first.group()), int(count.group())
+            entries = _WS_RE.match(buf, count.end()).end()
+            subsections.append((n_first, n_count, entries))
+            pos = entries + 20 * n_count
+        self.xref_sections.append(subsections)
+        trailer, _ = self._parse(pos + 7)
+        if not isinstance(trailer, dict):
+            raise FastPathUnsupported("bad trailer")
+        return trailer
+
+    def _offset_of(self, num):
+        # Classic xref entries are exactly 20 bytes, so the entry for an
+        # object can be located without scanning the table.
+        for subsections in self.xref_sections:
+            for first, count, entries in subsections:
+                if first <= num < first + count:
+                    m = _XREF_ENTRY_RE.match(self.buf, entries + 20 * (num - first))
+                    if not m:
+                        raise FastPathUnsupported("malformed xref entry")
+                    if m.group(3) == b'f':
+                        return None
+                    return int(m.group(1))
+        return None
+
+    # ---- object resolution ------------------------------------------------
+
+    def resolve(self, obj):
+        """Follow indirect references until a direct object is reached."""
+        depth = 0
+        while isinstance(obj, _Ref):
+            depth += 1
+            if depth > 32:
+                raise FastPathUnsupported("reference loop")
+            if obj in self._cache:
+                obj = self._cache[obj]
+                continue
+            offset = self._offset_of(obj[0])
+            if offset is None:
+                self._cache[obj] = None
+                return None
+            m = _OBJ_HEADER_RE.match(self.buf, offset)
+            if not m or int(m.group(1)) != obj[0]:
+                raise FastPathUnsupported("xref offset mismatch")
+            value, _ = self._parse(m.end())
+            self._cache[obj] = value
+            obj = value
+        return obj
+
+    # ---- parser -----------------------------------------------------------
+
+    def _parse(self, pos):
+        buf = self.buf
+        pos = _WS_RE.match(buf, pos).end()
+        c = buf[pos:pos + 1]
+
+        if c == b'/':
+            m = _NAME_RE.match(buf, pos)
+            raw = _NAME_ESCAPE_RE.sub(lambda e: bytes([int(e.group(1), 16)]), m.group(1))
+            return _Name('/' + raw.decode('utf-8', errors='replace')), m.end()
+
+        if c == b'<':
+            if buf[pos + 1:pos + 2] == b'<':
+                result = {}
+                pos += 2
+                while True:
+                    pos = _WS_RE.match(buf, pos).end()
+                    if buf[pos:pos + 2] == b'>>':
+                        return result, pos + 2
+                    key, pos = self._parse(pos)
+                    if not isinstance(key, _Name):
+                        raise FastPathUnsupported("bad dictionary key")
+                    result[key], pos = self._parse(pos)
+            end = buf.find(b'>', pos)
+            if end < 0:
+                raise FastPathUnsupported("unterminated hex string")
+            digits = re.sub(rb'[^0-9A-Fa-f]', b'', buf[pos + 1:end])
+            if len(digits) % 2:
+                digits += b'0'
+            return bytes.fromhex(digits.decode('ascii')), end + 1
+
+        if c == b'(':
+            return self._parse_literal_string(pos + 1)
+
+        if c == b'[':
+            result = []
+            pos += 1
+            while True:
+                pos = _WS_RE.match(buf, pos).end()
+                if buf[pos:pos + 1] == b']':
+                    return result, pos + 1
+                item, pos = self._parse(pos)
+                result.append(item)
+
+        m = _REF_RE.match(buf, pos)
+        if m:
+            return _Ref((int(m.group(1)), int(m.group(2)))), m.end()
+
+        m = _TOKEN_RE.match(buf, pos)
+        if not m:
+            raise FastPathUnsupported(f"unexpected byte {c!r} at {pos}")
+        token = m.group()
+        if token == b'true':
+            return True, m.end()
+        if token == b'false':
+            return False, m.end()
+        if token == b'null':
+            return None, m.end()
+        if _INT_RE.match(token):
+            return int(token), m.end()
+        if _REAL_RE.match(token):
+            return float(token), m.end()
+        raise FastPathUnsupported(f"unsupported token {token[:20]!r}")
+
+    def _parse_literal_string(self, pos):
+        buf = self.buf
+        out = bytearray()
+        depth = 1
+        while True:
+            m = _STRING_SPECIAL_RE.search(buf, pos)
+            if not m:
+                raise FastPathUnsupported("unterminated string")
+            out += buf[pos:m.start()]
+            ch = buf[m.start()]
+            pos = m.end()
+            if ch == 0x5c:  # backslash
+                nxt = buf[pos]
+                if nxt in _STRING_ESCAPES:
+                    out += _STRING_ESCAPES[nxt]
+                    pos += 1
+                elif 0x30 <= nxt <= 0x37:
+                    octal = re.match(rb'[0-7]{1,3}', buf[pos:pos + 3]).group()
+                    out.append(int(octal, 8) & 0xff)
+                    pos += len(octal)
+                elif nxt == 0x0d:
+                    pos += 2 if buf[pos + 1:pos + 2] == b'\n' else 1
+                elif nxt == 0x0a:
+                    pos += 1
+                else:
+                    out.append(nxt)
+                    pos += 1
+            elif ch == 0x28:  # (
+                depth += 1
+                out.append(ch)
+            else:             # )
+                depth -= 1
+                if depth == 0:
+                    return bytes(out), pos
+                out.append(ch)
+
+    # ---- fields -----------------------------------------------------------
+
+    def get_fields(self, wanted=None):
+        """
+        Return {field name: raw /V value} in the same order as
+        PdfReader.get_fields(), or None when the PDF has no /AcroForm.
+
+        With wanted (a set of names) only those fields' values are resolved
+        and decoded; every other field maps to SKIPPED.
+        """
+        if '/Encrypt' in self.trailer:
+            raise FastPathUnsupported("encrypted")
+        root = self.resolve(self.trailer.get('/Root'))
+        if not isinstance(root, dict):
+            raise FastPathUnsupported("no /Root")
+        if '/AcroForm' not in root:
+            return None
+        acroform = self.resolve(root['/AcroForm'])
+        if not isinstance(acroform, dict):
+            raise FastPathUnsupported("bad /AcroForm")
+
+        fields = {}
+        for field in self.resolve(acroform.get('/Fields')) or []:
+            self._collect(self.resolve(field), fields, set(), wanted)
+        return fields
+
+    def _collect(self, field, out, visiting, wanted):
+        # Mirrors PyPDF2: kids are visited before the field itself and
+        # unnamed widgets are skipped.
+        if not isinstance(field, dict):
+            return
+        key = id(field)
+        if key in visiting:
+            raise FastPathUnsupported("field tree loop")
+        visiting.add(key)
+        for kid in self.resolve(field.get('/Kids')) or []:
+            self._collect(self.resolve(kid), out, visiting, wanted)
+        name = self.resolve(field.get('/TM', field.get('/T')))
+        if name is None:
+            return
+        if not isinstance(name, bytes):
+            raise FastPathUnsupported("non-string field name")
+        name = _decode_pdf_string(name)
+        if isinstance(name, bytes):
+            raise FastPathUnsupported("undecodable field name")
+        if wanted is not None and name not in wanted:
+            out[name] = SKIPPED
+        else:
+            out[name] = self._value(field.get('/V', ''))
+
+    def _value(self, value):
+        value = self.resolve(value)
+        if value is None or isinstance(value, str):
+            return value if value is not None else ''
+        if isinstance(value, bytes):
+            return _decode_pdf_string(value)
+        if isinstance(value, int) and not isinstance(value, bool):
+            return value
+        raise FastPathUnsupported(f"unsupported /V type {type(value).__name__}")
+
+
+def read_pdf_fields(source, wanted=None):
+    """
+    Return {name: raw value} for a PDF given as a path (memory-mapped) or as
+    bytes.  Returns None when the PDF has no /AcroForm.  Raises
+    FastPathUnsupported (or any parsing error) when the caller should fall
+    back to PyPDF2.
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return AcroFormReader(source).get_fields(wanted)
+    with open(source, 'rb') as fh:
+        with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            return AcroFormReader(buf).get_fields(wanted)
+
+
+# --------------------------------------------------------------------------- #
+# FDF
+# --------------------------------------------------------------------------- #
+
+_OBJ_SCAN_RE = re.compile(rb'(?<![0-9])(\d+)[\x00\t\n\x0c\r ]+(\d+)[\x00\t\n\x0c\r ]+obj(?!' + _REGULAR + rb')')
+
+
+class FdfReader(AcroFormReader):
+    """
+    Object reader for FDF files.  FDF has PDF object syntax but usually no
+    xref table, so objects are located by scanning for their headers.
+    """
+
+    def _load_xref(self):
+        self.offsets = {}
+        for m in _OBJ_SCAN_RE.finditer(self.buf):
+            self.offsets[int(m.group(1))] = m.start()
+        idx = self.buf.rfind(b'trailer')
+        if idx < 0:
+            raise ValueError("not an FDF file (no trailer)")
+        trailer, _ = self._parse(idx + 7)
+        if not isinstance(trailer, dict):
+            raise ValueError("bad FDF trailer")
+        self.trailer = trailer
+
+    def _offset_of(self, num):
+        return self.offsets.get(num)
+
+    def get_fields(self, wanted=None):
+        root = self.resolve(self.trailer.get('/Root'))
+        fdf = self.resolve(root.get('/FDF')) if isinstance(root, dict) else None
+        if not isinstance(fdf, dict):
+            raise ValueError("not an FDF file (no /FDF dictionary)")
+        fields = {}
+        for field in self.resolve(fdf.get('/Fields')) or []:
+            self._collect(self.resolve(field), fields, set(), wanted)
+        return fields
+
+
+def read_fdf_fields(source, wanted=None):
+    """Return {name: raw value} for an FDF file given as a path or as bytes."""
+    if not isinstance(source, (bytes, bytearray, memoryview)):
+        with open(source, 'rb') as fh:
+            source = fh.read()
+    return FdfReader(source).get_fields(wanted)
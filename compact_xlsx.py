@@ -0,0 +1,363 @@
+"""
+compact_xlsx.py
+Write-only .xlsx writer with a shared-strings table, used for the combined
+exports of pdfform2excel.py.
+
+openpyxl's write-only mode stores every string inline, so 'Yes', 'No' and
+dropdown choices are spelled out again on every row.  CompactWorkbook puts
+strings in the shared-strings table instead (each distinct value stored
+once, cells refer to it by index) and streams the sheet XML, in chunks of
+rows, straight into a deflate stream inside the ZIP.  Memory is bounded by
+the string table, which is capped; strings past the cap, long free text and
+columns whose values rarely repeat (file names, e-mail addresses) are
+written inline.
+
+It implements just the part of the openpyxl write-only API the exports use:
+create_sheet(), column_dimensions[...].width, append(), close() and save().
+"""
+
+import datetime
+import math
+import os
+import tempfile
+import zipfile
+from collections import defaultdict
+from xml.sax.saxutils import escape, quoteattr
+
+import openpyxl
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, PatternFill
+
+
+# --------------------------------------------------------------------------- #
+# Cell text
+# --------------------------------------------------------------------------- #
+
+class _IllegalCharTable(dict):
+    """
+    str.translate() table that drops every character str.isprintable()
+    rejects, except the line breaks and tabs Excel allows.  Entries are
+    added the first time a character is seen, so the table stays small and
+    translate() does all the work in C.
+    """
+
+    def __missing__(self, codepoint):
+        char = chr(codepoint)
+        keep = char.isprintable() or char in '\n\r\t'
+        self[codepoint] = codepoint if keep else None
+        return self[codepoint]
+
+
+_ILLEGAL_CHARS = _IllegalCharTable()
+
+
+def sanitize_value(value):
+    """Remove illegal characters for Excel cells"""
+    if not isinstance(value, str) or value.isprintable():
+        return value
+    return value.translate(_ILLEGAL_CHARS)
+
+
+# --------------------------------------------------------------------------- #
+# Workbook
+# --------------------------------------------------------------------------- #
+
+SST_MAX_STRINGS = 1 << 20   # distinct strings kept in the shared-strings table
+SST_MAX_LENGTH = 255        # longer strings are written inline
+SST_SAMPLE_CELLS = 256      # text cells per column seen before judging it
+SST_UNIQUE_RATIO = 0.5      # ... and the share of new strings that makes it inline
+XML_CHUNK_ROWS = 500        # rows of sheet XML buffered before each write
+
+_NS_MAIN = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+_NS_REL = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+_NS_PKG = 'http://schemas.openxmlformats.org/package/2006/relationships'
+_XML_DECL = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+
+# Cell style ids (index into cellXfs in _STYLES_XML).
+STYLE_HEADER = 1
+STYLE_PERCENT = 2
+STYLE_DATE = 3
+
+# Dates are stored as days since Excel's (1900 date system) epoch.
+_EXCEL_EPOCH = datetime.date(1899, 12, 30)
+
+# Header styles for openpyxl sheets, created once and shared by every header cell.
+HEADER_FILL = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
+HEADER_FONT = Font(bold=True, color="FFFFFF")
+
+# Same look as HEADER_FILL / HEADER_FONT.
+_STYLES_XML = (
+    f'{_XML_DECL}<styleSheet xmlns="{_NS_MAIN}">'
+    '<numFmts count="1"><numFmt numFmtId="164" formatCode="0.0%"/></numFmts>'
+    '<fonts count="2"><font><sz val="11"/><color theme="1"/><name val="Calibri"/>'
+    '<family val="2"/><scheme val="minor"/></font>'
+    '<font><b/><color rgb="00FFFFFF"/></font></fonts>'
+    '<fills count="3"><fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill>'
+    '<fill><patternFill patternType="solid"><fgColor rgb="00366092"/>'
+    '<bgColor rgb="00366092"/></patternFill></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="4"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="0" fontId="1" fillId="2" borderId="0" xfId="0" applyFont="1" applyFill="1"/>'
+    '<xf numFmtId="164" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '<xf numFmtId="14" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '</cellXfs><cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    '</styleSheet>'
+)
+
+
+class StyledValue:
+    """A cell value with one of the STYLE_* ids, for a CompactSheet."""
+    __slots__ = ('value', 'style')
+
+    def __init__(self, value, style):
+        self.value = value
+        self.style = style
+
+
+def header_cell(ws, value):
+    """A header cell (blue fill, bold white font) for a write-only sheet."""
+    if isinstance(ws, CompactSheet):
+        return StyledValue(value, STYLE_HEADER)
+    cell = WriteOnlyCell(ws, value=value)
+    cell.fill = HEADER_FILL
+    cell.font = HEADER_FONT
+    return cell
+
+
+def percent_cell(ws, fraction):
+    """A cell showing fraction as a percentage (0.0%)."""
+    if isinstance(ws, CompactSheet):
+        return StyledValue(fraction, STYLE_PERCENT)
+    cell = WriteOnlyCell(ws, value=fraction)
+    cell.number_format = '0.0%'
+    return cell
+
+
+class _ColumnDimension:
+    __slots__ = ('width',)
+
+    def __init__(self):
+        self.width = None
+
+
+class _ColumnStrings:
+    """
+    Shared-strings use of one column.  After SST_SAMPLE_CELLS text cells, a
+    column where most cells added a new string (one value per row) stops
+    adding to the table; its values are written inline from then on.
+    """
+    __slots__ = ('cells', 'added', 'share')
+
+    def __init__(self):
+        self.cells = 0
+        self.added = 0
+        self.share = True
+
+    def count(self, added):
+        self.cells += 1
+        self.added += added
+        if self.cells == SST_SAMPLE_CELLS and self.added > SST_SAMPLE_CELLS * SST_UNIQUE_RATIO:
+            self.share = False
+
+
+class CompactSheet:
+    """One worksheet of a CompactWorkbook; rows are streamed as appended."""
+
+    def __init__(self, wb, title, part):
+        self.wb = wb
+        self.title = title
+        self.part = part            # path of the sheet XML inside the ZIP
+        self.column_dimensions = defaultdict(_ColumnDimension)
+        self.stream = None
+        self.buffer = []
+        self.n_rows = 0
+        self.letters = []           # column letters, extended on demand
+        self.columns = []           # _ColumnStrings per column, likewise
+
+    def _open(self):
+        self.stream = self.wb.zip.open(self.part, 'w', force_zip64=True)
+        cols = ''.join(
+            f'<col min="{idx}" max="{idx}" width="{dim.width}" customWidth="1"/>'
+            for idx, dim in sorted((openpyxl.utils.column_index_from_string(letter), dim)
+                                   for letter, dim in self.column_dimensions.items())
+            if dim.width
+        )
+        self.stream.write(
+            f'{_XML_DECL}<worksheet xmlns="{_NS_MAIN}">'
+            f'{f"<cols>{cols}</cols>" if cols else ""}<sheetData>'.encode('utf-8'))
+
+    def append(self, row):
+        if self.stream is None:
+            self._open()
+        self.n_rows += 1
+        r = self.n_rows
+        letters = self.letters
+        while len(letters) < len(row):
+            letters.append(openpyxl.utils.get_column_letter(len(letters) + 1))
+            self.columns.append(_ColumnStrings())
+
+        cell_xml = self.wb.cell_xml
+        parts = [f'<row r="{r}">']
+        for letter, column, value in zip(letters, self.columns, row):
+            if value is not None and value != '':
+                parts.append(cell_xml(f'{letter}{r}', value, column))
+        if row and row[-1] == '':
+            # An empty last cell keeps the row at full width for readers
+            # that size rows by their cells (openpyxl read-only mode).
+            parts.append(f'<c r="{letters[len(row) - 1]}{r}"/>')
+        parts.append('</row>')
+        self.buffer.append(''.join(parts))
+        if len(self.buffer) >= XML_CHUNK_ROWS:
+            self._flush()
+
+    def _flush(self):
+        self.stream.write(''.join(self.buffer).encode('utf-8'))
+        self.buffer.clear()
+
+    def close(self):
+        if self.stream is None:
+            self._open()
+        self._flush()
+        self.stream.write(b'</sheetData></worksheet>')
+        self.stream.close()
+        self.wb.sheet_closed(self)
+
+
+class CompactWorkbook:
+    """
+    Write-only xlsx writer with a shared-strings table (see the section
+    comment).  The ZIP is built in a temporary file next to output_path and
+    moved into place by save(), so a failed export never leaves a partial
+    workbook behind.
+    """
+
+    def __init__(self, output_path):
+        self.output_path = output_path
+        directory = os.path.dirname(os.path.abspath(output_path))
+        fd, self.tmp_path = tempfile.mkstemp(suffix='.xlsx.tmp', dir=directory)
+        os.close(fd)
+        self.zip = zipfile.ZipFile(self.tmp_path, 'w', compression=zipfile.ZIP_DEFLATED)
+        self.sheets = []
+        self.open_sheet = None
+        self.strings = {}       # string → index in the shared-strings table
+        self.string_refs = 0    # cells referring to the table
+
+    def create_sheet(self, title):
+        if self.open_sheet is not None:
+            self.open_sheet.close()  # one ZIP member can be written at a time
+        sheet = CompactSheet(self, title, f'xl/worksheets/sheet{len(self.sheets) + 1}.xml')
+        self.sheets.append(sheet)
+        self.open_sheet = sheet
+        return sheet
+
+    def sheet_closed(self, sheet):
+        if self.open_sheet is sheet:
+            self.open_sheet = None
+
+    def cell_xml(self, ref, value, column=None):
+        """
+        XML for one non-empty cell.  Text is escaped but otherwise written as
+        given; callers pass it through sanitize_value() first.
+        """
+        style = ''
+        if isinstance(value, StyledValue):
+            style = f' s="{value.style}"'
+            value = value.value
+        if isinstance(value, bool):
+            return f'<c r="{ref}"{style} t="b"><v>{int(value)}</v></c>'
+        if isinstance(value, (int, float)) and math.isfinite(value):
+            return f'<c r="{ref}"{style}><v>{value!r}</v></c>'
+        if isinstance(value, datetime.date):
+            serial = (value - _EXCEL_EPOCH).days
+            return f'<c r="{ref}" s="{STYLE_DATE}"><v>{serial}</v></c>'
+        text = str(value)
+        index = self.strings.get(text)
+        if column is not None:
+            column.count(index is None)
+        if (index is None and len(text) <= SST_MAX_LENGTH and len(self.strings) < SST_MAX_STRINGS
+                and (column is None or column.share)):
+            index = self.strings[text] = len(self.strings)
+        if index is not None:
+            self.string_refs += 1
+            return f'<c r="{ref}"{style} t="s"><v>{index}</v></c>'
+        return (f'<c r="{ref}"{style} t="inlineStr"><is>'
+                f'<t xml:space="preserve">{escape(text)}</t></is></c>')
+
+    def _write_shared_strings(self):
+        with self.zip.open('xl/sharedStrings.xml', 'w', force_zip64=True) as stream:
+            stream.write(f'{_XML_DECL}<sst xmlns="{_NS_MAIN}" count="{self.string_refs}" '
+                         f'uniqueCount="{len(self.strings)}">'.encode('utf-8'))
+            chunk = []
+            for text in self.strings:  # dicts keep insertion (= index) order
+                chunk.append(f'<si><t xml:space="preserve">{escape(text)}</t></si>')
+                if len(chunk) >= XML_CHUNK_ROWS:
+                    stream.write(''.join(chunk).encode('utf-8'))
+                    chunk.clear()
+            chunk.append('</sst>')
+            stream.write(''.join(chunk).encode('utf-8'))
+
+    def _write_package_parts(self):
+        sheets = self.sheets
+        n = len(sheets)
+        overrides = ''.join(
+            f'<Override PartName="/{sheet.part}" ContentType="application/'
+            f'vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+            for sheet in sheets)
+        self.zip.writestr('[Content_Types].xml', (
+            f'{_XML_DECL}<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/xl/workbook.xml" ContentType="application/'
+            'vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+            f'{overrides}'
+            '<Override PartName="/xl/styles.xml" ContentType="application/'
+            'vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+            '<Override PartName="/xl/sharedStrings.xml" ContentType="application/'
+            'vnd.openxmlformats-officedocument.spreadsheetml.sharedStrings+xml"/>'
+            '</Types>'))
+        self.zip.writestr('_rels/.rels', (
+            f'{_XML_DECL}<Relationships xmlns="{_NS_PKG}">'
+            f'<Relationship Id="rId1" Type="{_NS_REL}/officeDocument" Target="xl/workbook.xml"/>'
+            '</Relationships>'))
+        sheet_entries = ''.join(
+            f'<sheet name={quoteattr(sheet.title)} sheetId="{i}" r:id="rId{i}"/>'
+            for i, sheet in enumerate(sheets, start=1))
+        self.zip.writestr('xl/workbook.xml', (
+            f'{_XML_DECL}<workbook xmlns="{_NS_MAIN}" xmlns:r="{_NS_REL}">'
+            f'<sheets>{sheet_entries}</sheets></workbook>'))
+        sheet_rels = ''.join(
+            f'<Relationship Id="rId{i}" Type="{_NS_REL}/worksheet" '
+            f'Target="{sheet.part[len("xl/"):]}"/>'
+            for i, sheet in enumerate(sheets, start=1))
+        self.zip.writestr('xl/_rels/workbook.xml.rels', (
+            f'{_XML_DECL}<Relationships xmlns="{_NS_PKG}">{sheet_rels}'
+            f'<Relationship Id="rId{n + 1}" Type="{_NS_REL}/styles" Target="styles.xml"/>'
+            f'<Relationship Id="rId{n + 2}" Type="{_NS_REL}/sharedStrings" '
+            'Target="sharedStrings.xml"/></Relationships>'))
+        self.zip.writestr('xl/styles.xml', _STYLES_XML)
+
+    def save(self):
+        if self.open_sheet is not None:
+            self.open_sheet.close()
+        if not self.sheets:
+            self.create_sheet('Sheet').close()
+        self._write_shared_strings()
+        self._write_package_parts()
+        self.zip.close()
+        os.chmod(self.tmp_path, 0o666 & ~_umask())  # mkstemp creates files 0600
+        os.replace(self.tmp_path, self.output_path)
+
+    def discard(self):
+        """Drop the workbook without writing output_path."""
+        if self.open_sheet is not None and self.open_sheet.stream is not None:
+            self.open_sheet.stream.close()
+        self.zip.close()
+        os.remove(self.tmp_path)
+
+
+def _umask():
+    mask = os.umask(0)
+    os.umask(mask)
+    return mask
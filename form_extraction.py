@@ -0,0 +1,1044 @@
+"""
+form_extraction.py
+Reads the filled-in form data of PDF, XFDF and FDF inputs for
+pdfform2excel.py: MD field lists, deduplication, the readers, archive and
+in-memory inputs, and sequential, pooled and isolated (per-file limits)
+extraction, plus the library API built on them.
+"""
+
+import os
+import re
+import io
+import csv
+import errno
+import json
+import logging
+import time
+import signal
+import tarfile
+import zipfile
+import multiprocessing
+import threading
+import xml.etree.ElementTree as ET
+from xml.sax.saxutils import escape, quoteattr
+from multiprocessing.connection import wait as wait_for_connections
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from PyPDF2 import PdfReader
+
+from acroform_reader import SKIPPED, read_fdf_fields, read_pdf_fields
+from compact_xlsx import sanitize_value
+from form_schema import load_form_schema
+
+try:
+    import resource
+except ImportError:  # not available on Windows; --max-memory is then ignored
+    resource = None
+
+# --------------------------------------------------------------------------- #
+# MD field extraction (used when --md is provided)
+# --------------------------------------------------------------------------- #
+
+class FieldList(list):
+    """
+    MD field names in MD order.  name_fields are the radio-button fields: a
+    PDF stores their value as a name ('/Option') but XFDF as plain text, so
+    the XFDF reader uses them to return the same value as the PDF.
+    """
+
+    def __init__(self, names=(), name_fields=()):
+        super().__init__(names)
+        self.name_fields = frozenset(name_fields)
+
+
+def field_list(schema):
+    """Return the FieldList for a FormSchema."""
+    return FieldList(schema.names, schema.radio_buttons)
+
+
+def extract_field_names_from_md(md_path: str) -> list:
+    """Return field names in the order they appear in the .md file (a FieldList)."""
+    return field_list(load_form_schema(md_path))
+
+
+def extract_field_types_from_md(md_path: str) -> dict:
+    """Return {field name: field type} for the fields in the .md file."""
+    return dict(load_form_schema(md_path).types)
+
+
+def extract_field_options_from_md(md_path: str) -> dict:
+    """Return {field name: [option, ...]} for the radio and dropdown fields."""
+    return dict(load_form_schema(md_path).options)
+
+
+class FieldProjection(FieldList):
+    """
+    A user-selected subset of fields (--fields).  Used in place of the MD
+    field list: only these fields are decoded, and the output holds exactly
+    these columns in this order.
+    """
+
+
+def project_fields(names, md_fields=None):
+    """
+    Return a FieldProjection for the comma-separated names.  With md_fields
+    every name must be defined in the MD file; raises ValueError otherwise.
+    """
+    selected = list(dict.fromkeys(n.strip() for n in names.split(',') if n.strip()))
+    if not selected:
+        raise ValueError("--fields needs at least one field name")
+    if md_fields is not None:
+        known = set(md_fields)
+        unknown = [n for n in selected if n not in known]
+        if unknown:
+            raise ValueError(f"field(s) not defined in the MD file: {', '.join(unknown)}")
+    return FieldProjection(selected, getattr(md_fields, 'name_fields', ()))
+
+
+# --------------------------------------------------------------------------- #
+# Deduplication (used when --md is NOT provided)
+# --------------------------------------------------------------------------- #
+
+def deduplicate_fields(form_data: dict) -> dict:
+    """
+    Remove phantom fields introduced by two known md2pdfform artefacts:
+
+    1. PyPDF2 radio-button duplicates – when acroForm.radio() is called once
+       per option with the same field name, PyPDF2 renames duplicates as
+       'name-1', 'name-2', etc.  The base 'name' already holds the correct
+       selected value, so the suffixed copies are dropped.
+
+    2. Fallback checkboxes – when acroForm.radio/choice fails, md2pdfform
+       creates individual checkboxes named 'name_0', 'name_1', etc. (no base
+       'name' exists).  These are merged back into a single 'name' entry whose
+       value lists the checked option indices (or is empty when none checked).
+    """
+    result = {}
+
+    # ---- pass 1: collect everything, skip PyPDF2 '-N' duplicates ----------
+    # Pattern: ends with '-' followed by one or more digits
+    dash_suffix = re.compile(r'^(.+)-(\d+)$')
+
+    for name, value in form_data.items():
+        m = dash_suffix.match(name)
+        if m and m.group(1) in form_data:
+            # Base name already present → this is a PyPDF2-renamed duplicate
+            continue
+        result[name] = value
+
+    # ---- pass 2: merge '_N' fallback checkboxes into base name -------------
+    # Pattern: ends with '_' followed by one or more digits
+    under_suffix = re.compile(r'^(.+)_(\d+)$')
+
+    groups = {}   # base_name → {index: value}
+    lone = {}     # names that are NOT part of any '_N' group
+    for name, value in result.items():
+        m = under_suffix.match(name)
+        if m:
+            base = m.group(1)
+            idx  = int(m.group(2))
+            # Only treat as a group if the base name is NOT itself a real field
+            if base not in result:
+                groups.setdefault(base, {})[idx] = value
+                continue
+        lone[name] = value
+
+    # Rebuild in original insertion order: lone fields first (preserving order),
+    # then synthesised base names inserted at the position of their first member.
+    merged = {}
+    seen_bases = set()
+    for name, value in result.items():
+        m = under_suffix.match(name)
+        if m:
+            base = m.group(1)
+            if base in groups and base not in seen_bases:
+                seen_bases.add(base)
+                # Value: the checked item(s), or empty if all unchecked
+                checked = [
+                    str(idx) for idx, v in sorted(groups[base].items())
+                    if str(v).lower() not in ('', 'no', '/off', 'false', '0')
+                ]
+                merged[base] = ', '.join(checked)
+            # Skip the individual _N entry
+        elif name in lone:
+            merged[name] = value
+
+    return merged
+
+
+# --------------------------------------------------------------------------- #
+# Form data files (.xfdf, .fdf)
+# --------------------------------------------------------------------------- #
+#
+# Viewers can submit just the field values instead of the whole PDF.  Both
+# formats are read into the same {name: raw value} shape as a PDF, so they
+# flow through the rest of the pipeline unchanged.
+
+FORM_DATA_SUFFIXES = ('.xfdf', '.fdf')
+INPUT_SUFFIXES = ('.pdf',) + FORM_DATA_SUFFIXES
+
+
+def _read_fields_fdf(pdf_path, wanted=None):
+    """Read {name: raw value} from an FDF file (same value types as a PDF)."""
+    source = pdf_path.read_bytes() if isinstance(pdf_path, MemoryInput) else pdf_path
+    return read_fdf_fields(source, wanted)
+
+
+def _local(tag):
+    return tag.rsplit('}', 1)[-1]
+
+
+def _read_fields_xfdf(pdf_path, wanted=None, name_fields=()):
+    """
+    Read {name: raw value} from an XFDF file with a streaming XML parser.
+
+    Nested <field> elements are named by their innermost name, as PDF
+    partial names are.  XFDF writes button states without the leading '/'
+    of PDF names, so 'Yes'/'Off' are mapped back to '/Yes'/'/Off' to get
+    the same Yes/No values as the PDF, and so are the values of name_fields
+    (the radio buttons, see FieldList): 'Male' becomes '/Male'.
+    """
+    source = io.BytesIO(pdf_path.read_bytes()) if isinstance(pdf_path, MemoryInput) else pdf_path
+    fields = {}
+    names = []    # enclosing <field> names
+    values = []   # <value> texts of the innermost field
+    for event, elem in ET.iterparse(source, events=('start', 'end')):
+        tag = _local(elem.tag)
+        if event == 'start':
+            if tag == 'field':
+                names.append(elem.get('name', ''))
+                values = []
+            continue
+        if tag == 'value' and names:
+            values.append(elem.text or '')
+        elif tag == 'field' and names:
+            name = names.pop()
+            if values or name not in fields:
+                if wanted is not None and name not in wanted:
+                    fields[name] = SKIPPED
+                else:
+                    value = ', '.join(values)
+                    if value in ('Yes', 'Off') or (value and name in name_fields):
+                        value = '/' + value
+                    fields[name] = value
+            values = []
+            elem.clear()
+    return fields
+
+
+def write_xfdf(path, form_data, source_name=None, field_types=None):
+    """
+    Write form_data as an XFDF file.  Checkbox and radio values are written
+    as XFDF button states ('No' becomes 'Off', '/Option' becomes 'Option').
+    """
+    field_types = field_types or {}
+    with open(path, 'w', encoding='utf-8') as fh:
+        fh.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        fh.write('<xfdf xmlns="http://ns.adobe.com/xfdf/" xml:space="preserve">\n')
+        if source_name:
+            fh.write(f'  <f href={quoteattr(source_name)}/>\n')
+        fh.write('  <fields>\n')
+        for name, value in form_data.items():
+            value = '' if value is None else str(value)
+            field_type = field_types.get(name)
+            if field_type == 'checkbox':
+                value = 'Yes' if value == 'Yes' else 'Off'
+            elif field_type in ('radio', 'dropdown') and value.startswith('/'):
+                value = value[1:]
+            fh.write(f'    <field name={quoteattr(name)}><value>{escape(value)}</value></field>\n')
+        fh.write('  </fields>\n</xfdf>\n')
+
+
+def export_pdfs_to_xfdf(pdf_paths, out_dir, md_fields=None, jobs=1, limits=None,
+                        field_types=None):
+    """
+    Write one XFDF file per input into out_dir, fields in the same order as
+    the table exports (MD order with md_fields).  Files are named after the
+    inputs; clashing names get a numeric suffix.
+    """
+    print(f"Processing {len(pdf_paths)} PDF files...")
+    os.makedirs(out_dir, exist_ok=True)
+    taken = set()
+    n_files = 0
+    for pdf_path, form_data in iter_form_data(pdf_paths, md_fields, jobs, limits):
+        if not form_data:
+            continue
+        name = input_name(pdf_path)
+        stem = re.sub(r'[\\/:*?"<>|]+', '_', os.path.splitext(name)[0]) or 'form'
+        target, counter = stem, 1
+        while target.lower() in taken:
+            counter += 1
+            target = f"{stem}_{counter}"
+        taken.add(target.lower())
+        write_xfdf(os.path.join(out_dir, target + '.xfdf'), form_data, name, field_types)
+        n_files += 1
+
+    if not n_files:
+        print("No form data found in any PDF")
+        return False
+    print(f"Exported {n_files} XFDF files → {out_dir}")
+    return True
+
+
+# --------------------------------------------------------------------------- #
+# In-memory inputs
+# --------------------------------------------------------------------------- #
+
+def _sniff_kind(data):
+    """'pdf', 'fdf' or 'xfdf', from the first bytes of a submission."""
+    head = bytes(data[:1024]).lstrip()
+    if head.startswith(b'%FDF'):
+        return 'fdf'
+    if head.startswith(b'<'):
+        return 'xfdf'
+    return 'pdf'
+
+
+class MemoryInput(str):
+    """
+    A submission held in memory, used wherever a PDF path is expected.
+
+    The string value is its name.  kind ('pdf', 'fdf' or 'xfdf') picks the
+    reader: from the name's suffix when it has one of INPUT_SUFFIXES, else
+    from the content.
+    """
+
+    def __new__(cls, name, data):
+        self = super().__new__(cls, name)
+        self.name = name
+        self.data = data
+        suffix = name.lower().rsplit('.', 1)[-1] if '.' in name else ''
+        self.kind = suffix if f'.{suffix}' in INPUT_SUFFIXES else _sniff_kind(data)
+        return self
+
+    def __reduce__(self):
+        return (MemoryInput, (self.name, self.data))
+
+    def read_bytes(self):
+        return self.data
+
+    def loaded(self):
+        return self
+
+
+# --------------------------------------------------------------------------- #
+# Archive inputs (.zip, .tar, .tar.gz, ...)
+# --------------------------------------------------------------------------- #
+
+ARCHIVE_SUFFIXES = ('.zip', '.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tbz2', '.tar.xz', '.txz')
+
+
+def is_archive(path):
+    return path.lower().endswith(ARCHIVE_SUFFIXES)
+
+
+class ArchiveMember(MemoryInput):
+    """
+    A PDF inside a ZIP or TAR archive, used wherever a PDF path is expected.
+
+    The string value is 'ARCHIVE/MEMBER', which keeps progress messages and
+    --shard hashing meaningful.  The member is never extracted to disk: its
+    bytes are read from the archive when needed (data holds them once
+    loaded, e.g. to ship the member to a worker process).
+    """
+
+    def __new__(cls, archive, member, data=None):
+        self = str.__new__(cls, f"{archive}/{member}")
+        self.archive = archive
+        self.member = self.name = member
+        self.data = data
+        self.kind = member.lower().rsplit('.', 1)[-1]  # archives list INPUT_SUFFIXES only
+        return self
+
+    def __reduce__(self):
+        return (ArchiveMember, (self.archive, self.member, self.data))
+
+    def read_bytes(self):
+        if self.data is not None:
+            return self.data
+        return _open_archive(self.archive).read(self.member)
+
+    def loaded(self):
+        """Return a copy that carries the member's bytes."""
+        return ArchiveMember(self.archive, self.member, self.read_bytes())
+
+
+class _Archive:
+    """An open ZIP or uncompressed TAR archive with random access to its PDF members."""
+
+    def __init__(self, path):
+        if zipfile.is_zipfile(path):
+            self.zip = zipfile.ZipFile(path)
+            self.tar = None
+            self.members = {info.filename: info for info in self.zip.infolist()
+                            if not info.is_dir()
+                            and info.filename.lower().endswith(INPUT_SUFFIXES)}
+        else:
+            self.zip = None
+            self.tar = tarfile.open(path)
+            self.members = {info.name: info for info in self.tar
+                            if info.isfile() and info.name.lower().endswith(INPUT_SUFFIXES)}
+
+    def read(self, member):
+        if self.zip is not None:
+            return self.zip.read(self.members[member])
+        with self.tar.extractfile(self.members[member]) as fh:
+            return fh.read()
+
+
+_archives = {}  # archive path → _Archive, opened once per process
+
+
+def _open_archive(path):
+    if path not in _archives:
+        _archives[path] = _Archive(path)
+    return _archives[path]
+
+
+def _read_tar_stream(path):
+    """
+    Yield (member, bytes) for every PDF (or XFDF/FDF) in a compressed TAR.
+
+    Seeking back in a compressed stream means decompressing it again from
+    the start, so the members are read in the same single pass that lists
+    them.
+    """
+    with tarfile.open(path, mode='r|*') as tar:
+        for info in tar:
+            if info.isfile() and info.name.lower().endswith(INPUT_SUFFIXES):
+                with tar.extractfile(info) as fh:
+                    yield info.name, fh.read()
+
+
+def list_archive_members(path):
+    """Return an ArchiveMember for every PDF (or XFDF/FDF) in the archive, in archive order."""
+    if not zipfile.is_zipfile(path) and not path.lower().endswith('.tar'):
+        return [ArchiveMember(path, member, data) for member, data in _read_tar_stream(path)]
+    return [ArchiveMember(path, member) for member in _open_archive(path).members]
+
+
+def load_input(pdf_path):
+    """Attach an archive member's bytes before handing it to another process."""
+    return pdf_path.loaded() if isinstance(pdf_path, MemoryInput) else pdf_path
+
+
+def input_name(pdf_path):
+    """Name recorded in the filename column: the member name inside an archive."""
+    if isinstance(pdf_path, MemoryInput):
+        return pdf_path.name
+    return os.path.basename(pdf_path)
+
+
+# --------------------------------------------------------------------------- #
+# Core extraction
+# --------------------------------------------------------------------------- #
+
+# Warnings raised while reading one input.  The CLI prints them; the library
+# API (extract_submission) collects them into its result instead.
+_warning_collector = threading.local()
+
+
+def _warn(message, console=None):
+    collected = getattr(_warning_collector, 'warnings', None)
+    if collected is None:
+        print(console if console is not None else f"Warning: {message}")
+    else:
+        collected.append(message)
+
+
+# Checkbox states as the readers return them, and how they are exported.
+_CHECKBOX_STATES = {'/Yes': 'Yes', '/Off': 'No'}
+
+
+def normalize_fields(fields):
+    """
+    Turn the raw values of one PDF into export strings: resolve indirect
+    objects, decode bytes, map checkbox states to Yes/No and drop characters
+    Excel rejects from names and values.  This is the only place they are
+    cleaned; the sinks write them as they are.  SKIPPED values are passed
+    through.
+    """
+    normalized = {}
+    for name, value in fields.items():
+        name = sanitize_value(name)
+        if value is SKIPPED:
+            normalized[name] = value
+            continue
+        if hasattr(value, 'get_object'):
+            value = value.get_object()
+        if isinstance(value, bytes):
+            value = value.decode('utf-8', errors='ignore')
+        if not value:
+            normalized[name] = ''
+            continue
+        value = str(value)
+        value = _CHECKBOX_STATES.get(value, value)
+        normalized[name] = sanitize_value(value)
+    return normalized
+
+
+def _read_fields_fast(pdf_path, wanted=None):
+    """
+    Read {name: raw value} via the fast reader (see acroform_reader).
+
+    Returns None when the PDF has no /AcroForm.  Raises FastPathUnsupported
+    (or any parsing error) when the caller should fall back to PyPDF2.
+    """
+    source = pdf_path.read_bytes() if isinstance(pdf_path, MemoryInput) else pdf_path
+    return read_pdf_fields(source, wanted)
+
+
+def _read_fields_pypdf2(pdf_path, wanted=None):
+    """Read {name: raw value} via PyPDF2; None when there is no /AcroForm."""
+    if isinstance(pdf_path, MemoryInput):
+        reader = PdfReader(io.BytesIO(pdf_path.read_bytes()))
+    else:
+        reader = PdfReader(pdf_path)
+
+    if reader.is_encrypted:
+        _warn(f"{pdf_path} is encrypted. Attempting to decrypt...")
+        reader.decrypt('')
+
+    if '/AcroForm' not in reader.trailer['/Root']:
+        return None
+
+    fields = reader.get_fields() or {}
+    return {name: info.get('/V', '') if wanted is None or name in wanted else SKIPPED
+            for name, info in fields.items()}
+
+
+def read_raw_fields(pdf_path, wanted=None, name_fields=()):
+    """
+    Return {field name: raw /V value} for a PDF, or None when it has no
+    /AcroForm.  Tries the fast AcroForm-only reader first and falls back to
+    PyPDF2 for anything the fast reader cannot handle.
+
+    With wanted (a set of names) values are only decoded for those fields;
+    the others are still listed, with the value SKIPPED.  .xfdf and .fdf
+    inputs are read by their own parsers; name_fields is passed to the XFDF
+    reader.
+    """
+    if isinstance(pdf_path, MemoryInput):
+        suffix = pdf_path.kind
+    else:
+        suffix = pdf_path.lower().rsplit('.', 1)[-1]
+    if suffix == 'xfdf':
+        return _read_fields_xfdf(pdf_path, wanted, name_fields)
+    if suffix == 'fdf':
+        return _read_fields_fdf(pdf_path, wanted)
+    try:
+        return _read_fields_fast(pdf_path, wanted)
+    except MemoryError:
+        raise
+    except OSError as e:
+        # mmap reports an allocation failure (e.g. under --max-memory) as
+        # ENOMEM.  PyPDF2 would need even more memory, and swallows the
+        # MemoryError it then hits, so do not fall back.
+        if e.errno == errno.ENOMEM:
+            raise MemoryError(str(e)) from e
+        return _read_fields_pypdf2(pdf_path, wanted)
+    except Exception:
+        return _read_fields_pypdf2(pdf_path, wanted)
+
+
+def _extract_form_data(pdf_path, md_fields=None):
+    """extract_form_data() without the error handling; read errors propagate."""
+    fields = read_raw_fields(pdf_path, set(md_fields) if md_fields is not None else None,
+                             getattr(md_fields, 'name_fields', ()))
+
+    if fields is None:
+        _warn(f"{pdf_path} does not contain form fields")
+        return {}
+
+    if not fields:
+        _warn(f"No form fields found in {pdf_path}")
+        return {}
+
+    # Build raw dict (preserving PDF order)
+    raw = normalize_fields(fields)
+
+    if md_fields is not None:
+        # Filter and reorder to match the MD file exactly
+        dropped = [n for n, value in raw.items() if value is SKIPPED]
+        if dropped and not isinstance(md_fields, FieldProjection):
+            message = f"Dropped {len(dropped)} unrecognised field(s): {', '.join(dropped)}"
+            _warn(message, console=f"  {message}")
+        return {name: raw[name] for name in md_fields if name in raw}
+    else:
+        return deduplicate_fields(raw)
+
+
+def extract_form_data(pdf_path, md_fields=None):
+    """
+    Extract form field data from a PDF file.
+
+    If md_fields is provided (list of field names from the source .md file),
+    only those fields are returned, in that order.  Any field present in the
+    PDF but absent from md_fields is silently dropped.
+
+    If md_fields is None, automatic deduplication is applied instead.
+    """
+    return _extract_or_report(pdf_path, md_fields)[0]
+
+
+def _extract_or_report(pdf_path, md_fields=None):
+    """Return (form_data, read_failed), printing the error of a failed read."""
+    try:
+        return _extract_form_data(pdf_path, md_fields), False
+    except Exception as e:
+        print(f"Error reading {pdf_path}: {e}")
+        return {}, True
+
+
+# --------------------------------------------------------------------------- #
+# Parallel extraction
+# --------------------------------------------------------------------------- #
+
+_worker_md_fields = None
+
+
+def worker_context():
+    """
+    multiprocessing context for every worker process this tool starts.
+
+    Pools are started from the reader thread of a Prefetcher, and shard
+    writers while that thread runs, and fork() in a multi-threaded process
+    can leave the child stuck on a lock another thread held (logging,
+    stdio).  Workers are therefore forked from a single-threaded forkserver
+    that has already imported this module, or spawned where there is none.
+    """
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+
+
+def _init_worker(md_fields):
+    """Process-pool initializer: ship the MD field list once per worker."""
+    global _worker_md_fields
+    _worker_md_fields = md_fields
+
+
+def _extract_in_worker(pdf_path):
+    return _extract_or_report(pdf_path, _worker_md_fields)
+
+
+def iter_form_data(pdf_paths, md_fields=None, jobs=1, limits=None, failed=None):
+    """
+    Yield (pdf_path, form_data) for every input, in input order.
+
+    With jobs > 1 the PDFs are extracted in a process pool.  At most
+    jobs * 4 files are in flight at any time, so results are handed to the
+    caller as they complete (in order) instead of piling up in memory.
+    jobs == 0 means one worker per CPU.
+
+    With limits (an ExtractionLimits) every file is read in a killable
+    worker process, and files that exceed a limit are quarantined instead of
+    stalling the batch; they are yielded with empty form data.
+
+    Inputs that could not be read are yielded with empty form data too; if
+    failed is a set, their paths are also added to it.
+    """
+    if jobs == 0:
+        jobs = os.cpu_count() or 1
+
+    if limits is not None:
+        yield from _iter_isolated(pdf_paths, md_fields, max(1, jobs), limits, failed)
+        return
+
+    if jobs <= 1:
+        for pdf_path in pdf_paths:
+            print(f"Reading: {pdf_path}")
+            form_data, read_failed = _extract_or_report(pdf_path, md_fields)
+            if read_failed and failed is not None:
+                failed.add(pdf_path)
+            yield pdf_path, form_data
+        return
+
+    window = jobs * 4
+    with ProcessPoolExecutor(max_workers=jobs, mp_context=worker_context(),
+                             initializer=_init_worker, initargs=(md_fields,)) as pool:
+        pending = deque()
+        for pdf_path in pdf_paths:
+            pending.append((pdf_path, pool.submit(_extract_in_worker, load_input(pdf_path))))
+            if len(pending) >= window:
+                yield _collect(*pending.popleft(), failed)
+        while pending:
+            yield _collect(*pending.popleft(), failed)
+
+
+def _collect(pdf_path, future, failed):
+    """Wait for one pooled extraction; return (pdf_path, form_data)."""
+    print(f"Reading: {pdf_path}")
+    form_data, read_failed = future.result()
+    if read_failed and failed is not None:
+        failed.add(pdf_path)
+    return pdf_path, form_data
+
+
+# --------------------------------------------------------------------------- #
+# Library API (bytes, streams and iterators)
+# --------------------------------------------------------------------------- #
+
+class ExtractionResult:
+    """
+    Outcome of extracting one submission.
+
+    name     – the submission's name (as in the filename column)
+    fields   – {field name: value}, as written to the exports
+    warnings – messages the CLI would have printed for this input
+    error    – why the input could not be read, or None
+    """
+
+    __slots__ = ('name', 'fields', 'warnings', 'error')
+
+    def __init__(self, name, fields, warnings, error=None):
+        self.name = name
+        self.fields = fields
+        self.warnings = warnings
+        self.error = error
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    def as_dict(self):
+        return {'name': self.name, 'fields': self.fields,
+                'warnings': self.warnings, 'error': self.error}
+
+    def __repr__(self):
+        return (f"ExtractionResult({self.name!r}, {len(self.fields)} fields, "
+                f"{len(self.warnings)} warnings, error={self.error!r})")
+
+
+def as_input(source, name=None):
+    """
+    Turn source into something the readers accept: a MemoryInput for bytes,
+    bytearray, memoryview or a binary file-like object (read completely,
+    never written to disk), or the path itself for a str / os.PathLike.
+    """
+    if isinstance(source, MemoryInput):
+        return source
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        data = bytes(source)
+    elif hasattr(source, 'read'):
+        # Check the mode before reading: a text-mode read would fail with a
+        # UnicodeDecodeError, or decode the PDF into garbage.
+        if not isinstance(source.read(0), (bytes, bytearray)):
+            raise TypeError("file-like sources must be opened in binary mode")
+        data = bytes(source.read())
+        if name is None and isinstance(getattr(source, 'name', None), str):
+            name = os.path.basename(source.name)
+    elif isinstance(source, (str, os.PathLike)):
+        return os.fspath(source)
+    else:
+        raise TypeError(f"cannot extract from {type(source).__name__}")
+    return MemoryInput(name or f"submission.{_sniff_kind(data)}", data)
+
+
+class _LogCollector(logging.Handler):
+    """Logging handler that adds the calling thread's records to warnings."""
+
+    def __init__(self, warnings):
+        super().__init__(logging.WARNING)
+        self.warnings = warnings
+        self.thread = threading.get_ident()
+
+    def emit(self, record):
+        if record.thread == self.thread:
+            self.warnings.append(record.getMessage())
+
+
+def _extract_result(pdf_path, md_fields=None):
+    """
+    Extract one input, collecting warnings and errors instead of printing.
+    PyPDF2 reports recoverable damage through logging; while the handler is
+    attached those records go to the result (and not to stderr) as well.
+    """
+    _warning_collector.warnings = warnings = []
+    handler = _LogCollector(warnings)
+    pypdf_logger = logging.getLogger('PyPDF2')
+    pypdf_logger.addHandler(handler)
+    try:
+        fields = _extract_form_data(pdf_path, md_fields)
+        error = None
+    except Exception as e:
+        fields = {}
+        error = str(e) or type(e).__name__
+    finally:
+        pypdf_logger.removeHandler(handler)
+        _warning_collector.warnings = None
+    return ExtractionResult(input_name(pdf_path), fields, warnings, error)
+
+
+def extract_submission(source, name=None, md_fields=None):
+    """
+    Extract the form data of one submission and return an ExtractionResult.
+
+    source may be PDF, FDF or XFDF bytes, a binary file-like object, or a
+    path.  Nothing is printed and nothing is written to disk, and read
+    errors are reported in the result rather than raised.  name is what the
+    result (and the filename column) calls the input; md_fields works as
+    for extract_form_data().
+    """
+    return _extract_result(as_input(source, name), md_fields)
+
+
+def _extract_result_in_worker(pdf_path):
+    return _extract_result(pdf_path, _worker_md_fields)
+
+
+def iter_submissions(sources, md_fields=None, jobs=1):
+    """
+    Yield an ExtractionResult for every item of sources, in order.
+
+    Items are anything extract_submission() accepts, or (name, source)
+    pairs.  sources may be a generator; it is consumed lazily.  With
+    jobs > 1 (0 = one per CPU) the inputs are read in a process pool with
+    at most jobs * 4 in flight, as in iter_form_data().
+    """
+    inputs = (as_input(item[1], item[0]) if isinstance(item, tuple) else as_input(item)
+              for item in sources)
+    if jobs == 0:
+        jobs = os.cpu_count() or 1
+    if jobs <= 1:
+        for pdf_path in inputs:
+            yield _extract_result(pdf_path, md_fields)
+        return
+
+    window = jobs * 4
+    with ProcessPoolExecutor(max_workers=jobs, mp_context=worker_context(),
+                             initializer=_init_worker, initargs=(md_fields,)) as pool:
+        pending = deque()
+        for pdf_path in inputs:
+            pending.append(pool.submit(_extract_result_in_worker, load_input(pdf_path)))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+# --------------------------------------------------------------------------- #
+# Isolated extraction (--timeout / --max-memory)
+# --------------------------------------------------------------------------- #
+
+class ExtractionLimits:
+    """
+    Per-file limits for batch extraction, plus the files that broke them.
+
+    timeout is wall-clock seconds per file; max_memory is bytes of address
+    space a worker may grow by while reading one file.  Files that exceed a
+    limit, crash their worker or fail to parse are quarantined: they yield
+    no row and are listed, with reason and timing, in the report.
+    """
+
+    def __init__(self, timeout=None, max_memory=None):
+        self.timeout = timeout
+        self.max_memory = max_memory
+        self.quarantined = []
+        self.quarantined_paths = set()
+
+    def is_quarantined(self, path):
+        return path in self.quarantined_paths
+
+    def quarantine(self, path, reason, elapsed, detail=''):
+        self.quarantined_paths.add(path)
+        self.quarantined.append({
+            'path': path,
+            'reason': reason,
+            'seconds': round(elapsed, 3),
+            'detail': detail,
+        })
+        print(f"Quarantined {path}: {reason} after {elapsed:.1f}s"
+              + (f" ({detail})" if detail else ''))
+
+    def write_report(self, report_path):
+        if report_path.lower().endswith('.csv'):
+            with open(report_path, 'w', encoding='utf-8', newline='') as fh:
+                writer = csv.DictWriter(fh, fieldnames=['path', 'reason', 'seconds', 'detail'])
+                writer.writeheader()
+                writer.writerows(self.quarantined)
+        else:
+            with open(report_path, 'w', encoding='utf-8') as fh:
+                json.dump(self.quarantined, fh, indent=2, ensure_ascii=False)
+        print(f"Quarantine report ({len(self.quarantined)} file(s)) → {report_path}")
+
+
+def _address_space_size():
+    """Current virtual memory size of this process in bytes (0 if unknown)."""
+    try:
+        with open('/proc/self/statm') as fh:
+            return int(fh.read().split()[0]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return 0
+
+
+def _isolated_worker_main(conn, md_fields, max_memory):
+    """Worker loop: receive a path, send back (status, payload, seconds)."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # the parent handles Ctrl+C
+    if max_memory and resource is not None:
+        limit = _address_space_size() + max_memory
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+    while True:
+        try:
+            pdf_path = conn.recv()
+        except EOFError:
+            return
+        if pdf_path is None:
+            return
+        start = time.perf_counter()
+        try:
+            result = ('ok', _extract_form_data(pdf_path, md_fields))
+        except MemoryError:
+            result = ('memory', 'memory limit exceeded')
+        except Exception as e:
+            result = ('error', str(e))
+        try:
+            conn.send(result + (time.perf_counter() - start,))
+        except Exception:
+            os._exit(1)
+        if result[0] == 'memory':
+            return  # start over in a fresh process
+
+
+class IsolatedPool:
+    """
+    Worker processes that can be killed per task.
+
+    Each worker handles one file at a time over a pipe.  A worker that runs
+    past the timeout is killed and replaced; one that dies (segfault, OOM
+    kill) is reported as crashed.  Either way the other workers carry on.
+    """
+
+    def __init__(self, workers, md_fields=None, limits=None):
+        self.ctx = worker_context()
+        self.workers = max(1, workers)
+        self.md_fields = md_fields
+        self.timeout = limits.timeout if limits else None
+        self.max_memory = limits.max_memory if limits else None
+        self.idle = []   # (process, conn)
+        self.busy = {}   # conn → (process, tag, path, started)
+
+    def _spawn(self):
+        parent_conn, child_conn = self.ctx.Pipe()
+        process = self.ctx.Process(target=_isolated_worker_main,
+                                   args=(child_conn, self.md_fields, self.max_memory),
+                                   daemon=True)
+        process.start()
+        child_conn.close()
+        return process, parent_conn
+
+    @property
+    def has_capacity(self):
+        return len(self.busy) < self.workers
+
+    def submit(self, tag, pdf_path):
+        process, conn = self.idle.pop() if self.idle else self._spawn()
+        conn.send(load_input(pdf_path))
+        self.busy[conn] = (process, tag, pdf_path, time.monotonic())
+
+    def _retire(self, conn):
+        process = self.busy.pop(conn)[0]
+        if process.is_alive():
+            process.kill()
+        process.join()
+        conn.close()
+
+    def poll(self, timeout=None):
+        """
+        Wait up to timeout seconds (None = until something finishes) and
+        return [(tag, path, status, payload, seconds)] for finished tasks.
+        status is 'ok', 'error', 'memory', 'timeout' or 'crashed'.
+        """
+        if not self.busy:
+            return []
+        wait_for = timeout
+        if self.timeout is not None:
+            now = time.monotonic()
+            next_deadline = min(started for _, _, _, started in self.busy.values()) + self.timeout
+            remaining = max(0.0, next_deadline - now)
+            wait_for = remaining if timeout is None else min(timeout, remaining)
+
+        finished = []
+        for conn in wait_for_connections(list(self.busy), wait_for):
+            process, tag, pdf_path, started = self.busy[conn]
+            try:
+                status, payload, seconds = conn.recv()
+            except (EOFError, OSError):
+                self._retire(conn)
+                code = process.exitcode
+                finished.append((tag, pdf_path, 'crashed', f"worker exit code {code}",
+                                 time.monotonic() - started))
+                continue
+            if status == 'memory':
+                self._retire(conn)
+            else:
+                del self.busy[conn]
+                self.idle.append((process, conn))
+            finished.append((tag, pdf_path, status, payload, seconds))
+
+        if self.timeout is not None:
+            now = time.monotonic()
+            for conn, (_, tag, pdf_path, started) in list(self.busy.items()):
+                if now - started >= self.timeout:
+                    self._retire(conn)
+                    finished.append((tag, pdf_path, 'timeout',
+                                     f"exceeded {self.timeout:g}s", now - started))
+        return finished
+
+    def close(self):
+        for process, conn in self.idle:
+            try:
+                conn.send(None)
+            except OSError:
+                pass
+        for process, conn in self.idle:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.kill()
+            conn.close()
+        self.idle = []
+        for conn in list(self.busy):
+            self._retire(conn)
+
+
+def _iter_isolated(pdf_paths, md_fields, jobs, limits, failed=None):
+    """Ordered extraction through an IsolatedPool (see iter_form_data)."""
+    pool = IsolatedPool(jobs, md_fields, limits)
+    window = jobs * 4
+    inputs = enumerate(pdf_paths)
+    exhausted = False
+    submitted = next_index = 0
+    results = {}
+    try:
+        while True:
+            while not exhausted and pool.has_capacity and submitted - next_index < window:
+                item = next(inputs, None)
+                if item is None:
+                    exhausted = True
+                    break
+                pool.submit(*item)
+                submitted += 1
+            if exhausted and next_index == submitted:
+                return
+
+            for index, pdf_path, status, payload, seconds in pool.poll():
+                if status == 'ok':
+                    results[index] = (pdf_path, payload)
+                    continue
+                if status == 'error':
+                    print(f"Error reading {pdf_path}: {payload}")
+                if limits is not None:
+                    limits.quarantine(pdf_path, status, seconds,
+                                      '' if status == 'memory' else payload)
+                if failed is not None:
+                    failed.add(pdf_path)
+                results[index] = (pdf_path, {})
+
+            while next_index in results:
+                done_path, form_data = results.pop(next_index)
+                print(f"Reading: {done_path}")
+                yield done_path, form_data
+                next_index += 1
+    finally:
+        pool.close()
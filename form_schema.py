@@ -0,0 +1,261 @@
+"""
+form_schema.py
+Compiled form schema shared by md2pdfform.py, pdfform2excel.py and
+reorder_excel.py.
+
+A schema is the list of form fields defined in a .md file, in document
+order, with their names, types, options and defaults.  Compiled schemas are
+cached on disk keyed by the SHA-256 of the markdown, so a pipeline that
+processes thousands of files against the same template parses it once.
+
+Cache location: $MD2PDFFORM_CACHE_DIR, else $XDG_CACHE_HOME/md2pdfform,
+else ~/.cache/md2pdfform.  Set MD2PDFFORM_CACHE_DIR to an empty string to
+disable the on-disk cache.
+"""
+
+import hashlib
+import json
+import os
+import re
+import tempfile
+from pathlib import Path
+
+# Bump when parse_form_fields() output changes so stale cache entries are ignored.
+SCHEMA_VERSION = 1
+
+DEFAULT_FIELD_WIDTH = 150
+
+# md2pdfform draws radio fields with more options than this as a dropdown.
+RADIO_BUTTON_MAX_OPTIONS = 2
+
+FIELD_PATTERNS = [
+    (r'\{\{text:([^}:]+)(?::(\d*))?(?::([^}]*))?\}\}', 'text'),
+    (r'\{\{email:([^}:]+)(?::(\d*))?(?::([^}]*))?\}\}', 'email'),
+    (r'\{\{number:([^}:]+)(?::(\d*))?(?::([^}]*))?\}\}', 'number'),
+    (r'\{\{date:([^}:]+)(?::(\d*))?(?::([^}]*))?\}\}', 'date'),
+    (r'\{\{textarea:([^}:]+):(\d+)(?::(\d*))?(?::([^}]*))?\}\}', 'textarea_lines_width_default'),
+    (r'\{\{textarea:([^}:]+)(?::(\d*))?(?::([^}]*))?\}\}', 'textarea'),
+    (r'\{\{checkbox:([^}:]+)(?::([^}]*))?\}\}', 'checkbox'),
+    (r'\{\{radio:([^}:]+):([^}:]+)(?::([^}]*))?\}\}', 'radio'),
+    (r'\{\{dropdown:([^}:]+):([^}]+)\}\}', 'dropdown'),
+    (r'_{4,}', 'underlines'),
+]
+
+
+# --------------------------------------------------------------------------- #
+# Parsing
+# --------------------------------------------------------------------------- #
+
+def parse_form_fields(md_text: str, default_field_width: int = DEFAULT_FIELD_WIDTH) -> list:
+    """
+    Return one dict per field placeholder in md_text, sorted by position.
+
+    Each dict has 'type', 'name', 'placeholder', 'start' and 'end', plus
+    'width', 'lines', 'default' and 'options' where the syntax provides them.
+    Names are exactly those md2pdfform gives the PDF fields.
+    """
+    all_fields = []
+
+    for pattern, field_type in FIELD_PATTERNS:
+        for match in re.finditer(pattern, md_text):
+            field_info = {
+                'type': field_type,
+                'placeholder': match.group(),
+                'start': match.start(),
+                'end': match.end(),
+            }
+
+            if field_type in ['text', 'email', 'number', 'date']:
+                field_info['name'] = match.group(1)
+                # Check if width is specified (group 2) - can be empty string
+                if match.group(2) and match.group(2).strip():
+                    field_info['width'] = int(match.group(2))
+                else:
+                    field_info['width'] = default_field_width
+                # Check if default value is specified (group 3) - can be empty string
+                if match.group(3) is not None:
+                    field_info['default'] = match.group(3)
+
+            elif field_type == 'textarea_lines_width_default':
+                field_info['name'] = match.group(1)
+                field_info['lines'] = int(match.group(2))
+                field_info['type'] = 'textarea'
+                # Check if width is specified (group 3) - can be empty string
+                if match.group(3) and match.group(3).strip():
+                    field_info['width'] = int(match.group(3))
+                # Check if default value is specified (group 4) - can be empty string
+                if match.group(4) is not None:
+                    field_info['default'] = match.group(4)
+
+            elif field_type == 'textarea':
+                field_info['name'] = match.group(1)
+                # Check if the second group is lines, width, or default
+                if match.group(2) and match.group(2).strip():
+                    # Try to parse as number (lines or width)
+                    try:
+                        # For backward compatibility, treat single number as lines
+                        field_info['lines'] = int(match.group(2))
+                    except ValueError:
+                        # It's a default value
+                        field_info['default'] = match.group(2)
+                # Check if third group is default value - can be empty string
+                if match.group(3) is not None:
+                    field_info['default'] = match.group(3)
+
+            elif field_type == 'checkbox':
+                field_info['name'] = match.group(1)
+                # Check if default value is specified (group 2) - can be empty string
+                if match.group(2) is not None:
+                    field_info['default'] = match.group(2)
+
+            elif field_type in ['radio', 'dropdown']:
+                field_info['name'] = match.group(1)
+                field_info['options'] = [opt.strip() for opt in match.group(2).split(',')]
+                # Check if default value is specified (group 3 for radio) - can be empty string
+                if field_type == 'radio' and match.group(3) is not None:
+                    field_info['default'] = match.group(3)
+
+            elif field_type == 'underlines':
+                field_info['name'] = f"field_{len(all_fields) + 1}"
+                field_info['type'] = 'text'
+                field_info['width'] = default_field_width
+
+            if field_info['type'] == 'textarea' and 'lines' not in field_info:
+                field_info['lines'] = 3
+
+            all_fields.append(field_info)
+
+    all_fields.sort(key=lambda x: x['start'])
+    return all_fields
+
+
+# --------------------------------------------------------------------------- #
+# Schema
+# --------------------------------------------------------------------------- #
+
+class FormSchema:
+    """
+    Compiled form schema.
+
+    fields   – the raw field dicts from parse_form_fields() (a name may repeat)
+    names    – unique field names in document order
+    types    – {name: type}
+    options  – {name: [option, ...]} for radio and dropdown fields
+    defaults – {name: default value} for fields that declare one
+    """
+
+    def __init__(self, fields: list, source_sha256: str = None):
+        self.fields = fields
+        self.source_sha256 = source_sha256
+        self.names = []
+        self.types = {}
+        self.options = {}
+        self.defaults = {}
+        for field in fields:
+            name = field['name']
+            if name in self.types:
+                continue
+            self.names.append(name)
+            self.types[name] = field['type']
+            if 'options' in field:
+                self.options[name] = field['options']
+            if 'default' in field:
+                self.defaults[name] = field['default']
+
+    @property
+    def radio_buttons(self) -> list:
+        """Radio fields drawn as radio buttons (not as a dropdown), in order."""
+        return [name for name in self.names
+                if self.types[name] == 'radio'
+                and len(self.options.get(name, ())) <= RADIO_BUTTON_MAX_OPTIONS]
+
+    def to_dict(self) -> dict:
+        return {
+            'version': SCHEMA_VERSION,
+            'source_sha256': self.source_sha256,
+            'fields': self.fields,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'FormSchema':
+        return cls(data['fields'], data.get('source_sha256'))
+
+
+# --------------------------------------------------------------------------- #
+# Cache
+# --------------------------------------------------------------------------- #
+
+_memo: dict = {}  # cache key → FormSchema, for repeated use within one process
+
+
+def cache_dir():
+    """Return the on-disk cache directory, or None when caching is disabled."""
+    configured = os.environ.get('MD2PDFFORM_CACHE_DIR')
+    if configured is not None:
+        return Path(configured) if configured else None
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(Path.home(), '.cache')
+    return Path(base) / 'md2pdfform'
+
+
+def _cache_key(md_text: str, default_field_width: int) -> str:
+    digest = hashlib.sha256(f"{SCHEMA_VERSION}:{default_field_width}:".encode('utf-8'))
+    digest.update(md_text.encode('utf-8'))
+    return digest.hexdigest()
+
+
+def _read_cached(path: Path):
+    try:
+        data = json.loads(path.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return None
+    if data.get('version') != SCHEMA_VERSION:
+        return None
+    return FormSchema.from_dict(data)
+
+
+def _write_cached(path: Path, schema: FormSchema):
+    # Write to a temporary file and rename, so concurrent processes never
+    # read a partial entry.  A read-only or missing cache is not an error.
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+    except OSError:
+        return
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as fh:
+            json.dump(schema.to_dict(), fh, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    except OSError:
+        # e.g. a full disk: do not leave the partial entry behind
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+
+
+def compile_form_schema(md_text: str, default_field_width: int = DEFAULT_FIELD_WIDTH,
+                        use_cache: bool = True) -> FormSchema:
+    """Return the FormSchema for md_text, from the cache when possible."""
+    key = _cache_key(md_text, default_field_width)
+    if use_cache and key in _memo:
+        return _memo[key]
+
+    directory = cache_dir() if use_cache else None
+    cache_path = directory / f"{key}.json" if directory else None
+
+    schema = _read_cached(cache_path) if cache_path else None
+    if schema is None:
+        schema = FormSchema(parse_form_fields(md_text, default_field_width), key)
+        if cache_path:
+            _write_cached(cache_path, schema)
+
+    if use_cache:
+        _memo[key] = schema
+    return schema
+
+
+def load_form_schema(md_path, default_field_width: int = DEFAULT_FIELD_WIDTH,
+                     use_cache: bool = True) -> FormSchema:
+    """Return the FormSchema for the .md file at md_path."""
+    md_text = Path(md_path).read_text(encoding='utf-8')
+    return compile_form_schema(md_text, default_field_width, use_cache)
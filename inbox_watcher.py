@@ -0,0 +1,338 @@
+"""
+inbox_watcher.py
+Inbox watching for pdfform2excel.py (the watch command): waits for files
+dropped into a directory to stop changing, then appends them to an output
+through the --append manifest.
+"""
+
+import json
+import os
+import select
+import signal
+import struct
+import time
+from collections import deque
+
+from form_extraction import INPUT_SUFFIXES, IsolatedPool
+from manifest import Manifest, manifest_path_for, write_output_from_manifest
+from output_sinks import open_sink, sink_for
+
+
+# --------------------------------------------------------------------------- #
+# Inbox watcher (watch command)
+# --------------------------------------------------------------------------- #
+
+class _InotifyWatcher:
+    """Directory change notifications via Linux inotify (through ctypes)."""
+
+    IN_MODIFY = 0x00000002
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_Q_OVERFLOW = 0x00004000
+    _EVENT = struct.Struct('iIII')
+
+    def __init__(self, directory):
+        import ctypes
+        import ctypes.util
+
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.directory = directory
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        mask = self.IN_MODIFY | self.IN_CLOSE_WRITE | self.IN_MOVED_TO | self.IN_CREATE
+        if libc.inotify_add_watch(self.fd, os.fsencode(directory), mask) < 0:
+            err = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(err, f"inotify_add_watch failed for {directory}")
+
+    def wait(self, timeout):
+        """Return (paths with activity, rescan needed) after at most timeout seconds."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        paths, rescan = set(), False
+        if not ready:
+            return paths, rescan
+        try:
+            data = os.read(self.fd, 1 << 16)
+        except BlockingIOError:
+            return paths, rescan
+        pos = 0
+        while pos + self._EVENT.size <= len(data):
+            _, mask, _, length = self._EVENT.unpack_from(data, pos)
+            pos += self._EVENT.size
+            name = data[pos:pos + length].rstrip(b'\0')
+            pos += length
+            if mask & self.IN_Q_OVERFLOW:
+                rescan = True
+            elif name:
+                paths.add(os.path.join(self.directory, os.fsdecode(name)))
+        return paths, rescan
+
+    def close(self):
+        os.close(self.fd)
+
+
+class _PollingWatcher:
+    """Fallback watcher that compares directory listings."""
+
+    def __init__(self, directory, interval=1.0):
+        self.directory = directory
+        self.interval = interval
+        self.snapshot = self._listing()
+
+    def _listing(self):
+        listing = {}
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                try:
+                    st = entry.stat()
+                except OSError:
+                    continue
+                listing[entry.path] = (st.st_size, st.st_mtime_ns)
+        return listing
+
+    def wait(self, timeout):
+        time.sleep(min(timeout, self.interval))
+        listing = self._listing()
+        changed = {path for path, sig in listing.items() if self.snapshot.get(path) != sig}
+        self.snapshot = listing
+        return changed, False
+
+    def close(self):
+        pass
+
+
+class InboxWatcher:
+    """
+    Continuously ingest PDFs (and XFDF/FDF files) dropped into a directory.
+
+    A file is picked up once its size and mtime have been stable for
+    `settle` seconds (so partial uploads are not read), extracted in an
+    IsolatedPool (so `limits` apply per file), and journalled in batches of
+    at most `batch_size` rows or every `batch_interval` seconds.  Ingested
+    files are tracked in the same manifest as --append, so restarts never
+    duplicate rows.  CSV (with --md) and JSON Lines outputs are appended to
+    with each batch.  Other formats are rebuilt from the manifest, which
+    rewrites every row, so that happens at most every `rebuild_interval`
+    seconds and on shutdown.
+    """
+
+    def __init__(self, inbox, output_path, md_fields=None, field_types=None, jobs=1,
+                 settle=2.0, batch_size=50, batch_interval=5.0, use_polling=False,
+                 metrics_path=None, manifest_path=None, limits=None, sink_options=None,
+                 rebuild_interval=60.0):
+        self.inbox = inbox
+        self.output_path = output_path
+        self.md_fields = md_fields
+        self.field_types = field_types
+        self.jobs = jobs or os.cpu_count() or 1
+        self.settle = settle
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
+        self.rebuild_interval = rebuild_interval
+        self.use_polling = use_polling
+        self.metrics_path = metrics_path
+        self.limits = limits
+        self.sink_options = sink_options
+        self.manifest = Manifest(manifest_path or manifest_path_for(output_path))
+
+        self.pending = {}     # path → (size, mtime_ns, last change time)
+        self.ready = deque()  # settled paths waiting for a worker
+        self.pool = None
+        self.done = []        # (path, stat, sha256, form_data) waiting to be written
+        self.queued = set()   # paths that are ready, in flight or awaiting write
+        self.last_flush = time.monotonic()
+        self.last_rebuild = None    # None: the first batch is written at once
+        self.stale = False          # journalled rows not yet in the rebuilt output
+        self.ingested = 0
+        self.last_lag = (0.0, 0.0)  # (max, avg) seconds from file mtime to row written
+        self.stopping = False
+
+        sink_cls = sink_for(output_path)
+        self.sink = None
+        if getattr(sink_cls, 'appendable', False) and (md_fields is not None or not sink_cls.needs_fields):
+            self.sink = open_sink(output_path, md_fields, field_types, sink_options, append=True)
+
+    # ---- discovery --------------------------------------------------------
+
+    def _is_candidate(self, path):
+        name = os.path.basename(path)
+        return name.lower().endswith(INPUT_SUFFIXES) and not name.startswith('.')
+
+    def _notice(self, path):
+        if not self._is_candidate(path) or path in self.pending or path in self.queued:
+            return
+        try:
+            st = os.stat(path)
+        except OSError:
+            return
+        self.pending[path] = (st.st_size, st.st_mtime_ns, time.monotonic())
+
+    def _scan(self):
+        with os.scandir(self.inbox) as entries:
+            for entry in entries:
+                if entry.is_file():
+                    self._notice(entry.path)
+
+    def _promote_settled(self):
+        now = time.monotonic()
+        for path, (size, mtime_ns, changed_at) in list(self.pending.items()):
+            try:
+                st = os.stat(path)
+            except OSError:
+                del self.pending[path]   # removed or renamed away
+                continue
+            if (st.st_size, st.st_mtime_ns) != (size, mtime_ns):
+                self.pending[path] = (st.st_size, st.st_mtime_ns, now)
+            elif now - changed_at >= self.settle:
+                del self.pending[path]
+                self.ready.append(path)
+                self.queued.add(path)
+
+    # ---- extraction -------------------------------------------------------
+
+    def _submit(self):
+        while self.ready and self.pool.has_capacity:
+            path = self.ready.popleft()
+            try:
+                state, st, sha256 = self.manifest.status(path)
+            except OSError:
+                state = None
+            if state not in ('new', 'changed'):
+                self.queued.discard(path)
+                continue
+            self.pool.submit((st, sha256), path)
+
+    def _collect(self, timeout):
+        for (st, sha256), path, status, payload, seconds in self.pool.poll(timeout):
+            if status != 'ok':
+                if status == 'error':
+                    print(f"Error reading {path}: {payload}")
+                if self.limits is not None:
+                    self.limits.quarantine(path, status, seconds,
+                                           '' if status == 'memory' else payload)
+                # Not journalled: the file is retried when it changes or on restart.
+                self.queued.discard(path)
+                continue
+            self.done.append((path, st, sha256, payload))
+
+    # ---- output -----------------------------------------------------------
+
+    def _flush(self):
+        self.last_flush = time.monotonic()
+        if not self.done:
+            self._report()
+            return
+        batch, self.done = self.done, []
+        now = time.time()
+        lags = [now - st.st_mtime for _, st, _, _ in batch]
+
+        if self.sink is not None:
+            # Write rows first so a crash can at worst repeat a row, never lose one.
+            for path, _, sha256, form_data in batch:
+                if form_data:
+                    self.sink.write_row(os.path.basename(path), form_data, sha256)
+            self.sink.flush()
+            for path, st, sha256, form_data in batch:
+                self.manifest.record(path, st, sha256, os.path.basename(path), form_data)
+        else:
+            for path, st, sha256, form_data in batch:
+                self.manifest.record(path, st, sha256, os.path.basename(path), form_data)
+            self.stale = True
+            self._rebuild_if_due()
+
+        self.queued.difference_update(path for path, _, _, _ in batch)
+        self.ingested += len(batch)
+        self.last_lag = (max(lags), sum(lags) / len(lags))
+        self._report(len(batch))
+
+    def _rebuild_if_due(self, force=False):
+        """Rebuild a non-appendable output from the manifest when it is due."""
+        now = time.monotonic()
+        if not self.stale or not (force or self.last_rebuild is None
+                                  or now - self.last_rebuild >= self.rebuild_interval):
+            return
+        fields = (list(self.md_fields) if self.md_fields is not None
+                  else list(self.manifest.field_names))
+        write_output_from_manifest(self.manifest, self.output_path, fields,
+                                   self.field_types, self.sink_options)
+        self.last_rebuild = now
+        self.stale = False
+
+    def metrics(self):
+        return {
+            'pending_settle': len(self.pending),
+            'queue_depth': len(self.ready),
+            'in_flight': len(self.pool.busy) if self.pool else 0,
+            'awaiting_write': len(self.done),
+            'ingested_total': self.ingested,
+            'lag_seconds_max': round(self.last_lag[0], 3),
+            'lag_seconds_avg': round(self.last_lag[1], 3),
+            'updated_at': time.time(),
+        }
+
+    def _report(self, batch_rows=0):
+        m = self.metrics()
+        if batch_rows:
+            print(f"[watch] +{batch_rows} → {self.output_path} | queue {m['queue_depth']} "
+                  f"| in flight {m['in_flight']} | settling {m['pending_settle']} "
+                  f"| lag max {m['lag_seconds_max']:.1f}s avg {m['lag_seconds_avg']:.1f}s")
+        if self.metrics_path:
+            tmp_path = self.metrics_path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as fh:
+                json.dump(m, fh)
+            os.replace(tmp_path, self.metrics_path)
+
+    # ---- main loop --------------------------------------------------------
+
+    def _stop(self, signum, frame):
+        self.stopping = True
+
+    def run(self):
+        watcher = None
+        if not self.use_polling:
+            try:
+                watcher = _InotifyWatcher(self.inbox)
+            except (OSError, AttributeError) as e:
+                print(f"inotify unavailable ({e}); falling back to polling")
+        if watcher is None:
+            watcher = _PollingWatcher(self.inbox)
+
+        previous = signal.signal(signal.SIGTERM, self._stop)
+        print(f"Watching {self.inbox} ({type(watcher).__name__.strip('_')}) → {self.output_path}")
+        self._scan()
+        self.pool = IsolatedPool(self.jobs, self.md_fields, self.limits)
+        try:
+            while not self.stopping:
+                try:
+                    busy = self.pool.busy or self.ready
+                    timeout = 0.05 if busy else min(self.settle, 1.0)
+                    paths, rescan = watcher.wait(timeout)
+                    for path in paths:
+                        self._notice(path)
+                    if rescan:
+                        self._scan()
+                    self._promote_settled()
+                    self._submit()
+                    self._collect(timeout=0)
+                    if (len(self.done) >= self.batch_size
+                            or time.monotonic() - self.last_flush >= self.batch_interval):
+                        self._flush()
+                    self._rebuild_if_due()
+                except KeyboardInterrupt:
+                    self.stopping = True
+
+            # Drain work that was already handed to the pool.
+            while self.pool.busy:
+                self._collect(timeout=None)
+            self._flush()
+            self._rebuild_if_due(force=True)
+        finally:
+            signal.signal(signal.SIGTERM, previous)
+            self.pool.close()
+            watcher.close()
+            if self.sink is not None:
+                self.sink.close()
+            self.manifest.close()
+        print(f"Stopped. Ingested {self.ingested} file(s).")
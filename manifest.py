@@ -0,0 +1,265 @@
+"""
+manifest.py
+Incremental exports for pdfform2excel.py (--append, and the watch command):
+a journal of ingested PDFs next to the output, so later runs read only new
+or changed files and rebuild the output from the journalled rows.
+"""
+
+import hashlib
+import json
+import os
+
+from form_extraction import MemoryInput, iter_form_data
+from output_sinks import open_sink, sink_for
+
+
+# --------------------------------------------------------------------------- #
+# Incremental append (--append)
+# --------------------------------------------------------------------------- #
+
+def manifest_path_for(output_path):
+    """Default sidecar manifest location for an output file."""
+    return output_path + '.manifest.jsonl'
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    """Return the hex SHA-256 of a file's (or in-memory input's) contents."""
+    if isinstance(path, MemoryInput):
+        return hashlib.sha256(path.read_bytes()).hexdigest()
+    digest = hashlib.sha256()
+    with open(path, 'rb') as fh:
+        for chunk in iter(lambda: fh.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class Manifest:
+    """
+    Journal of ingested PDFs, stored as JSON Lines next to the output.
+
+    Each line records one extraction: the file's path, size, mtime and
+    SHA-256 together with the extracted row.  Lines are appended (and
+    flushed) as soon as a PDF has been read, so an interrupted batch resumes
+    where it stopped.  When a file is re-ingested the newer line wins but the
+    row keeps its original position.  Only a small per-path index is kept in
+    memory; rows are read back from disk when the output is rebuilt.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._open()
+
+    def _open(self):
+        self.index = {}          # abs path → (size, mtime_ns, sha256, line offset)
+        self.field_names = {}    # ordered set of every field seen
+        self.stale_lines = 0
+        if os.path.exists(self.path):
+            self._load()
+        self.fh = open(self.path, 'a', encoding='utf-8')
+
+    def _load(self):
+        offset = 0
+        good_end = 0
+        with open(self.path, 'rb') as fh:
+            for line in fh:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    self.stale_lines += 1
+                    offset += len(line)
+                    continue
+                if entry['path'] in self.index:
+                    self.stale_lines += 1
+                self.index[entry['path']] = (entry['size'], entry['mtime_ns'],
+                                             entry['sha256'], offset)
+                self.field_names.update(dict.fromkeys(entry['data']))
+                offset += len(line)
+                good_end = offset
+        if good_end < offset:
+            # A torn last line from a crash: drop it so new lines start
+            # cleanly.  That PDF is simply extracted again.
+            with open(self.path, 'r+b') as fh:
+                fh.truncate(good_end)
+
+    def status(self, path):
+        """
+        Return ('unchanged' | 'touched' | 'changed' | 'new', stat, sha256).
+
+        The hash is only computed when size or mtime differ from the
+        manifest, so unchanged files cost one stat() call.
+        """
+        st = os.stat(path)
+        known = self.index.get(os.path.abspath(path))
+        if known and known[0] == st.st_size and known[1] == st.st_mtime_ns:
+            return 'unchanged', st, known[2]
+        sha256 = file_sha256(path)
+        if known is None:
+            return 'new', st, sha256
+        if known[2] == sha256:
+            return 'touched', st, sha256
+        return 'changed', st, sha256
+
+    def read_entry(self, path):
+        with open(self.path, 'rb') as fh:
+            fh.seek(self.index[path][3])
+            return json.loads(fh.readline())
+
+    def record(self, path, st, sha256, filename, form_data):
+        entry = {
+            'path': os.path.abspath(path),
+            'size': st.st_size,
+            'mtime_ns': st.st_mtime_ns,
+            'sha256': sha256,
+            'filename': filename,
+            'data': form_data,
+        }
+        line = json.dumps(entry, ensure_ascii=False) + '\n'
+        self.fh.seek(0, os.SEEK_END)
+        offset = self.fh.tell()
+        self.fh.write(line)
+        self.fh.flush()
+        if entry['path'] in self.index:
+            self.stale_lines += 1
+        self.index[entry['path']] = (entry['size'], entry['mtime_ns'], sha256, offset)
+        self.field_names.update(dict.fromkeys(form_data))
+
+    def iter_entries(self):
+        """Yield the latest entry for every path, in first-ingested order."""
+        self.fh.flush()
+        with open(self.path, 'rb') as fh:
+            for _, _, _, offset in self.index.values():
+                fh.seek(offset)
+                yield json.loads(fh.readline())
+
+    def compact(self):
+        """Rewrite the journal keeping only the latest line per path."""
+        if not self.stale_lines:
+            return
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as out:
+            for entry in self.iter_entries():
+                out.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        self.fh.close()
+        os.replace(tmp_path, self.path)
+        self._open()
+
+    def close(self):
+        self.fh.close()
+
+
+def write_output_from_manifest(manifest, output_path, fields, field_types=None,
+                               sink_options=None, summary=None):
+    """
+    Rebuild output_path from the latest manifest rows.
+
+    The file is written next to the output and moved into place, so readers
+    never see a half-written export.  Returns the number of rows written
+    (the output is left untouched when there are none).
+    """
+    root, ext = os.path.splitext(output_path)
+    tmp_path = f"{root}.partial{ext}"
+    sink = sink_for(output_path)(tmp_path, fields, field_types, **(sink_options or {}))
+    n_rows = 0
+    try:
+        for entry in manifest.iter_entries():
+            if entry['data']:
+                sink.write_row(entry['filename'], entry['data'], entry['sha256'])
+                n_rows += 1
+                if summary is not None:
+                    summary.add(entry['data'])
+    except BaseException:
+        sink.discard()
+        raise
+
+    if not n_rows:
+        sink.discard()
+        return 0
+
+    if summary is not None:
+        summary.emit(getattr(sink, 'wb', None))
+    sink.close()
+    os.replace(tmp_path, output_path)
+    return n_rows
+
+
+def append_pdfs_to_output(pdf_paths, output_path, md_fields=None, jobs=1,
+                          field_types=None, manifest_path=None, limits=None,
+                          sink_options=None, summary=None):
+    """
+    Add new or changed PDFs to an existing combined export.
+
+    PDFs whose size/mtime (or, failing that, content hash) match the
+    manifest are not read again.  New and changed PDFs are extracted and
+    journalled, then the output is rebuilt from the manifest, so rows for
+    previously ingested PDFs never require reparsing.  Sinks that update in
+    place (SQLite) just receive the new rows, and a summary then covers
+    only the rows added by this run.
+    """
+    manifest_path = manifest_path or manifest_path_for(output_path)
+    in_place = getattr(sink_for(output_path), 'in_place', False)
+    if not in_place and os.path.exists(output_path) and not os.path.exists(manifest_path):
+        print(f"Error: {output_path} exists but has no manifest ({manifest_path}). "
+              "Remove it or choose another output to start an --append series.")
+        return False
+
+    manifest = Manifest(manifest_path)
+    try:
+        to_read = {}  # path → (stat, sha256)
+        counts = {'unchanged': 0, 'touched': 0, 'changed': 0, 'new': 0}
+        for pdf_path in pdf_paths:
+            try:
+                state, st, sha256 = manifest.status(pdf_path)
+            except OSError as e:
+                # Vanished or unreadable since it was listed: leave it for
+                # the next run rather than giving up on the whole batch.
+                print(f"Skipping {pdf_path}: {e.strerror or e}")
+                continue
+            counts[state] += 1
+            if state in ('new', 'changed'):
+                to_read[pdf_path] = (st, sha256)
+            elif state == 'touched':
+                # Same content, new mtime: refresh metadata, reuse the row.
+                entry = manifest.read_entry(os.path.abspath(pdf_path))
+                manifest.record(pdf_path, st, sha256, entry['filename'], entry['data'])
+
+        print(f"Manifest: {counts['new']} new, {counts['changed']} changed, "
+              f"{counts['unchanged'] + counts['touched']} already ingested")
+
+        sink = None
+        if in_place:
+            sink = open_sink(output_path, md_fields, field_types, sink_options, append=True)
+        n_rows = 0
+        failed = set()
+        try:
+            for pdf_path, form_data in iter_form_data(list(to_read), md_fields, jobs, limits,
+                                                      failed):
+                if pdf_path in failed:
+                    continue  # not journalled, so the file is tried again on the next run
+                st, sha256 = to_read[pdf_path]
+                if sink is not None and form_data:
+                    sink.write_row(os.path.basename(pdf_path), form_data, sha256)
+                    n_rows += 1
+                    if summary is not None:
+                        summary.add(form_data)
+                manifest.record(pdf_path, st, sha256, os.path.basename(pdf_path), form_data)
+        finally:
+            if sink is not None:
+                sink.close()
+
+        manifest.compact()
+
+        fields = list(md_fields) if md_fields is not None else list(manifest.field_names)
+        if not in_place:
+            n_rows = write_output_from_manifest(manifest, output_path, fields, field_types,
+                                                sink_options, summary)
+        elif summary is not None:
+            summary.emit()
+        if not n_rows and not in_place:
+            print("No form data found in any PDF")
+            return False
+    finally:
+        manifest.close()
+
+    print(f"Exported {n_rows} PDFs × {len(fields)} fields → {output_path} "
+          f"({len(to_read)} read this run)")
+    return True
@@ -9,6 +9,7 @@ from reportlab.lib.colors import black, blue, red
 from reportlab.lib.utils import simpleSplit
 import markdown
 from bs4 import BeautifulSoup
+from form_schema import RADIO_BUTTON_MAX_OPTIONS, compile_form_schema
 
 class MarkdownToPDFForm:
     def __init__(self):
@@ -69,94 +70,9 @@ class MarkdownToPDFForm:
         
     def parse_markdown_forms(self, md_text):
         """Parse markdown text and identify form field patterns"""
-        patterns = [
-            (r'\{\{text:([^}:]+)(?::(\d*))?(?::([^}]*))?\}\}', 'text'),
-            (r'\{\{email:([^}:]+)(?::(\d*))?(?::([^}]*))?\}\}', 'email'),
-            (r'\{\{number:([^}:]+)(?::(\d*))?(?::([^}]*))?\}\}', 'number'),
-            (r'\{\{date:([^}:]+)(?::(\d*))?(?::([^}]*))?\}\}', 'date'),
-            (r'\{\{textarea:([^}:]+):(\d+)(?::(\d*))?(?::([^}]*))?\}\}', 'textarea_lines_width_default'),
-            (r'\{\{textarea:([^}:]+)(?::(\d*))?(?::([^}]*))?\}\}', 'textarea'),
-            (r'\{\{checkbox:([^}:]+)(?::([^}]*))?\}\}', 'checkbox'),
-            (r'\{\{radio:([^}:]+):([^}:]+)(?::([^}]*))?\}\}', 'radio'),
-            (r'\{\{dropdown:([^}:]+):([^}]+)\}\}', 'dropdown'),
-            (r'_{4,}', 'underlines'),
-        ]
-        
-        all_fields = []
-        
-        for pattern, field_type in patterns:
-            matches = list(re.finditer(pattern, md_text))
-            
-            for match in matches:
-                field_info = {
-                    'type': field_type,
-                    'placeholder': match.group(),
-                    'start': match.start(),
-                    'end': match.end(),
-                }
-                
-                if field_type in ['text', 'email', 'number', 'date']:
-                    field_info['name'] = match.group(1)
-                    # Check if width is specified (group 2) - can be empty string
-                    if match.group(2) and match.group(2).strip():
-                        field_info['width'] = int(match.group(2))
-                    else:
-                        field_info['width'] = self.default_field_width
-                    # Check if default value is specified (group 3) - can be empty string
-                    if match.group(3) is not None:
-                        field_info['default'] = match.group(3)
-                        
-                elif field_type == 'textarea_lines_width_default':
-                    field_info['name'] = match.group(1)
-                    field_info['lines'] = int(match.group(2))
-                    field_info['type'] = 'textarea'
-                    # Check if width is specified (group 3) - can be empty string
-                    if match.group(3) and match.group(3).strip():
-                        field_info['width'] = int(match.group(3))
-                    # Check if default value is specified (group 4) - can be empty string
-                    if match.group(4) is not None:
-                        field_info['default'] = match.group(4)
-                        
-                elif field_type == 'textarea':
-                    field_info['name'] = match.group(1)
-                    # Check if the second group is lines, width, or default
-                    if match.group(2) and match.group(2).strip():
-                        # Try to parse as number (lines or width)
-                        try:
-                            num_val = int(match.group(2))
-                            # For backward compatibility, treat single number as lines
-                            field_info['lines'] = num_val
-                        except ValueError:
-                            # It's a default value
-                            field_info['default'] = match.group(2)
-                    # Check if third group is default value - can be empty string
-                    if match.group(3) is not None:
-                        field_info['default'] = match.group(3)
-                    
-                elif field_type == 'checkbox':
-                    field_info['name'] = match.group(1)
-                    # Check if default value is specified (group 2) - can be empty string
-                    if match.group(2) is not None:
-                        field_info['default'] = match.group(2)
-                    
-                elif field_type in ['radio', 'dropdown']:
-                    field_info['name'] = match.group(1)
-                    field_info['options'] = [opt.strip() for opt in match.group(2).split(',')]
-                    # Check if default value is specified (group 3 for radio) - can be empty string
-                    if field_type == 'radio' and match.group(3) is not None:
-                        field_info['default'] = match.group(3)
-                    
-                elif field_type == 'underlines':
-                    field_info['name'] = f"field_{len(all_fields) + 1}"
-                    field_info['type'] = 'text'
-                    field_info['width'] = self.default_field_width
-                
-                if field_info['type'] == 'textarea' and 'lines' not in field_info:
-                    field_info['lines'] = 3
-                
-                all_fields.append(field_info)
-        
-        all_fields.sort(key=lambda x: x['start'])
+        # Parsing is shared with pdfform2excel/reorder_excel and cached on disk
+        schema = compile_form_schema(md_text, self.default_field_width)
+        all_fields = [dict(field) for field in schema.fields]
         return all_fields, md_text
 
     def create_pdf_form_from_file(self, input_file, output_file=None):
@@ -554,7 +470,7 @@ class MarkdownToPDFForm:
         elif field_type == 'radio':
             # Estimate based on number of options
             num_options = len(field.get('options', []))
-            if num_options <= 2:
+            if num_options <= RADIO_BUTTON_MAX_OPTIONS:
                 return 200  # Radio buttons take more space
             else:
                 return 300  # Dropdown for many options
@@ -1076,7 +992,7 @@ class MarkdownToPDFForm:
                 num_options = len(field['options'])
                 default_value = field.get('default', '')
                 
-                if num_options <= 2:
+                if num_options <= RADIO_BUTTON_MAX_OPTIONS:
                     current_line_x = x
                     current_y = y
                     max_option_width = 0
@@ -0,0 +1,473 @@
+"""
+output_sinks.py
+Streaming writers for the combined export layout of pdfform2excel.py (one
+row per PDF): .xlsx, CSV, JSON Lines, Parquet and SQLite.
+
+Every sink takes (output_path, fields, field_types, **options) and has
+write_row(filename, form_data, file_hash), close() and discard().  Values
+arrive already normalized; the sinks write them as they are.
+"""
+
+import csv
+import datetime
+import hashlib
+import json
+import math
+import os
+import re
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import openpyxl
+
+from compact_xlsx import CompactWorkbook, header_cell, sanitize_value
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # only needed for Parquet output
+    pa = pq = None
+
+
+# --------------------------------------------------------------------------- #
+# Typed values (--typed)
+# --------------------------------------------------------------------------- #
+# Exported values are strings.  With --typed, .xlsx output stores number,
+# date and checkbox fields (as declared in the MD file) as real numbers,
+# dates and booleans, so they sort, filter and sum in Excel.  A value that
+# does not parse is kept as text.  Numbers with leading zeros or more than
+# 15 digits stay text, as Excel would change them, and so do decimals whose
+# text is not the canonical form ('+5', '1.50', '1e3'): typed cells must read
+# back as the same text (see merge_outputs in shards.py).
+
+_NUMBER_RE = re.compile(r'[+-]?(?:0|[1-9]\d*)(?:\.\d+)?(?:[eE][+-]?\d+)?\Z')
+_DATE_RE = re.compile(r'\d{4}-\d{2}-\d{2}\Z')
+_BOOLEANS = {'Yes': True, 'No': False}
+
+
+def _to_number(text):
+    if not _NUMBER_RE.match(text):
+        return text
+    if text.lstrip('+-').isdigit():
+        if len(text.lstrip('+-')) > 15:
+            return text
+        number = int(text)
+    else:
+        number = float(text)
+    return number if math.isfinite(number) and repr(number) == text else text
+
+
+def _to_date(text):
+    if not _DATE_RE.match(text):
+        return text
+    try:
+        return datetime.date.fromisoformat(text)
+    except ValueError:
+        return text
+
+
+def _to_bool(text):
+    return _BOOLEANS.get(text, text)
+
+
+TYPE_CONVERTERS = {'number': _to_number, 'date': _to_date, 'checkbox': _to_bool}
+
+
+def typed_converters(fields, field_types):
+    """Per-column converter (or None) for fields, from the MD field types."""
+    field_types = field_types or {}
+    return [TYPE_CONVERTERS.get(field_types.get(name)) for name in fields]
+
+
+# --------------------------------------------------------------------------- #
+# Sinks
+# --------------------------------------------------------------------------- #
+
+FILENAME_COLUMN = 'PDF Filename'
+
+# Field types whose values come from a small fixed set of options.
+CATEGORICAL_TYPES = {'radio', 'dropdown', 'checkbox'}
+
+
+def _claim_stdout():
+    """
+    Take over stdout for data output.
+
+    Returns a text stream on the original stdout and points file descriptor 1
+    at stderr, so progress messages (including those printed by worker
+    processes) cannot end up in the data stream.
+    """
+    sys.stdout.flush()
+    data_fd = os.dup(1)
+    os.dup2(2, 1)
+    return os.fdopen(data_fd, 'w', encoding='utf-8', newline='')
+
+
+class XlsxSink:
+    """
+    Streaming writer for the combined layout (one PDF per row).
+
+    Uses a CompactWorkbook, so rows are compressed into the output as they
+    are appended, repeated values are stored once in the shared-strings
+    table, and memory does not grow with the number of rows.
+    """
+
+    needs_fields = True
+    appendable = False
+
+    def __init__(self, output_path, fields, field_types=None, typed=False):
+        self.output_path = output_path
+        self.fields = list(fields)
+        self.converters = typed_converters(self.fields, field_types) if typed else None
+        self.wb = CompactWorkbook(output_path)
+        self.ws = self.wb.create_sheet("Form Data")
+
+        self.ws.column_dimensions['A'].width = 30
+        for col_idx in range(2, len(self.fields) + 2):
+            self.ws.column_dimensions[openpyxl.utils.get_column_letter(col_idx)].width = 25
+
+        self.ws.append([header_cell(self.ws, name) for name in [FILENAME_COLUMN] + self.fields])
+
+    def write_row(self, filename, form_data, file_hash=None):
+        values = [form_data.get(name, '') for name in self.fields]
+        if self.converters:
+            values = [convert(v) if convert and v else v
+                      for convert, v in zip(self.converters, values)]
+        self.ws.append([sanitize_value(filename)] + values)
+
+    def close(self):
+        self.wb.save()
+
+    def discard(self):
+        self.wb.discard()
+
+
+class CsvSink:
+    """
+    Streaming CSV writer; one header row, then one row per PDF.
+
+    With append=True an existing file with the same header is extended
+    instead of overwritten.
+    """
+
+    needs_fields = True
+    appendable = True
+
+    def __init__(self, output_path, fields, field_types=None, append=False):
+        self.output_path = output_path
+        self.fields = list(fields)
+        header = [FILENAME_COLUMN] + self.fields
+        if append and os.path.exists(output_path) and os.path.getsize(output_path):
+            with open(output_path, encoding='utf-8', newline='') as fh:
+                existing = next(csv.reader(fh), [])
+            if existing != header:
+                raise ValueError(f"Cannot append to {output_path}: its header does not "
+                                 "match the current field list")
+            self.fh = open(output_path, 'a', encoding='utf-8', newline='')
+            self.writer = csv.writer(self.fh)
+        else:
+            self.fh = open(output_path, 'w', encoding='utf-8', newline='')
+            self.writer = csv.writer(self.fh)
+            self.writer.writerow(header)
+
+    def write_row(self, filename, form_data, file_hash=None):
+        self.writer.writerow([filename] + [form_data.get(name, '') for name in self.fields])
+
+    def flush(self):
+        self.fh.flush()
+
+    def close(self):
+        self.fh.close()
+
+    def discard(self):
+        self.fh.close()
+        os.remove(self.output_path)
+
+
+class JsonLinesSink:
+    """
+    JSON Lines writer: one object per PDF.  Writes to stdout when
+    output_path is '-'.  Does not need the column set up front; without
+    fields each object holds exactly the fields found in that PDF.
+    """
+
+    needs_fields = False
+    appendable = True
+
+    def __init__(self, output_path, fields=None, field_types=None, append=False):
+        self.output_path = output_path
+        self.fields = list(fields) if fields is not None else None
+        if output_path == '-':
+            self.fh = _claim_stdout()
+        else:
+            self.fh = open(output_path, 'a' if append else 'w', encoding='utf-8')
+
+    def write_row(self, filename, form_data, file_hash=None):
+        if self.fields is not None:
+            form_data = {name: form_data.get(name, '') for name in self.fields}
+        record = {FILENAME_COLUMN: filename}
+        record.update(form_data)
+        self.fh.write(json.dumps(record, ensure_ascii=False))
+        self.fh.write('\n')
+
+    def flush(self):
+        self.fh.flush()
+
+    def close(self):
+        self.fh.close()
+
+    def discard(self):
+        self.fh.close()
+        if self.output_path != '-':
+            os.remove(self.output_path)
+
+
+class ParquetSink:
+    """
+    Parquet writer (requires pyarrow).
+
+    Rows are buffered per column and written as one row group every
+    ROW_GROUP_SIZE rows.  Radio, dropdown and checkbox fields are stored as
+    dictionary-encoded columns.
+    """
+
+    needs_fields = True
+    appendable = False
+    ROW_GROUP_SIZE = 10000
+
+    def __init__(self, output_path, fields, field_types=None):
+        if pa is None:
+            raise RuntimeError("pyarrow is required for Parquet output. Install with: pip install pyarrow")
+        field_types = field_types or {}
+        self.output_path = output_path
+        self.fields = list(fields)
+        columns = [pa.field(FILENAME_COLUMN, pa.string())]
+        for name in self.fields:
+            if field_types.get(name) in CATEGORICAL_TYPES:
+                columns.append(pa.field(name, pa.dictionary(pa.int32(), pa.string())))
+            else:
+                columns.append(pa.field(name, pa.string()))
+        self.schema = pa.schema(columns)
+        self.writer = pq.ParquetWriter(output_path, self.schema)
+        self._reset()
+
+    def _reset(self):
+        self.buffer = [[] for _ in range(len(self.fields) + 1)]
+        self.buffered = 0
+
+    def _flush(self):
+        if not self.buffered:
+            return
+        arrays = [
+            pa.array(values, type=pa.string()).cast(col.type)
+            if pa.types.is_dictionary(col.type)
+            else pa.array(values, type=col.type)
+            for values, col in zip(self.buffer, self.schema)
+        ]
+        self.writer.write_table(pa.Table.from_arrays(arrays, schema=self.schema))
+        self._reset()
+
+    def write_row(self, filename, form_data, file_hash=None):
+        self.buffer[0].append(filename)
+        for column, name in zip(self.buffer[1:], self.fields):
+            column.append(form_data.get(name, ''))
+        self.buffered += 1
+        if self.buffered >= self.ROW_GROUP_SIZE:
+            self._flush()
+
+    def close(self):
+        self._flush()
+        self.writer.close()
+
+    def discard(self):
+        self.writer.close()
+        os.remove(self.output_path)
+
+
+class SqliteSink:
+    """
+    SQLite writer: one table per form schema, one row per submission.
+
+    Rows are keyed on the PDF's SHA-256 and upserted, so ingesting the same
+    file again updates its row instead of adding a duplicate.  Inserts are
+    batched BATCH_SIZE rows per transaction.  Columns follow the field list
+    (MD order); fields seen later are added with ALTER TABLE.  SQLite
+    column names ignore case, so a field whose name differs from an earlier
+    one only in case gets the column NAME_2 (NAME_3, ...).  Number fields
+    get NUMERIC affinity so they compare as numbers in queries, and empty
+    values are stored as NULL.
+    """
+
+    needs_fields = False
+    needs_hash = True
+    appendable = True
+    in_place = True
+    BATCH_SIZE = 1000
+    META_COLUMNS = ('_file_hash', '_filename', '_ingested_at')
+
+    def __init__(self, output_path, fields=None, field_types=None, append=False,
+                 table=None, index_fields=()):
+        self.output_path = output_path
+        self.field_types = field_types or {}
+        self.table = table or 'submissions'
+        self.conn = sqlite3.connect(output_path)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        with self.conn:
+            self.conn.execute(
+                f'CREATE TABLE IF NOT EXISTS {sql_name(self.table)} ('
+                '_file_hash TEXT PRIMARY KEY, _filename TEXT NOT NULL, _ingested_at TEXT NOT NULL)'
+            )
+        self.column_fields = {  # column name → field written to it, in table order
+            row[1]: row[1]
+            for row in self.conn.execute(f'PRAGMA table_info({sql_name(self.table)})')
+            if row[1] not in self.META_COLUMNS
+        }
+        self.field_columns = {name: name for name in self.column_fields}
+        if fields is not None:
+            unknown = [name for name in index_fields
+                       if name not in fields and name not in self.field_columns]
+            if unknown:
+                self.conn.close()
+                raise ValueError(f"cannot index unknown field(s): {', '.join(unknown)}")
+        self._add_columns(list(fields or []) + list(index_fields))
+        with self.conn:
+            for name in index_fields:
+                column = self.field_columns[name]
+                self.conn.execute(
+                    f'CREATE INDEX IF NOT EXISTS {sql_name(f"idx_{self.table}_{column}")} '
+                    f'ON {sql_name(self.table)} ({sql_name(column)})'
+                )
+        self.pending = []
+
+    def _column_for(self, name):
+        """The column for a new field: its name, unless that is taken ignoring case."""
+        taken = {c.lower() for c in self.META_COLUMNS}
+        taken.update(c.lower() for c in self.column_fields)
+        column, n = name, 1
+        while column.lower() in taken and column not in self.column_fields:
+            n += 1
+            column = f"{name}_{n}"
+        return column
+
+    def _add_columns(self, names):
+        with self.conn:
+            for name in names:
+                if name in self.field_columns:
+                    continue
+                column = self._column_for(name)
+                if column not in self.column_fields:
+                    affinity = 'NUMERIC' if self.field_types.get(name) == 'number' else 'TEXT'
+                    self.conn.execute(f'ALTER TABLE {sql_name(self.table)} '
+                                      f'ADD COLUMN {sql_name(column)} {affinity}')
+                else:
+                    # A column made for this field by an earlier run.
+                    del self.field_columns[self.column_fields[column]]
+                self.column_fields[column] = name
+                self.field_columns[name] = column
+
+    def write_row(self, filename, form_data, file_hash=None):
+        if file_hash is None:
+            raise ValueError("SQLite output needs the file hash of every row")
+        self.pending.append((file_hash, filename, form_data))
+        if len(self.pending) >= self.BATCH_SIZE:
+            self.flush()
+
+    def flush(self):
+        if not self.pending:
+            return
+        batch, self.pending = self.pending, []
+        new_names = {}
+        for _, _, form_data in batch:
+            new_names.update(dict.fromkeys(form_data))
+        self._add_columns(list(new_names))
+
+        columns = list(self.META_COLUMNS) + list(self.column_fields)
+        fields = list(self.column_fields.values())
+        names = ', '.join(sql_name(c) for c in columns)
+        updates = ', '.join(f'{sql_name(c)} = excluded.{sql_name(c)}' for c in columns[1:])
+        sql = (f'INSERT INTO {sql_name(self.table)} ({names}) '
+               f'VALUES ({", ".join("?" * len(columns))}) '
+               f'ON CONFLICT(_file_hash) DO UPDATE SET {updates}')
+        now = time.strftime('%Y-%m-%dT%H:%M:%S')
+        with self.conn:
+            self.conn.executemany(sql, (
+                [file_hash, filename, now] + [form_data.get(f) or None for f in fields]
+                for file_hash, filename, form_data in batch
+            ))
+
+    def close(self):
+        self.flush()
+        self.conn.close()
+
+    def discard(self):
+        self.pending = []
+        self.conn.close()  # earlier submissions in the database are kept
+
+
+def sql_name(name):
+    """Quote an SQL identifier."""
+    return '"' + name.replace('"', '""') + '"'
+
+
+def sqlite_table_name(md_path, md_fields):
+    """
+    Table name for a form schema: the MD file's stem plus a short hash of
+    its field list, so a changed form gets its own table.
+    """
+    stem = re.sub(r'\W+', '_', Path(md_path).stem).strip('_') or 'form'
+    digest = hashlib.sha1('\n'.join(md_fields).encode('utf-8')).hexdigest()[:8]
+    return f"{stem}_{digest}"
+
+
+SINKS = {
+    '.xlsx': XlsxSink,
+    '.csv': CsvSink,
+    '.jsonl': JsonLinesSink,
+    '.ndjson': JsonLinesSink,
+    '.parquet': ParquetSink,
+    '.sqlite': SqliteSink,
+    '.sqlite3': SqliteSink,
+    '.db': SqliteSink,
+}
+
+
+def spool_rows(rows):
+    """
+    Stage (filename, form_data) rows in a temporary file.
+
+    Used when the column set is not known up front (no --md): the header can
+    only be written once every PDF has been seen, so rows are parked on disk
+    rather than in memory.  Returns (fields, row iterator).  Rows are
+    (filename, form_data, file_hash) tuples as produced by iter_rows() in pdfform2excel.py.
+    """
+    spool = tempfile.TemporaryFile('w+', encoding='utf-8')
+    field_names = {}  # ordered set
+    for row in rows:
+        field_names.update(dict.fromkeys(row[1]))
+        spool.write(json.dumps(row, ensure_ascii=False))
+        spool.write('\n')
+
+    def replay():
+        with spool:
+            spool.seek(0)
+            for line in spool:
+                yield tuple(json.loads(line))
+
+    return list(field_names), replay()
+
+
+def sink_for(output_path):
+    """Pick the sink class from the output file extension ('-' = JSON Lines on stdout)."""
+    if output_path == '-':
+        return JsonLinesSink
+    return SINKS[os.path.splitext(output_path)[1].lower()]
+
+
+def open_sink(output_path, fields, field_types=None, sink_options=None, **kwargs):
+    """Instantiate the sink for output_path; sink_options are sink-specific keywords."""
+    return sink_for(output_path)(output_path, fields, field_types,
+                                 **kwargs, **(sink_options or {}))
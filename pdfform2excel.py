@@ -8,10 +8,19 @@ import sys
 import argparse
 import os
 import re
+import sqlite3
+import json
+import time
+import tarfile
+import zipfile
+import queue
+import threading
 from pathlib import Path
 
+from form_schema import load_form_schema
+
 try:
-    from PyPDF2 import PdfReader
+    import PyPDF2  # read by form_extraction; checked here for a clear error
 except ImportError:
     print("Error: PyPDF2 is required. Install with: pip install PyPDF2")
     sys.exit(1)
@@ -23,183 +32,144 @@ except ImportError:
     print("Error: openpyxl is required. Install with: pip install openpyxl")
     sys.exit(1)
 
+try:
+    import resource
+except ImportError:  # not available on Windows; --max-memory is then ignored
+    resource = None
 
-# --------------------------------------------------------------------------- #
-# MD field extraction (used when --md is provided)
-# --------------------------------------------------------------------------- #
-
-def extract_field_names_from_md(md_path: str) -> list:
-    """Return field names in the order they appear in the .md file."""
-    text = Path(md_path).read_text(encoding="utf-8")
-
-    entries = []  # (position, name)
-    underscore_counter = 0
-
-    for m in re.finditer(
-        r'\{\{(?:text|email|number|date|textarea|checkbox|radio|dropdown)'
-        r':([A-Za-z0-9_]+)',
-        text,
-    ):
-        entries.append((m.start(), m.group(1)))
-
-    for m in re.finditer(r'_{4,}', text):
-        underscore_counter += 1
-        entries.append((m.start(), f"field_{underscore_counter}"))
-
-    entries.sort(key=lambda x: x[0])
-
-    seen = set()
-    ordered = []
-    for _, name in entries:
-        if name not in seen:
-            seen.add(name)
-            ordered.append(name)
-
-    return ordered
+try:
+    import pyarrow as pa
+except ImportError:  # only needed for Parquet output
+    pa = None
+
+from compact_xlsx import header_cell, percent_cell
+from form_extraction import (ArchiveMember, ExtractionLimits, INPUT_SUFFIXES, export_pdfs_to_xfdf,
+                             extract_field_names_from_md, extract_field_options_from_md,
+                             extract_field_types_from_md, extract_form_data, field_list,
+                             input_name, is_archive, iter_form_data, list_archive_members,
+                             project_fields)
+# The library API (see README), importable from here as before.
+from form_extraction import ExtractionResult, extract_submission, iter_submissions
+from inbox_watcher import InboxWatcher
+from manifest import append_pdfs_to_output, file_sha256
+from output_sinks import (CATEGORICAL_TYPES, SINKS, ParquetSink, SqliteSink, XlsxSink, open_sink,
+                          sink_for, spool_rows, sqlite_table_name)
+from shards import (EXCEL_MAX_ROWS, ShardedSink, expand_merge_inputs, merge_outputs,
+                    parse_shard_spec, select_shard, write_empty_export)
 
 
 # --------------------------------------------------------------------------- #
-# Deduplication (used when --md is NOT provided)
+# Summary statistics (--summary)
 # --------------------------------------------------------------------------- #
 
-def deduplicate_fields(form_data: dict) -> dict:
+class FormSummary:
     """
-    Remove phantom fields introduced by two known md2pdfform artefacts:
+    Per-field aggregates built in the same pass that writes the export.
 
-    1. PyPDF2 radio-button duplicates – when acroForm.radio() is called once
-       per option with the same field name, PyPDF2 renames duplicates as
-       'name-1', 'name-2', etc.  The base 'name' already holds the correct
-       selected value, so the suffixed copies are dropped.
+    Every field tracks how many rows filled it in.  Radio and dropdown
+    fields also count each option (declared options start at zero), and
+    checkboxes count Yes against No/blank.  Free-text values are never
+    stored, so memory depends only on the number of fields and options.
 
-    2. Fallback checkboxes – when acroForm.radio/choice fails, md2pdfform
-       creates individual checkboxes named 'name_0', 'name_1', etc. (no base
-       'name' exists).  These are merged back into a single 'name' entry whose
-       value lists the checked option indices (or is empty when none checked).
+    With report_path None the summary goes to a 'Summary' sheet of the
+    .xlsx output; otherwise it is written there as JSON.
     """
-    result = {}
 
-    # ---- pass 1: collect everything, skip PyPDF2 '-N' duplicates ----------
-    # Pattern: ends with '-' followed by one or more digits
-    dash_suffix = re.compile(r'^(.+)-(\d+)$')
-
-    for name, value in form_data.items():
-        m = dash_suffix.match(name)
-        if m and m.group(1) in form_data:
-            # Base name already present → this is a PyPDF2-renamed duplicate
-            continue
-        result[name] = value
-
-    # ---- pass 2: merge '_N' fallback checkboxes into base name -------------
-    # Pattern: ends with '_' followed by one or more digits
-    under_suffix = re.compile(r'^(.+)_(\d+)$')
-
-    groups = {}   # base_name → {index: value}
-    lone = {}     # names that are NOT part of any '_N' group
-    for name, value in result.items():
-        m = under_suffix.match(name)
-        if m:
-            base = m.group(1)
-            idx  = int(m.group(2))
-            # Only treat as a group if the base name is NOT itself a real field
-            if base not in result:
-                groups.setdefault(base, {})[idx] = value
-                continue
-        lone[name] = value
-
-    # Rebuild in original insertion order: lone fields first (preserving order),
-    # then synthesised base names inserted at the position of their first member.
-    merged = {}
-    seen_bases = set()
-    for name, value in result.items():
-        m = under_suffix.match(name)
-        if m:
-            base = m.group(1)
-            if base in groups and base not in seen_bases:
-                seen_bases.add(base)
-                # Value: the checked item(s), or empty if all unchecked
-                checked = [
-                    str(idx) for idx, v in sorted(groups[base].items())
-                    if str(v).lower() not in ('', 'no', '/off', 'false', '0')
-                ]
-                merged[base] = ', '.join(checked)
-            # Skip the individual _N entry
-        elif name in lone:
-            merged[name] = value
-
-    return merged
-
-
-# --------------------------------------------------------------------------- #
-# Core extraction
-# --------------------------------------------------------------------------- #
-
-def sanitize_value(value):
-    """Remove illegal characters for Excel cells"""
-    if not isinstance(value, str):
-        return value
-    sanitized = ''.join(char for char in value if char.isprintable() or char in '\n\r\t')
-    sanitized = re.sub(r'[\x00-\x08\x0B-\x0C\x0E-\x1F]', '', sanitized)
-    return sanitized
-
-
-def extract_form_data(pdf_path, md_fields=None):
-    """
-    Extract form field data from a PDF file.
-
-    If md_fields is provided (list of field names from the source .md file),
-    only those fields are returned, in that order.  Any field present in the
-    PDF but absent from md_fields is silently dropped.
-
-    If md_fields is None, automatic deduplication is applied instead.
-    """
-    try:
-        reader = PdfReader(pdf_path)
-
-        if reader.is_encrypted:
-            print(f"Warning: {pdf_path} is encrypted. Attempting to decrypt...")
-            reader.decrypt('')
-
-        if '/AcroForm' not in reader.trailer['/Root']:
-            print(f"Warning: {pdf_path} does not contain form fields")
-            return {}
-
-        fields = reader.get_fields()
-
-        if not fields:
-            print(f"Warning: No form fields found in {pdf_path}")
-            return {}
-
-        # Build raw dict (preserving PDF order)
-        raw = {}
-        for field_name, field_info in fields.items():
-            value = field_info.get('/V', '')
-
-            if hasattr(value, 'get_object'):
-                value = value.get_object()
-
-            if isinstance(value, bytes):
-                value = value.decode('utf-8', errors='ignore')
-
-            if value == '/Yes':
-                value = 'Yes'
-            elif value == '/Off':
-                value = 'No'
-
-            raw[field_name] = sanitize_value(str(value) if value else '')
-
-        if md_fields is not None:
-            # Filter and reorder to match the MD file exactly
-            md_set = set(md_fields)
-            dropped = [n for n in raw if n not in md_set]
-            if dropped:
-                print(f"  Dropped {len(dropped)} unrecognised field(s): {', '.join(dropped)}")
-            return {name: raw[name] for name in md_fields if name in raw}
-        else:
-            return deduplicate_fields(raw)
-
-    except Exception as e:
-        print(f"Error reading {pdf_path}: {e}")
-        return {}
+    def __init__(self, fields=None, field_types=None, field_options=None, report_path=None):
+        self.field_types = field_types or {}
+        self.report_path = report_path
+        self.rows = 0
+        self.filled = {}
+        self.values = {}
+        for name in fields or ():
+            self._track(name)
+        for name, options in (field_options or {}).items():
+            self._track(name)
+            for option in options:
+                self.values[name].setdefault(option, 0)
+
+    def _track(self, name):
+        if name not in self.filled:
+            self.filled[name] = 0
+            if self.field_types.get(name) in CATEGORICAL_TYPES:
+                self.values[name] = {'Yes': 0, 'No': 0} \
+                    if self.field_types[name] == 'checkbox' else {}
+
+    def add(self, form_data):
+        """Account for one exported row."""
+        self.rows += 1
+        for name, value in form_data.items():
+            if name not in self.filled:
+                self._track(name)
+            counts = self.values.get(name)
+            if self.field_types.get(name) == 'checkbox':
+                value = 'Yes' if value == 'Yes' else 'No'
+                counts[value] += 1
+                if value == 'Yes':
+                    self.filled[name] += 1
+            elif value:
+                self.filled[name] += 1
+                if counts is not None:
+                    # Radio values are PDF names ('/Male'); match declared options
+                    if value not in counts and value.startswith('/') and value[1:] in counts:
+                        value = value[1:]
+                    counts[value] = counts.get(value, 0) + 1
+        # Unchecked checkboxes missing from a row still count as No
+        for name, counts in self.values.items():
+            if self.field_types.get(name) == 'checkbox' and name not in form_data:
+                counts['No'] += 1
+
+    def observe(self, rows):
+        """Pass (filename, form_data, file_hash) rows through, adding each one."""
+        for row in rows:
+            self.add(row[1])
+            yield row
+
+    def _rate(self, count):
+        return count / self.rows if self.rows else 0.0
+
+    def as_dict(self):
+        fields = {}
+        for name, filled in self.filled.items():
+            entry = {
+                'type': self.field_types.get(name, 'text'),
+                'filled': filled,
+                'fill_rate': round(self._rate(filled), 4),
+            }
+            if name in self.values:
+                entry['values'] = dict(self.values[name])
+            fields[name] = entry
+        return {'rows': self.rows, 'fields': fields}
+
+    def write_json(self, path):
+        with open(path, 'w', encoding='utf-8') as fh:
+            json.dump(self.as_dict(), fh, indent=2, ensure_ascii=False)
+            fh.write('\n')
+        print(f"Summary report written to {path}")
+
+    def write_sheet(self, wb):
+        """Add a 'Summary' sheet to a write-only workbook (openpyxl or CompactWorkbook)."""
+        ws = wb.create_sheet("Summary")
+        ws.column_dimensions['A'].width = 30
+        ws.column_dimensions['E'].width = 30
+
+        ws.append([header_cell(ws, title) for title in
+                   ('Field', 'Type', 'Filled', 'Fill Rate', 'Value', 'Count', 'Share')])
+
+        for name, filled in self.filled.items():
+            ws.append([name, self.field_types.get(name, 'text'),
+                       filled, percent_cell(ws, self._rate(filled))])
+            for value, count in self.values.get(name, {}).items():
+                ws.append([None, None, None, None, value, count,
+                           percent_cell(ws, self._rate(count))])
+        ws.close()
+
+    def emit(self, wb=None):
+        """Write the summary as a sheet of wb, or as JSON to report_path."""
+        if self.report_path is None and wb is not None:
+            self.write_sheet(wb)
+        elif self.report_path is not None:
+            self.write_json(self.report_path)
 
 
 # --------------------------------------------------------------------------- #
@@ -231,8 +201,8 @@ def export_single_pdf_to_excel(pdf_path, output_path, md_fields=None):
     ws['B1'].font = header_font
 
     for row, (field_name, value) in enumerate(form_data.items(), start=2):
-        ws[f'A{row}'] = sanitize_value(field_name)
-        ws[f'B{row}'] = sanitize_value(value)
+        ws[f'A{row}'] = field_name
+        ws[f'B{row}'] = value
 
     ws.column_dimensions['A'].width = 40
     ws.column_dimensions['B'].width = 60
@@ -242,58 +212,569 @@ def export_single_pdf_to_excel(pdf_path, output_path, md_fields=None):
     return True
 
 
-def export_multiple_pdfs_to_excel(pdf_paths, output_path, md_fields=None):
-    """Export multiple PDF forms to a single Excel file with each PDF as a row"""
+# Characters Excel does not allow in sheet names, and its length limit.
+_SHEET_NAME_INVALID = re.compile(r'[\[\]:*?/\\]')
+SHEET_NAME_MAX = 31
+
+
+def sheet_title(name, taken):
+    """
+    Return a valid, unique Excel sheet name derived from name.
+
+    Invalid characters are replaced with '_', leading and trailing
+    apostrophes are dropped, and the result is cut to 31 characters.  Names
+    already in taken (compared case-insensitively, as Excel does) get a
+    ' (2)', ' (3)', ... suffix that still fits the limit.  The chosen name is
+    added to taken.
+    """
+    base = _SHEET_NAME_INVALID.sub('_', name).strip().strip("'") or 'Sheet'
+    base = base[:SHEET_NAME_MAX]
+    title = base
+    counter = 1
+    # 'History' is reserved by Excel
+    while title.lower() in taken or title.lower() == 'history':
+        counter += 1
+        suffix = f" ({counter})"
+        title = base[:SHEET_NAME_MAX - len(suffix)] + suffix
+    taken.add(title.lower())
+    return title
+
+
+def _write_field_sheet(ws, form_data):
+    """Fill a write-only worksheet with a Field Name / Value table."""
+    ws.column_dimensions['A'].width = 40
+    ws.column_dimensions['B'].width = 60
+
+    ws.append([header_cell(ws, name) for name in ('Field Name', 'Value')])
+
+    for field_name, value in form_data.items():
+        ws.append([field_name, value])
+
+
+def export_pdfs_to_sheets(pdf_paths, output_path, md_fields=None, jobs=1, limits=None,
+                          summary=None):
+    """
+    Export each PDF form to its own Field Name / Value sheet of one workbook.
+
+    Sheets are named after the PDF files and streamed through a write-only
+    workbook: each sheet is written and closed as soon as its PDF has been
+    extracted, so memory and open file handles stay flat however many
+    sheets the workbook has.
+    """
     print(f"Processing {len(pdf_paths)} PDF files...")
 
-    all_field_names = {}  # ordered set
-    all_data = []
+    wb = openpyxl.Workbook(write_only=True)
+    taken = set()
+    n_sheets = 0
+    for pdf_path, form_data in iter_form_data(pdf_paths, md_fields, jobs, limits):
+        if not form_data:
+            continue
+        title = sheet_title(Path(pdf_path).stem, taken)
+        ws = wb.create_sheet(title)
+        _write_field_sheet(ws, form_data)
+        ws.close()
+        n_sheets += 1
+        if summary is not None:
+            summary.add(form_data)
+
+    if not n_sheets:
+        print("No form data found in any PDF")
+        return False
+
+    if summary is not None:
+        summary.emit(wb)
+    wb.save(output_path)
+    print(f"Exported {n_sheets} PDFs as separate sheets → {output_path}")
+    return True
+
 
-    for pdf_path in pdf_paths:
-        print(f"Reading: {pdf_path}")
-        form_data = extract_form_data(pdf_path, md_fields)
+# --------------------------------------------------------------------------- #
+# Combined export (one PDF per row)
+# --------------------------------------------------------------------------- #
 
+def iter_rows(pdf_paths, md_fields=None, jobs=1, limits=None, with_hash=False):
+    """
+    Yield (filename, form_data, file_hash) for every PDF that contained form
+    data.  file_hash is the SHA-256 of the PDF when with_hash is set, else None.
+    """
+    for pdf_path, form_data in iter_form_data(pdf_paths, md_fields, jobs, limits):
         if form_data:
-            all_field_names.update(dict.fromkeys(form_data.keys()))
-            all_data.append({
-                'filename': os.path.basename(pdf_path),
-                'data': form_data
-            })
+            file_hash = file_sha256(pdf_path) if with_hash else None
+            yield input_name(pdf_path), form_data, file_hash
 
-    if not all_data:
+
+def export_multiple_pdfs_to_excel(pdf_paths, output_path, md_fields=None, jobs=1,
+                                  field_types=None, limits=None, sink_options=None,
+                                  summary=None, split_rows=None, split_bytes=None,
+                                  queue_size=None):
+    """
+    Export multiple PDF forms to a single file with each PDF as a row.
+
+    The output format follows the extension of output_path (see SINKS).
+    With md_fields the columns are known up front, so every row is streamed
+    to the sink as soon as its PDF has been extracted.  Without it, rows
+    are spooled to a temporary file until the full column set is known,
+    unless the sink does not need a fixed column set.
+
+    With split_rows or split_bytes the rows are spread over numbered shard
+    files (see ShardedSink).  An .xlsx export with more PDFs than fit on one
+    sheet is split at Excel's row limit automatically.
+
+    With queue_size, extraction runs in a background thread up to that many
+    rows ahead of the writer (see Prefetcher), so the two overlap.
+    """
+    print(f"Processing {len(pdf_paths)} PDF files...")
+
+    sink_cls = sink_for(output_path)
+    if sink_cls is XlsxSink and (split_rows or len(pdf_paths)) > EXCEL_MAX_ROWS:
+        split_rows = EXCEL_MAX_ROWS
+    sharded = bool(split_rows or split_bytes)
+    rows = iter_rows(pdf_paths, md_fields, jobs, limits,
+                     with_hash=getattr(sink_cls, 'needs_hash', False))
+    prefetcher = None
+    if queue_size:
+        rows = prefetcher = Prefetcher(rows, queue_size)
+    if summary is not None:
+        rows = summary.observe(rows)
+    if md_fields is not None:
+        fields = list(md_fields)
+    elif sink_cls.needs_fields:
+        fields, rows = spool_rows(rows)
+    else:
+        fields = None
+
+    if sharded:
+        sink = ShardedSink(output_path, fields, field_types, sink_options,
+                           split_rows, split_bytes)
+    else:
+        sink = open_sink(output_path, fields, field_types, sink_options)
+    n_rows = 0
+    try:
+        for filename, form_data, file_hash in rows:
+            sink.write_row(filename, form_data, file_hash)
+            n_rows += 1
+    except BaseException:
+        sink.discard()
+        raise
+
+    if not n_rows:
+        sink.discard()
         print("No form data found in any PDF")
         return False
 
-    fields = list(all_field_names)
+    if summary is not None:
+        if sharded and summary.report_path is None:
+            summary.report_path = f"{os.path.splitext(output_path)[0]}.summary.json"
+        summary.emit(getattr(sink, 'wb', None))
+    sink.close()
+    n_fields = len(fields) if fields is not None else 'variable'
+    if sharded:
+        print(f"Exported {n_rows} PDFs × {n_fields} fields → {len(sink.paths)} shards "
+              f"({os.path.basename(sink.paths[0])} … {os.path.basename(sink.paths[-1])}), "
+              f"index: {sink.index_path}")
+    else:
+        print(f"Exported {n_rows} PDFs × {n_fields} fields → {output_path}")
+    if prefetcher is not None:
+        print(f"  Writer waited {prefetcher.consumer_wait:.1f}s for rows, "
+              f"reader waited {prefetcher.producer_wait:.1f}s for the writer")
+    return True
 
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title = "Form Data"
 
-    ws['A1'] = 'PDF Filename'
-    for col_idx, field_name in enumerate(fields, start=2):
-        ws.cell(row=1, column=col_idx, value=sanitize_value(field_name))
+# --------------------------------------------------------------------------- #
+# End-to-end pipeline (pipeline command)
+# --------------------------------------------------------------------------- #
 
-    header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-    header_font = Font(bold=True, color="FFFFFF")
-    for col_idx in range(1, len(fields) + 2):
-        cell = ws.cell(row=1, column=col_idx)
-        cell.fill = header_fill
-        cell.font = header_font
+class Prefetcher:
+    """
+    Run an iterator in a background thread, at most depth items ahead of
+    the consumer, so producing (reading PDFs) and consuming (writing the
+    output) overlap while memory stays bounded by the queue.
 
-    for row_idx, entry in enumerate(all_data, start=2):
-        ws.cell(row=row_idx, column=1, value=sanitize_value(entry['filename']))
-        for col_idx, field_name in enumerate(fields, start=2):
-            value = entry['data'].get(field_name, '')
-            ws.cell(row=row_idx, column=col_idx, value=sanitize_value(value))
+    Exceptions raised by the producer are re-raised in the consumer.  The
+    time each side spent blocked on the other is recorded, which shows
+    whether extraction or writing limits throughput.
+    """
 
-    ws.column_dimensions['A'].width = 30
-    for col_idx in range(2, len(fields) + 2):
-        ws.column_dimensions[openpyxl.utils.get_column_letter(col_idx)].width = 25
+    _END = object()
+
+    def __init__(self, items, depth=64):
+        self.items = items
+        self.queue = queue.Queue(maxsize=max(1, depth))
+        self.stop = threading.Event()
+        self.error = None
+        self.producer_wait = 0.0   # seconds the reader waited for queue space
+        self.consumer_wait = 0.0   # seconds the writer waited for a row
+        self.thread = threading.Thread(target=self._produce, name='prefetch', daemon=True)
+
+    def _put(self, item):
+        started = time.monotonic()
+        while not self.stop.is_set():
+            try:
+                self.queue.put(item, timeout=0.2)
+                break
+            except queue.Full:
+                continue
+        self.producer_wait += time.monotonic() - started
+
+    def _produce(self):
+        try:
+            for item in self.items:
+                if self.stop.is_set():
+                    return
+                self._put(item)
+        except BaseException as e:  # handed to the consumer
+            self.error = e
+        self._put(self._END)
+
+    def __iter__(self):
+        self.thread.start()
+        try:
+            while True:
+                started = time.monotonic()
+                item = self.queue.get()
+                self.consumer_wait += time.monotonic() - started
+                if item is self._END:
+                    break
+                yield item
+            if self.error is not None:
+                raise self.error
+        finally:
+            self.stop.set()
+            self.thread.join()
+
+
+def run_pipeline(pdf_paths, output_path, md_path, fields=None, jobs=1, queue_size=64,
+                 limits=None, sink_options=None, summary=None):
+    """
+    Extract pdf_paths and write them, in MD field order, to output_path in
+    one streaming pass: each PDF is read once, each row written once, and
+    nothing is re-read or reordered afterwards.
+
+    The MD schema is loaded once (see form_schema).  fields, when given, is
+    a projection of its field names (see project_fields).  Extraction runs
+    in a reader thread (plus a pool of jobs worker processes) that stays at
+    most queue_size rows ahead of the writer.
+    """
+    schema = load_form_schema(md_path)
+    md_fields = fields if fields is not None else field_list(schema)
 
-    wb.save(output_path)
-    print(f"Exported {len(all_data)} PDFs × {len(fields)} fields → {output_path}")
-    return True
+    return export_multiple_pdfs_to_excel(pdf_paths, output_path, md_fields, jobs,
+                                         schema.types, limits, sink_options, summary,
+                                         queue_size=queue_size)
+
+
+# --------------------------------------------------------------------------- #
+# Subcommands (watch, merge, pipeline)
+# --------------------------------------------------------------------------- #
+
+def _add_limit_arguments(parser):
+    group = parser.add_argument_group('per-file limits')
+    group.add_argument('--timeout', type=float, metavar='SECONDS',
+                       help='Give up on a PDF after this many seconds')
+    group.add_argument('--max-memory', type=int, metavar='MB',
+                       help='Give up on a PDF whose worker grows by more than this many MB')
+    group.add_argument('--quarantine-report', metavar='FILE',
+                       help='Write quarantined files with reason and timing to FILE '
+                            '(.csv or .json). Setting this also isolates every file '
+                            'in its own killable worker.')
+
+
+def _add_sqlite_arguments(parser):
+    group = parser.add_argument_group('SQLite output (.sqlite, .sqlite3, .db)')
+    group.add_argument('--table', metavar='NAME',
+                       help='Table to write to (default: derived from the --md file and '
+                            'its field list, or "submissions" without --md)')
+    group.add_argument('--index', metavar='FIELD[,FIELD...]',
+                       help='Create indexes on these fields for fast lookups')
+
+
+def _inputs_from_args(paths):
+    """Validate input paths and expand archives to their members; exit if none remain."""
+    pdf_paths = []
+    for path in paths:
+        if os.path.isfile(path) and is_archive(path):
+            try:
+                members = list_archive_members(path)
+            except (OSError, zipfile.BadZipFile, tarfile.TarError) as e:
+                print(f"Warning: Skipping {path} (cannot read archive: {e})")
+                continue
+            print(f"Archive {path}: {len(members)} PDF(s)")
+            pdf_paths.extend(members)
+        elif os.path.exists(path) and path.lower().endswith(INPUT_SUFFIXES):
+            pdf_paths.append(path)
+        else:
+            print(f"Warning: Skipping {path} (not found or not a PDF/XFDF/FDF file)")
+
+    if not pdf_paths:
+        print("Error: No valid PDF files provided")
+        sys.exit(1)
+    return pdf_paths
+
+
+def _md_from_args(args):
+    """Load (md_fields, field_types) for --md (None, None without it), applying --fields."""
+    md_fields = field_types = None
+    if args.md:
+        if not Path(args.md).is_file():
+            print(f"Error: MD file not found: {args.md}")
+            sys.exit(1)
+        md_fields = extract_field_names_from_md(args.md)
+        field_types = extract_field_types_from_md(args.md)
+        print(f"Using MD field list ({len(md_fields)} fields) from: {args.md}")
+    return _fields_from_args(args, md_fields), field_types
+
+
+def _add_fields_argument(parser):
+    parser.add_argument('--fields', metavar='NAME[,NAME...]',
+                        help='Only export these fields, in this order. Values of other '
+                             'fields are not even decoded, which speeds up wide forms. '
+                             'With --md every name must be defined in the MD file')
+
+
+def _fields_from_args(args, md_fields):
+    """Apply --fields to the MD field list (None without --md)."""
+    if not args.fields:
+        return md_fields
+    try:
+        projection = project_fields(args.fields, md_fields)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    print(f"Exporting {len(projection)} selected field(s): {', '.join(projection)}")
+    return projection
+
+
+def _add_typed_argument(parser):
+    parser.add_argument('--typed', action='store_true',
+                        help='In combined .xlsx output, store number, date and checkbox '
+                             'fields (per --md) as numbers, dates and TRUE/FALSE '
+                             'instead of text')
+
+
+def _sink_options_from_args(args, output_path, md_fields):
+    """Sink-specific keyword arguments for the chosen output format."""
+    sink_cls = sink_for(output_path)
+    if args.typed and (sink_cls is not XlsxSink or not args.md):
+        print("Error: --typed needs --md and .xlsx output")
+        sys.exit(1)
+    if sink_cls is XlsxSink:
+        return {'typed': True} if args.typed else None
+    if sink_cls is not SqliteSink:
+        return None
+    table = args.table
+    if table is None and md_fields is not None:
+        table = sqlite_table_name(args.md, md_fields)
+    index_fields = [f.strip() for f in (args.index or '').split(',') if f.strip()]
+    if md_fields is not None:
+        unknown = [name for name in index_fields if name not in md_fields]
+        if unknown:
+            print(f"Error: --index names unknown field(s): {', '.join(unknown)}")
+            sys.exit(1)
+    return {'table': table, 'index_fields': index_fields}
+
+
+def _limits_from_args(args):
+    """Return an ExtractionLimits when any per-file limit option was given."""
+    if args.timeout is None and args.max_memory is None and not args.quarantine_report:
+        return None
+    if args.max_memory and resource is None:
+        print("Warning: --max-memory is not supported on this platform and will be ignored")
+    max_memory = args.max_memory * 1024 * 1024 if args.max_memory else None
+    return ExtractionLimits(args.timeout, max_memory)
+
+
+def _summary_from_args(args, output_path, md_fields, field_types):
+    """Return a FormSummary when --summary was given, else None."""
+    if args.summary is None:
+        return None
+    report_path = args.summary or None
+    if report_path is None and sink_for(output_path) is not XlsxSink:
+        if output_path == '-':
+            print("Error: --summary needs a report path when writing to stdout")
+            sys.exit(1)
+        report_path = output_path + '.summary.json'
+    field_options = extract_field_options_from_md(args.md) if args.md else None
+    if field_options and md_fields is not None:
+        field_options = {k: v for k, v in field_options.items() if k in md_fields}
+    return FormSummary(md_fields, field_types, field_options, report_path)
+
+
+def watch_main(argv):
+    parser = argparse.ArgumentParser(
+        prog=f"{os.path.basename(sys.argv[0])} watch",
+        description='Continuously ingest filled PDF forms dropped into a directory',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  %(prog)s inbox/ -o submissions.csv --md form.md --jobs 4
+  %(prog)s inbox/ -o submissions.jsonl --metrics watch_metrics.json
+        """
+    )
+    parser.add_argument('inbox', help='Directory that receives filled PDFs')
+    parser.add_argument('-o', '--output', required=True,
+                        help='Output file (.csv, .jsonl/.ndjson, .sqlite/.db, .xlsx or .parquet)')
+    parser.add_argument('--md', metavar='FILE', help='Source .md file (fixes columns and order)')
+    parser.add_argument('-j', '--jobs', type=int, default=1, metavar='N',
+                        help='Worker processes (0 = one per CPU). Default: 1')
+    parser.add_argument('--settle', type=float, default=2.0, metavar='SECONDS',
+                        help='How long a file must stay unchanged before it is read. Default: 2')
+    parser.add_argument('--batch-size', type=int, default=50, metavar='N',
+                        help='Write after this many extracted files. Default: 50')
+    parser.add_argument('--batch-interval', type=float, default=5.0, metavar='SECONDS',
+                        help='Write at least this often while files are arriving. Default: 5')
+    parser.add_argument('--rebuild-interval', type=float, default=60.0, metavar='SECONDS',
+                        help='Rebuild .xlsx, .parquet and other outputs that cannot be '
+                             'appended to at most this often, and on exit. Default: 60')
+    parser.add_argument('--poll', action='store_true',
+                        help='Poll the directory instead of using inotify')
+    parser.add_argument('--metrics', metavar='FILE',
+                        help='Keep a JSON snapshot of queue depth and ingestion lag in FILE')
+    parser.add_argument('--manifest', metavar='FILE',
+                        help='Manifest file (default: OUTPUT.manifest.jsonl)')
+    _add_limit_arguments(parser)
+    _add_fields_argument(parser)
+    _add_typed_argument(parser)
+    _add_sqlite_arguments(parser)
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.inbox):
+        print(f"Error: Inbox directory not found: {args.inbox}")
+        sys.exit(1)
+    output_path = args.output
+    if os.path.splitext(output_path)[1].lower() not in SINKS:
+        output_path += '.xlsx'
+    if sink_for(output_path) is ParquetSink and pa is None:
+        print("Error: pyarrow is required for Parquet output. Install with: pip install pyarrow")
+        sys.exit(1)
+
+    md_fields, field_types = _md_from_args(args)
+
+    try:
+        limits = _limits_from_args(args)
+        sink_options = _sink_options_from_args(args, output_path, md_fields)
+        watcher = InboxWatcher(args.inbox, output_path, md_fields, field_types, args.jobs,
+                               args.settle, args.batch_size, args.batch_interval,
+                               args.poll, args.metrics, args.manifest, limits, sink_options,
+                               args.rebuild_interval)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    watcher.run()
+    if args.quarantine_report:
+        limits.write_report(args.quarantine_report)
+
+
+def merge_main(argv):
+    parser = argparse.ArgumentParser(
+        prog=f"{os.path.basename(sys.argv[0])} merge",
+        description='Combine exports produced with --shard (or any combined exports) '
+                    'into one file without re-reading the PDFs',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  %(prog)s node1.csv node2.csv node3.csv -o all.xlsx --md form.md
+  %(prog)s big.shards.csv -o all.parquet --md form.md
+        """
+    )
+    parser.add_argument('input', nargs='+',
+                        help='Combined exports (.xlsx, .csv, .jsonl/.ndjson, .parquet, '
+                             '.sqlite/.db) or OUTPUT.shards.csv index files')
+    parser.add_argument('-o', '--output', required=True,
+                        help='Merged output file; the format follows the extension')
+    parser.add_argument('--md', metavar='FILE',
+                        help='Source .md file; columns become exactly its fields, in MD order')
+    _add_fields_argument(parser)
+    _add_typed_argument(parser)
+    _add_sqlite_arguments(parser)
+    args = parser.parse_args(argv)
+
+    input_paths = expand_merge_inputs(args.input)
+    for path in input_paths:
+        if not os.path.isfile(path) or os.path.splitext(path)[1].lower() not in SINKS:
+            print(f"Error: Not a supported export file: {path}")
+            sys.exit(1)
+    output_path = args.output
+    if os.path.splitext(output_path)[1].lower() not in SINKS:
+        output_path += '.xlsx'
+    if ParquetSink in (sink_for(p) for p in input_paths + [output_path]) and pa is None:
+        print("Error: pyarrow is required for Parquet files. Install with: pip install pyarrow")
+        sys.exit(1)
+
+    md_fields, field_types = _md_from_args(args)
+
+    sink_options = _sink_options_from_args(args, output_path, md_fields)
+    try:
+        success = merge_outputs(input_paths, output_path, md_fields, field_types,
+                                sink_options, args.table)
+    except (ValueError, OSError, sqlite3.Error) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    if not success:
+        sys.exit(1)
+    print("\nMerge completed successfully.")
+
+
+def pipeline_main(argv):
+    parser = argparse.ArgumentParser(
+        prog=f"{os.path.basename(sys.argv[0])} pipeline",
+        description='Extract filled forms and write them in MD field order in one '
+                    'streaming pass (no separate reorder step)',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  %(prog)s form.md submissions/*.pdf -o submissions.xlsx --jobs 8
+  %(prog)s form.md bundle.zip -o submissions.parquet --summary report.json
+        """
+    )
+    parser.add_argument('md', metavar='md_file',
+                        help='Source .md file; columns are its fields, in MD order')
+    parser.add_argument('input', nargs='+',
+                        help='Input PDF, XFDF/FDF or archive file(s), as for the main command')
+    parser.add_argument('-o', '--output', required=True,
+                        help='Output file; the format follows the extension (default .xlsx)')
+    parser.add_argument('-j', '--jobs', type=int, default=1, metavar='N',
+                        help='Worker processes reading PDFs (0 = one per CPU). Default: 1')
+    parser.add_argument('--queue-size', type=int, default=64, metavar='N',
+                        help='Rows the reader may run ahead of the writer. Default: 64')
+    parser.add_argument('--summary', nargs='?', const='', metavar='REPORT.json',
+                        help='Also compute per-field statistics (see the main command)')
+    _add_limit_arguments(parser)
+    _add_fields_argument(parser)
+    _add_typed_argument(parser)
+    _add_sqlite_arguments(parser)
+    args = parser.parse_args(argv)
+
+    if not Path(args.md).is_file():
+        print(f"Error: MD file not found: {args.md}")
+        sys.exit(1)
+    pdf_paths = _inputs_from_args(args.input)
+    output_path = args.output
+    if output_path != '-' and os.path.splitext(output_path)[1].lower() not in SINKS:
+        output_path += '.xlsx'
+    if sink_for(output_path) is ParquetSink and pa is None:
+        print("Error: pyarrow is required for Parquet output. Install with: pip install pyarrow")
+        sys.exit(1)
+    if output_path == '-':
+        sys.stdout = sys.stderr  # keep stdout clean for the data
+
+    schema = load_form_schema(args.md)
+    print(f"Using MD field list ({len(schema.names)} fields) from: {args.md}")
+    md_fields = _fields_from_args(args, field_list(schema))
+
+    limits = _limits_from_args(args)
+    sink_options = _sink_options_from_args(args, output_path, md_fields)
+    summary = _summary_from_args(args, output_path, md_fields, schema.types)
+    try:
+        success = run_pipeline(pdf_paths, output_path, args.md, md_fields, args.jobs,
+                               args.queue_size, limits, sink_options, summary)
+    except (ValueError, OSError, sqlite3.Error) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    if args.quarantine_report:
+        limits.write_report(args.quarantine_report)
+    if not success:
+        sys.exit(1)
+    print("\nPipeline completed successfully.")
 
 
 # --------------------------------------------------------------------------- #
@@ -301,6 +782,13 @@ def export_multiple_pdfs_to_excel(pdf_paths, output_path, md_fields=None):
 # --------------------------------------------------------------------------- #
 
 def main():
+    if len(sys.argv) > 1 and sys.argv[1] == 'watch':
+        return watch_main(sys.argv[2:])
+    if len(sys.argv) > 1 and sys.argv[1] == 'merge':
+        return merge_main(sys.argv[2:])
+    if len(sys.argv) > 1 and sys.argv[1] == 'pipeline':
+        return pipeline_main(sys.argv[2:])
+
     parser = argparse.ArgumentParser(
         description='Extract filled PDF form data and export to Excel',
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -314,11 +802,73 @@ Examples:
 
   # Export multiple PDFs to one Excel file (each PDF is a row)
   %(prog)s form1.pdf form2.pdf form3.pdf -o combined.xlsx --md form.md
+
+  # One Field Name / Value sheet per PDF in a single workbook
+  %(prog)s submissions/*.pdf -o audit.xlsx --mode single --md form.md
+
+  # Add a Summary sheet (fill rates, option counts) or a JSON report
+  %(prog)s submissions/*.pdf -o combined.xlsx --md form.md --summary
+  %(prog)s submissions/*.pdf -o combined.csv --md form.md --summary stats.json
+
+  # XFDF/FDF submissions are read like PDFs; filled PDFs can be exported to XFDF
+  %(prog)s submissions/*.xfdf submissions/*.fdf -o combined.xlsx --md form.md
+  %(prog)s submissions/*.pdf --xfdf-dir xfdf/ --md form.md
+
+  # Only decode and export a few columns of a wide form
+  %(prog)s submissions/*.pdf -o slim.csv --md form.md --fields full_name,city,age
+
+  # Split a huge export into shard files of 100,000 rows each
+  %(prog)s submissions/*.pdf -o combined.xlsx --md form.md --split-rows 100000
+
+  # Extract a large batch with 8 worker processes
+  %(prog)s submissions/*.pdf -o combined.xlsx --md form.md --jobs 8
+
+  # Other output formats are picked from the extension
+  %(prog)s submissions/*.pdf -o combined.csv --md form.md
+  %(prog)s submissions/*.pdf -o combined.parquet --md form.md
+  %(prog)s submissions/*.pdf -o - --md form.md | jq .
+
+  # Upsert into a SQLite database, indexed for lookups by field value
+  %(prog)s submissions/*.pdf -o forms.sqlite --md form.md --index email_address,department
+
+  # Daily run: only read submissions that are new or changed since last time
+  %(prog)s inbox/*.pdf -o combined.xlsx --md form.md --append
+
+  # Don't let one pathological upload stall the batch
+  %(prog)s submissions/*.pdf -o combined.csv --md form.md --jobs 8 \\
+      --timeout 30 --max-memory 1024 --quarantine-report quarantine.csv
+
+  # Read PDFs straight out of ZIP or TAR bundles
+  %(prog)s bundle1.zip bundle2.tar.gz -o combined.xlsx --md form.md --jobs 4
+
+  # Spread a backfill over 4 nodes, then combine (see: %(prog)s merge --help)
+  %(prog)s backfill/*.pdf -o node1.csv --md form.md --shard 1/4
+  %(prog)s merge node1.csv node2.csv node3.csv node4.csv -o all.xlsx --md form.md
+
+  # Keep ingesting PDFs as they land in a directory (see: %(prog)s watch --help)
+  %(prog)s watch inbox/ -o submissions.csv --md form.md --jobs 4
+
+  # Extract and write in MD order in one pass (see: %(prog)s pipeline --help)
+  %(prog)s pipeline form.md submissions/*.pdf -o submissions.xlsx --jobs 8
         """
     )
 
-    parser.add_argument('input', nargs='+', help='Input PDF file(s) with filled forms')
-    parser.add_argument('-o', '--output', required=True, help='Output Excel file (.xlsx)')
+    parser.add_argument('input', nargs='+',
+                        help='Input PDF file(s) with filled forms, XFDF/FDF form data files, '
+                             'or .zip/.tar(.gz/.bz2/.xz) archives of them (read in memory, '
+                             'never unpacked to disk)')
+    output = parser.add_mutually_exclusive_group(required=True)
+    output.add_argument(
+        '-o', '--output',
+        help='Output file: .xlsx (default), .csv, .jsonl/.ndjson, .parquet, '
+             '.sqlite/.sqlite3/.db, or - for JSON Lines on stdout'
+    )
+    output.add_argument(
+        '--xfdf-dir',
+        metavar='DIR',
+        help='Instead of a table, write one .xfdf file per input into DIR '
+             '(fields in the same order as the table exports)'
+    )
     parser.add_argument(
         '--md',
         metavar='FILE',
@@ -330,45 +880,176 @@ Examples:
         '--mode',
         choices=['single', 'combined'],
         default='auto',
-        help='Export mode: single (one sheet per PDF) or combined (all PDFs in one sheet). Default: auto-detect'
+        help='Export mode: single (one Field Name/Value sheet per PDF, .xlsx only; not '
+             'with --append, --typed or --split-*) or combined (all PDFs in one '
+             'sheet). Default: single for one PDF written to .xlsx, else combined'
+    )
+    parser.add_argument(
+        '-j', '--jobs',
+        type=int,
+        default=1,
+        metavar='N',
+        help='Number of worker processes used to read PDFs in combined mode '
+             '(0 = one per CPU). Default: 1'
+    )
+    parser.add_argument(
+        '--append',
+        action='store_true',
+        help='Only read PDFs that are new or changed since the previous --append '
+             'run and add/update their rows in the output. Ingested files are '
+             'tracked in a sidecar manifest, which also lets an interrupted '
+             'batch resume.'
+    )
+    parser.add_argument(
+        '--manifest',
+        metavar='FILE',
+        help='Manifest file for --append (default: OUTPUT.manifest.jsonl)'
     )
+    parser.add_argument(
+        '--shard',
+        metavar='i/N',
+        help='Only process the i-th of N slices of the inputs (1-based). Files are '
+             'assigned by a hash of their path, so nodes given the same input list '
+             'extract disjoint slices; combine the results with the merge command'
+    )
+    parser.add_argument(
+        '--split-rows',
+        type=int,
+        metavar='N',
+        help='Split a combined export into numbered shard files of at most N rows '
+             '(OUTPUT-0001.xlsx, ...) plus an OUTPUT.shards.csv index. .xlsx output '
+             'is always split at Excel\'s row limit'
+    )
+    parser.add_argument(
+        '--split-bytes',
+        type=float,
+        metavar='MB',
+        help='Start a new shard file before the current one passes about MB '
+             'megabytes of cell data'
+    )
+    parser.add_argument(
+        '--summary',
+        nargs='?',
+        const='',
+        metavar='REPORT.json',
+        help='Also compute per-field fill rates, option counts and checkbox '
+             'Yes/No counts while exporting. Written to a Summary sheet for '
+             '.xlsx output, otherwise (or when REPORT.json is given) as JSON '
+             '(default: OUTPUT.summary.json)'
+    )
+    _add_limit_arguments(parser)
+    _add_fields_argument(parser)
+    _add_typed_argument(parser)
+    _add_sqlite_arguments(parser)
 
     args = parser.parse_args()
 
     # Validate inputs
-    pdf_paths = []
-    for path in args.input:
-        if os.path.exists(path) and path.lower().endswith('.pdf'):
-            pdf_paths.append(path)
-        else:
-            print(f"Warning: Skipping {path} (not found or not a PDF)")
-
-    if not pdf_paths:
-        print("Error: No valid PDF files provided")
+    pdf_paths = _inputs_from_args(args.input)
+    if args.append and any(isinstance(p, ArchiveMember) for p in pdf_paths):
+        print("Error: --append tracks files on disk and cannot take archive inputs")
         sys.exit(1)
 
+    if args.shard:
+        try:
+            shard_index, shard_count = parse_shard_spec(args.shard)
+        except ValueError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        total = len(pdf_paths)
+        pdf_paths = select_shard(pdf_paths, shard_index, shard_count)
+        print(f"Shard {shard_index}/{shard_count}: {len(pdf_paths)} of {total} PDFs")
+
+    if args.xfdf_dir:
+        if not pdf_paths:
+            print("Nothing to do for this shard.")
+            return
+        if args.append or args.summary is not None or args.split_rows or args.split_bytes:
+            print("Error: --xfdf-dir cannot be combined with --append, --summary, "
+                  "--split-rows or --split-bytes")
+            sys.exit(1)
+        md_fields, field_types = _md_from_args(args)
+        limits = _limits_from_args(args)
+        success = export_pdfs_to_xfdf(pdf_paths, args.xfdf_dir, md_fields, args.jobs, limits,
+                                      field_types)
+        if args.quarantine_report:
+            limits.write_report(args.quarantine_report)
+        if not success:
+            sys.exit(1)
+        print("\nExport completed successfully.")
+        return
+
     output_path = args.output
-    if not output_path.lower().endswith('.xlsx'):
+    if output_path != '-' and os.path.splitext(output_path)[1].lower() not in SINKS:
         output_path += '.xlsx'
+    if sink_for(output_path) is ParquetSink and pa is None:
+        print("Error: pyarrow is required for Parquet output. Install with: pip install pyarrow")
+        sys.exit(1)
+    if output_path == '-':
+        if args.append:
+            print("Error: --append needs an output file, not stdout")
+            sys.exit(1)
+        # Keep stdout clean for the data; messages go to stderr.
+        sys.stdout = sys.stderr
+
+    # Options that only exist for the combined layout (one PDF per row).
+    combined_options = [option for option, given in (
+        ('--append', args.append), ('--typed', args.typed),
+        ('--split-rows', args.split_rows), ('--split-bytes', args.split_bytes)) if given]
+    if args.mode == 'single':
+        if sink_for(output_path) is not XlsxSink:
+            parser.error("--mode single writes .xlsx workbooks only")
+        if combined_options:
+            parser.error(f"{', '.join(combined_options)} cannot be used with --mode single")
 
     # Load MD field list if provided
-    md_fields = None
-    if args.md:
-        if not Path(args.md).is_file():
-            print(f"Error: MD file not found: {args.md}")
+    md_fields, field_types = _md_from_args(args)
+
+    limits = _limits_from_args(args)
+    sink_options = _sink_options_from_args(args, output_path, md_fields)
+    summary = _summary_from_args(args, output_path, md_fields, field_types)
+
+    split_bytes = int(args.split_bytes * 1024 * 1024) if args.split_bytes else None
+    if args.split_rows or split_bytes:
+        if args.append or output_path == '-' or getattr(sink_for(output_path), 'in_place', False):
+            print("Error: --split-rows/--split-bytes need a combined export to a "
+                  ".xlsx, .csv, .jsonl or .parquet file and cannot be used with --append")
             sys.exit(1)
-        md_fields = extract_field_names_from_md(args.md)
-        print(f"Using MD field list ({len(md_fields)} fields) from: {args.md}")
+
+    if not pdf_paths:
+        if args.append:
+            print("Nothing to do for this shard.")
+        else:
+            write_empty_export(output_path, md_fields, field_types, sink_options,
+                               split=bool(args.split_rows or split_bytes))
+        return
 
     mode = args.mode
     if mode == 'auto':
-        mode = 'single' if len(pdf_paths) == 1 else 'combined'
+        # A shard is one slice of a combined export, however few files it got.
+        single = (len(pdf_paths) == 1 and not args.shard and not combined_options
+                  and sink_for(output_path) is XlsxSink)
+        mode = 'single' if single else 'combined'
 
     try:
-        if mode == 'single' and len(pdf_paths) == 1:
+        if args.append:
+            success = append_pdfs_to_output(pdf_paths, output_path, md_fields, args.jobs,
+                                            field_types, args.manifest, limits, sink_options,
+                                            summary)
+        elif mode == 'single' and len(pdf_paths) == 1 and summary is None and limits is None:
             success = export_single_pdf_to_excel(pdf_paths[0], output_path, md_fields)
+        elif mode == 'single':
+            # Also takes a single PDF when it must be read under --timeout/--max-memory.
+            success = export_pdfs_to_sheets(pdf_paths, output_path, md_fields, args.jobs, limits,
+                                            summary)
         else:
-            success = export_multiple_pdfs_to_excel(pdf_paths, output_path, md_fields)
+            success = export_multiple_pdfs_to_excel(pdf_paths, output_path, md_fields,
+                                                    args.jobs, field_types, limits,
+                                                    sink_options, summary,
+                                                    args.split_rows, split_bytes)
+
+        if args.quarantine_report:
+            limits.write_report(args.quarantine_report)
 
         if success:
             print("\nExport completed successfully.")
@@ -9,18 +9,32 @@ Multi-PDF layout   (row 1 = headers, each PDF is a row):  reorders columns.
 """
 
 import sys
+import os
 import argparse
-import re
+import posixpath
+import shutil
+import tempfile
+import time
+import xml.etree.ElementTree as ET
+import zipfile
+from copy import copy
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
+from typing import NamedTuple
+
+from form_schema import load_form_schema
 
 try:
     import openpyxl
-    from openpyxl.styles import Font, PatternFill
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import NamedStyle
     from openpyxl.utils import get_column_letter
 except ImportError:
     print("Error: openpyxl is required. Install with: pip install openpyxl")
     sys.exit(1)
 
+from compact_xlsx import _umask
+
 
 # --------------------------------------------------------------------------- #
 # MD field extraction
@@ -28,36 +42,7 @@ except ImportError:
 
 def extract_field_names_from_md(md_path: str) -> list[str]:
     """Return field names in the order they appear in the .md file."""
-    text = Path(md_path).read_text(encoding="utf-8")
-
-    # Match all {{type:name:...}} fields and bare underscore sequences (____).
-    # We collect (position, name) pairs then sort by position.
-    entries: list[tuple[int, str]] = []
-    underscore_counter = 0
-
-    # Named fields: {{type:name[optional extra]}}
-    for m in re.finditer(
-        r'\{\{(?:text|email|number|date|textarea|checkbox|radio|dropdown)'
-        r':([A-Za-z0-9_]+)',
-        text,
-    ):
-        entries.append((m.start(), m.group(1)))
-
-    # Underscore fields: 4 or more underscores → field_N
-    for m in re.finditer(r'_{4,}', text):
-        underscore_counter += 1
-        entries.append((m.start(), f"field_{underscore_counter}"))
-
-    # Sort by position, deduplicate while preserving first occurrence
-    entries.sort(key=lambda x: x[0])
-    seen: set[str] = set()
-    ordered: list[str] = []
-    for _, name in entries:
-        if name not in seen:
-            seen.add(name)
-            ordered.append(name)
-
-    return ordered
+    return list(load_form_schema(md_path).names)
 
 
 # --------------------------------------------------------------------------- #
@@ -84,81 +69,461 @@ def detect_layout(ws) -> str:
 # Reorder helpers
 # --------------------------------------------------------------------------- #
 
-def _copy_styles(src_cell, dst_cell):
-    """Copy fill and font from src_cell to dst_cell."""
-    if src_cell.has_style:
-        dst_cell.font = src_cell.font.copy()
-        dst_cell.fill = src_cell.fill.copy()
-        dst_cell.border = src_cell.border.copy()
-        dst_cell.alignment = src_cell.alignment.copy()
-
-
-def reorder_single(ws, md_fields: list[str]):
-    """Reorder rows in a single-PDF layout sheet."""
-    # Read all data rows (skip header row 1)
-    rows: dict[str, tuple] = {}  # field_name → (field_name_cell_value, value_cell_value)
-    extra: list[tuple] = []       # rows whose field name is not in md_fields
-
-    for row in ws.iter_rows(min_row=2, values_only=True):
-        name = str(row[0] or "").strip()
-        val  = row[1] if len(row) > 1 else ""
-        if name in md_fields:
-            rows[name] = (row[0], val)
+class Ordering(NamedTuple):
+    """Result of matching a sheet's field names against the MD order."""
+    order: list[int]        # source position of each output position
+    unmatched: list[str]    # names not defined in the MD file (kept, after the MD fields)
+    duplicates: list[str]   # names that occur more than once (later copies kept at the end)
+
+    @property
+    def is_identity(self) -> bool:
+        return all(i == pos for pos, i in enumerate(self.order))
+
+
+def plan_order(names: list[str], md_fields: list[str]) -> Ordering:
+    """
+    Work out where each of names (a sheet's field names, in sheet order)
+    goes: MD fields first in MD order, then every other name in its
+    original order.  One pass over each list via a name → MD position
+    index, so the cost is linear in the number of fields.
+    """
+    md_index: dict[str, int] = {}
+    for name in md_fields:
+        md_index.setdefault(name, len(md_index))
+
+    slots: list = [None] * len(md_index)
+    seen: set[str] = set()
+    rest: list[int] = []
+    unmatched: list[str] = []
+    duplicates: list[str] = []
+    for i, name in enumerate(names):
+        if name in seen:
+            duplicates.append(name)
+            rest.append(i)
+            continue
+        seen.add(name)
+        pos = md_index.get(name)
+        if pos is None:
+            unmatched.append(name)
+            rest.append(i)
         else:
-            extra.append((row[0], val))
+            slots[pos] = i
+
+    order = [i for i in slots if i is not None] + rest
+    return Ordering(order, unmatched, duplicates)
+
+
+def _name(value) -> str:
+    return str(value or "").strip()
+
 
-    # Build new ordering: md order first, then anything extra
-    ordered_names = [n for n in md_fields if n in rows]
-    new_rows = [rows[n] for n in ordered_names] + extra
+def _permute_cells(cells, sources):
+    """Give cells[i] the value and style of sources[i] (sources are snapshots)."""
+    for cell, (value, style) in zip(cells, sources):
+        cell.value = value
+        cell._style = copy(style)  # style indices are shared within the workbook
 
-    # Write back (starting at row 2)
-    for i, (name_val, val) in enumerate(new_rows, start=2):
-        ws.cell(row=i, column=1, value=name_val)
-        ws.cell(row=i, column=2, value=val)
 
+def reorder_single(ws, md_fields: list[str]) -> Ordering:
+    """Reorder rows in a single-PDF layout sheet (row 1 is the header)."""
+    rows = list(ws.iter_rows(min_row=2, max_col=2))
+    snap = [[(cell.value, cell._style) for cell in row] for row in rows]
+    ordering = plan_order([_name(r[0][0]) if r else "" for r in snap], md_fields)
+    if not ordering.is_identity:
+        for row, src in zip(rows, ordering.order):
+            _permute_cells(row, snap[src])
+    return ordering
 
-def reorder_multi(ws, md_fields: list[str]):
+
+def reorder_multi(ws, md_fields: list[str]) -> Ordering:
     """Reorder columns in a multi-PDF layout sheet (col A stays fixed)."""
-    # Read current headers from row 1 (col B onwards)
-    max_col = ws.max_column
-    current_headers = []
-    for col in range(2, max_col + 1):
-        current_headers.append(str(ws.cell(row=1, column=col).value or "").strip())
+    header = next(ws.iter_rows(min_row=1, max_row=1, values_only=True), ())
+    ordering = plan_order([_name(h) for h in header[1:]], md_fields)
+    if ordering.is_identity:
+        return ordering  # nothing to do
+
+    # One pass over the sheet, permuting each row (values and styles) in place
+    for row in ws.iter_rows(min_col=2, max_col=len(header)):
+        snap = [(cell.value, cell._style) for cell in row]
+        _permute_cells(row, [snap[src] for src in ordering.order])
+
+    # Column widths travel with their columns
+    letters = [get_column_letter(i) for i in range(2, len(header) + 1)]
+    widths = [ws.column_dimensions[letter].width for letter in letters]
+    for letter, src in zip(letters, ordering.order):
+        ws.column_dimensions[letter].width = widths[src]
+    return ordering
+
+
+# --------------------------------------------------------------------------- #
+# Streaming reorder
+# --------------------------------------------------------------------------- #
+
+class _StyleMap:
+    """
+    Carries cell styles from a read-only workbook into a write-only one.
+
+    Each distinct source style is registered once in the destination as a
+    named style; every cell using it then references that style's index
+    array instead of copying font, fill, border and alignment objects cell
+    by cell.  Unstyled cells are passed through as plain values, so a sheet
+    without formatting costs no more than a value-only copy.
+    """
+
+    def __init__(self, dst_wb):
+        self.dst_wb = dst_wb
+        self.styles = {}  # source style id → destination StyleArray
+
+    def _register(self, cell):
+        named = NamedStyle(
+            name=f"reorder {len(self.styles) + 1}",
+            font=copy(cell.font),
+            fill=copy(cell.fill),
+            border=copy(cell.border),
+            alignment=copy(cell.alignment),
+            protection=copy(cell.protection),
+            number_format=cell.number_format,
+        )
+        self.dst_wb.add_named_style(named)
+        return named.as_tuple()
+
+    def cell(self, out, cell):
+        """The value to append for cell: plain, or a WriteOnlyCell with its style."""
+        style_id = getattr(cell, "_style_id", 0)  # EmptyCell has none
+        if not style_id:
+            return cell.value
+        style = self.styles.get(style_id)
+        if style is None:
+            style = self.styles[style_id] = self._register(cell)
+        styled = WriteOnlyCell(out, value=cell.value)
+        styled._style = copy(style)
+        return styled
+
+    def row(self, out, cells):
+        return [self.cell(out, c) for c in cells]
+
+
+_NS_MAIN = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_NS_REL = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+_NS_PKG = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+
+def _column_widths(zf: zipfile.ZipFile, part: str) -> dict[int, float]:
+    """
+    {column index: width} from the <cols> element of one sheet's XML, which
+    openpyxl does not load in read-only mode.  Only the XML before
+    <sheetData> is parsed.
+    """
+    widths = {}
+    with zf.open(part) as source:
+        for _, element in ET.iterparse(source, events=("start",)):
+            tag = element.tag.rsplit("}", 1)[-1]
+            if tag == "col" and element.get("width"):
+                width = float(element.get("width"))
+                for index in range(int(element.get("min")), int(element.get("max")) + 1):
+                    widths[index] = width
+            elif tag == "sheetData":
+                break
+    return widths
+
+
+def _workbook_column_widths(path: str) -> dict[str, dict[int, float]]:
+    """
+    {sheet title: {column index: width}} for every sheet of an .xlsx file,
+    read from the ZIP: xl/workbook.xml names the sheets, its relationships
+    give each sheet's XML part.
+    """
+    with zipfile.ZipFile(path) as zf:
+        rels = ET.fromstring(zf.read("xl/_rels/workbook.xml.rels"))
+        targets = {rel.get("Id"): rel.get("Target") for rel in rels.iter(f"{_NS_PKG}Relationship")}
+        widths = {}
+        for sheet in ET.fromstring(zf.read("xl/workbook.xml")).iter(f"{_NS_MAIN}sheet"):
+            target = targets.get(sheet.get(f"{_NS_REL}id"), "")
+            part = target.lstrip("/") if target.startswith("/") else posixpath.normpath(f"xl/{target}")
+            try:
+                widths[sheet.get("name")] = _column_widths(zf, part)
+            except KeyError:  # no such part
+                widths[sheet.get("name")] = {}
+    return widths
+
+
+def _set_widths(out, widths: dict[int, float]):
+    for index, width in widths.items():
+        out.column_dimensions[get_column_letter(index)].width = width
+
+
+class SheetResult(NamedTuple):
+    """What reorder_workbook() did to one sheet."""
+    title: str
+    layout: str                 # 'single', 'multi', or None (copied unchanged)
+    ordering: Ordering = None
+
+
+def _reorder_sheet(ws, out, layout: str, md_fields: list[str], styles: _StyleMap,
+                   widths: dict[int, float]) -> Ordering:
+    """Stream the rows of read-only sheet ws into write-only sheet out, reordered."""
+    rows = ws.iter_rows()
+    header = next(rows, ())
+    if layout == "single":
+        _set_widths(out, widths)
+        out.append(styles.row(out, header))
+        body = list(rows)
+        ordering = plan_order([_name(r[0].value) if r else "" for r in body], md_fields)
+        for i in ordering.order:
+            out.append(styles.row(out, body[i]))
+    else:
+        ordering = plan_order([_name(h.value) for h in header[1:]], md_fields)
+        perm = [0] + [i + 1 for i in ordering.order]
+        _set_widths(out, {dst + 1: widths[src + 1]
+                          for dst, src in enumerate(perm) if src + 1 in widths})
+        out.append(styles.row(out, [header[i] for i in perm]))
+        for row in rows:
+            width = len(row)
+            out.append([styles.cell(out, row[i]) if i < width else None for i in perm])
+    return ordering
+
+
+def _copy_sheet(ws, out, styles: _StyleMap, widths: dict[int, float]):
+    """Stream a sheet with no recognised layout (e.g. Summary) across unchanged."""
+    _set_widths(out, widths)
+    for row in ws.iter_rows():
+        out.append(styles.row(out, row))
+
+
+def _file_mode(path: str) -> int:
+    """Permission bits for a file replacing path: its own, or the umask default."""
+    try:
+        return os.stat(path).st_mode & 0o7777
+    except FileNotFoundError:
+        return 0o666 & ~_umask()
+
 
-    # Map header name → original column index (1-based)
-    header_to_col: dict[str, int] = {h: col for col, h in enumerate(current_headers, start=2)}
+def reorder_workbook(src_path: str, dst_path: str, md_fields: list[str]) -> list[SheetResult]:
+    """
+    Reorder every sheet of src_path whose layout detect_layout() recognises
+    into a new workbook at dst_path (which may be the same file).  Other
+    sheets are copied across unchanged.  Returns one SheetResult per sheet;
+    raises ValueError when no sheet has a recognised layout.
+
+    The source is read in read-only mode and the result written in write-only
+    mode, one row at a time, so memory stays flat however large the sheet is.
+    Only a single-layout sheet is held in memory, and that has one row per
+    field.  Cell styles and column widths move with their cells (see
+    _StyleMap).
+    """
+    widths = _workbook_column_widths(src_path)
+    src = openpyxl.load_workbook(src_path, read_only=True)
+    try:
+        dst = openpyxl.Workbook(write_only=True)
+        styles = _StyleMap(dst)
+        results = []
+        for ws in src.worksheets:
+            out = dst.create_sheet(ws.title)
+            sheet_widths = widths.get(ws.title, {})
+            try:
+                layout = detect_layout(ws)
+            except ValueError:
+                _copy_sheet(ws, out, styles, sheet_widths)
+                results.append(SheetResult(ws.title, None))
+                continue
+            ordering = _reorder_sheet(ws, out, layout, md_fields, styles, sheet_widths)
+            results.append(SheetResult(ws.title, layout, ordering))
+    finally:
+        src.close()
+
+    if not any(r.layout for r in results):
+        raise ValueError(_NO_LAYOUT)
+
+    # Write next to the destination and move into place, so the input is
+    # never half-overwritten when dst_path is the input file.
+    fd, tmp_path = tempfile.mkstemp(suffix=".xlsx", dir=os.path.dirname(os.path.abspath(dst_path)))
+    os.close(fd)
+    try:
+        os.chmod(tmp_path, _file_mode(dst_path))  # mkstemp creates files 0600
+        dst.save(tmp_path)
+        os.replace(tmp_path, dst_path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    return results
+
+
+# --------------------------------------------------------------------------- #
+# Order check
+# --------------------------------------------------------------------------- #
 
-    # Build new column order: md order first, then anything not in md_fields
-    ordered_headers = [h for h in md_fields if h in header_to_col]
-    extra_headers   = [h for h in current_headers if h not in set(md_fields)]
-    new_headers     = ordered_headers + extra_headers
+_NO_LAYOUT = (
+    "Cannot detect layout: no sheet has 'Field Name' (single) or "
+    "'PDF Filename' (multi) in A1."
+)
 
-    if new_headers == current_headers:
-        return  # nothing to do
 
-    max_row = ws.max_row
+def check_workbook(path: str, md_fields: list[str]) -> list[SheetResult]:
+    """
+    Plan the reorder of every recognised sheet of path without reading any
+    values: only the header row of a multi-layout sheet, or column A of a
+    single-layout sheet, is loaded (in read-only mode).  Raises ValueError
+    when no sheet has a recognised layout.
+    """
+    wb = openpyxl.load_workbook(path, read_only=True)
+    try:
+        results = []
+        for ws in wb.worksheets:
+            try:
+                layout = detect_layout(ws)
+            except ValueError:
+                results.append(SheetResult(ws.title, None))
+                continue
+            if layout == "single":
+                names = [_name(v) for (v,) in ws.iter_rows(min_row=2, max_col=1, values_only=True)]
+            else:
+                header = next(ws.iter_rows(min_row=1, max_row=1, values_only=True), ())
+                names = [_name(h) for h in header[1:]]
+            results.append(SheetResult(ws.title, layout, plan_order(names, md_fields)))
+    finally:
+        wb.close()
+    if not any(r.layout for r in results):
+        raise ValueError(_NO_LAYOUT)
+    return results
+
+
+def is_in_order(sheets: list[SheetResult]) -> bool:
+    """True when no recognised sheet would change if reordered."""
+    return all(s.ordering.is_identity for s in sheets if s.layout)
 
-    # Read all data for the columns we'll rearrange (col A is fixed)
-    # data[col_idx] = list of (value, cell) for rows 1..max_row
-    col_data: dict[int, list] = {}
-    for col in range(2, max_col + 1):
-        col_data[col] = [ws.cell(row=r, column=col).value for r in range(1, max_row + 1)]
 
-    # Write columns back in new order
-    for new_pos, header in enumerate(new_headers, start=2):
-        old_col = header_to_col[header]
-        src_values = col_data[old_col]
-        for row_idx, val in enumerate(src_values, start=1):
-            ws.cell(row=row_idx, column=new_pos, value=val)
+# --------------------------------------------------------------------------- #
+# Batch reorder
+# --------------------------------------------------------------------------- #
+
+def expand_excel_inputs(paths: list[str]) -> list[str]:
+    """Expand directories to the .xlsx files they contain (sorted, not recursive)."""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(
+                str(p) for p in sorted(Path(path).glob("*.xlsx"))
+                if p.is_file() and not p.name.startswith("~$")  # skip Excel lock files
+            )
+        else:
+            files.append(path)
+    return list(dict.fromkeys(files))  # the same workbook twice would race with itself
+
+
+def _reorder_job(src_path: str, dst_path: str, md_fields: list[str],
+                 check_only: bool = False) -> dict:
+    """
+    Reorder one workbook and time it; errors are returned, not raised.
+
+    The field order is checked first (headers only).  A workbook that is
+    already in order is not rewritten; with a separate dst_path it is
+    copied byte for byte.  With check_only nothing is ever written.
+
+    status is 'reordered', 'in order', 'needs reorder' (check_only) or 'error'.
+    """
+    started = time.perf_counter()
+    error = None
+    try:
+        sheets = check_workbook(src_path, md_fields)
+        if is_in_order(sheets):
+            status = "in order"
+            if not check_only and os.path.abspath(dst_path) != os.path.abspath(src_path):
+                shutil.copyfile(src_path, dst_path)
+        elif check_only:
+            status = "needs reorder"
+        else:
+            sheets = reorder_workbook(src_path, dst_path, md_fields)
+            status = "reordered"
+    except Exception as e:  # one bad workbook must not stop the batch
+        sheets = []
+        status = "error"
+        error = str(e) or type(e).__name__
+    return {
+        "path": src_path,
+        "output": dst_path,
+        "sheets": sheets,
+        "status": status,
+        "seconds": time.perf_counter() - started,
+        "error": error,
+    }
+
+
+def reorder_many(jobs_list: list[tuple[str, str]], md_fields: list[str], jobs: int = 1,
+                 check_only: bool = False):
+    """
+    Reorder each (src_path, dst_path) pair and yield its result dict as it
+    finishes.  With jobs > 1 the workbooks are processed in a process pool;
+    jobs == 0 means one worker per CPU.  check_only only reports whether
+    each workbook is in order.
+    """
+    if jobs == 0:
+        jobs = os.cpu_count() or 1
+    jobs = min(jobs, len(jobs_list))
+
+    if jobs <= 1:
+        for src_path, dst_path in jobs_list:
+            yield _reorder_job(src_path, dst_path, md_fields, check_only)
+        return
 
-    # Delete any now-surplus columns at the end (if new_headers is shorter — shouldn't happen)
-    # (Covered implicitly because we overwrite in place using the same column count.)
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = [pool.submit(_reorder_job, src_path, dst_path, md_fields, check_only)
+                   for src_path, dst_path in jobs_list]
+        for future in as_completed(futures):
+            yield future.result()
 
 
 # --------------------------------------------------------------------------- #
 # Main
 # --------------------------------------------------------------------------- #
 
+def report_ordering(ordering: Ordering, indent: str = "  "):
+    """Print the names that could not be placed by MD order."""
+    if ordering.unmatched:
+        print(f"{indent}{len(ordering.unmatched)} field(s) not in the MD file (kept at the end): "
+              f"{', '.join(ordering.unmatched)}")
+    if ordering.duplicates:
+        print(f"{indent}Duplicate field name(s) (later copies kept at the end): "
+              f"{', '.join(dict.fromkeys(ordering.duplicates))}")
+
+
+def report_result(result: dict):
+    """Print what happened to one workbook."""
+    if result["error"]:
+        print(f"Error: {result['path']}: {result['error']}")
+        return
+    print(f"{result['path']}:")
+    for sheet in result["sheets"]:
+        if sheet.layout is None:
+            if result["status"] == "reordered":
+                print(f"  [{sheet.title}] no recognised layout, copied unchanged")
+            continue
+        state = "in order" if sheet.ordering.is_identity else "out of order"
+        if result["status"] == "reordered":
+            state = "reordered" if not sheet.ordering.is_identity else state
+        print(f"  [{sheet.title}] layout: {sheet.layout}, {state}")
+        report_ordering(sheet.ordering, indent="    ")
+    if result["status"] == "reordered":
+        print(f"  Saved: {result['output']} ({result['seconds']:.2f}s)")
+    elif result["status"] == "in order":
+        copied = os.path.abspath(result["output"]) != os.path.abspath(result["path"])
+        print(f"  Already in order, not rewritten"
+              + (f" (copied to {result['output']})" if copied else "")
+              + f" ({result['seconds']:.2f}s)")
+
+
+def print_timing_summary(results: list[dict]):
+    """Per-file timing table, in input order, for batch runs."""
+    width = max(len(r["path"]) for r in results)
+    print()
+    print(f"{'Workbook':<{width}}  Sheets  Seconds  Status")
+    for r in results:
+        reordered = sum(1 for s in r["sheets"] if s.layout)
+        print(f"{r['path']:<{width}}  {reordered:>6}  {r['seconds']:>7.2f}  {r['status']}")
+    total = sum(r["seconds"] for r in results)
+    failed = sum(1 for r in results if r["error"])
+    print(f"{len(results)} workbook(s), {failed} failed, {total:.2f}s of work")
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Reorder Excel form fields to match the source .md file order.",
@@ -167,26 +532,53 @@ def main():
 Examples:
   %(prog)s form.md data.xlsx
   %(prog)s form.md data.xlsx -o reordered.xlsx
+
+  # Every workbook in a directory of shards, 4 at a time
+  %(prog)s form.md exports/ --jobs 4
+
+  # Exit status 1 if any workbook is out of order; writes nothing
+  %(prog)s form.md exports/ --check
         """,
     )
     parser.add_argument("md_file",    help="Source .md file used to generate the PDF form")
-    parser.add_argument("excel_file", help="Excel file produced by pdfform2excel.py")
+    parser.add_argument("excel_files", nargs="+", metavar="excel_file",
+                        help="Excel file(s) produced by pdfform2excel.py, or directories "
+                             "of them (every .xlsx inside is reordered)")
     parser.add_argument(
         "-o", "--output",
-        help="Output .xlsx path (default: overwrite input file)",
+        help="Output .xlsx path (default: overwrite input file). Only with a single workbook",
+    )
+    parser.add_argument(
+        "-j", "--jobs",
+        type=int,
+        default=1,
+        metavar="N",
+        help="Number of workbooks to reorder in parallel (0 = one per CPU). Default: 1",
+    )
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="Only check the field order (reads just the header row / column A) and "
+             "write nothing. Exit status: 0 in order, 1 out of order, 2 error",
     )
     args = parser.parse_args()
 
     md_path    = args.md_file
-    xlsx_path  = args.excel_file
-    out_path   = args.output or xlsx_path
+    xlsx_paths = expand_excel_inputs(args.excel_files)
 
     # Validate inputs
     if not Path(md_path).is_file():
         print(f"Error: MD file not found: {md_path}")
         sys.exit(1)
-    if not Path(xlsx_path).is_file():
-        print(f"Error: Excel file not found: {xlsx_path}")
+    if not xlsx_paths:
+        print("Error: No .xlsx files found.")
+        sys.exit(1)
+    for xlsx_path in xlsx_paths:
+        if not Path(xlsx_path).is_file():
+            print(f"Error: Excel file not found: {xlsx_path}")
+            sys.exit(1)
+    if args.output and len(xlsx_paths) > 1:
+        print("Error: -o/--output can only be used with a single workbook.")
         sys.exit(1)
 
     print(f"Reading field order from: {md_path}")
@@ -196,22 +588,28 @@ Examples:
         sys.exit(1)
     print(f"  Found {len(md_fields)} fields in MD")
 
-    wb = openpyxl.load_workbook(xlsx_path)
-    ws = wb.active
-
-    layout = detect_layout(ws)
-    print(f"  Detected layout: {layout}")
-
-    if layout == "single":
-        reorder_single(ws, md_fields)
-    else:
-        reorder_multi(ws, md_fields)
-
-    if not out_path.lower().endswith(".xlsx"):
-        out_path += ".xlsx"
-
-    wb.save(out_path)
-    print(f"Saved: {out_path}")
+    pairs = []
+    for xlsx_path in xlsx_paths:
+        out_path = args.output or xlsx_path
+        if not out_path.lower().endswith(".xlsx"):
+            out_path += ".xlsx"
+        pairs.append((xlsx_path, out_path))
+
+    by_path = {}
+    for result in reorder_many(pairs, md_fields, jobs=args.jobs, check_only=args.check):
+        report_result(result)
+        by_path[result["path"]] = result
+    results = [by_path[src_path] for src_path, _ in pairs]
+
+    if len(results) > 1:
+        print_timing_summary(results)
+    if args.check:
+        if any(r["error"] for r in results):
+            sys.exit(2)
+        if any(r["status"] == "needs reorder" for r in results):
+            sys.exit(1)
+    elif any(r["error"] for r in results):
+        sys.exit(1)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,369 @@
+"""
+shards.py
+Sharded output for pdfform2excel.py (--split-rows / --split-bytes): a sink
+that spreads the rows of a combined export over numbered shard files, each
+written by its own process.  Also the multi-node side of sharding: picking
+this node's slice of the inputs (--shard i/N) and merging the per-node
+outputs back into one file (the merge command).
+"""
+
+import csv
+import datetime
+import hashlib
+import json
+import os
+import re
+import sqlite3
+
+import openpyxl
+
+from compact_xlsx import sanitize_value
+from form_extraction import worker_context
+from output_sinks import (FILENAME_COLUMN, CsvSink, JsonLinesSink, ParquetSink, SqliteSink,
+                          XlsxSink, open_sink, sink_for, spool_rows, sql_name)
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:  # only needed to merge Parquet inputs
+    pq = None
+
+
+# --------------------------------------------------------------------------- #
+# Sharded output (--split-rows / --split-bytes)
+# --------------------------------------------------------------------------- #
+
+# Excel's sheet limit is 1,048,576 rows, one of which is the header.
+EXCEL_MAX_ROWS = 1048575
+
+
+def _shard_writer_main(conn, shard_path, fields, field_types, sink_options):
+    """Writer process: receive row batches over conn and write one shard file."""
+    try:
+        sink = open_sink(shard_path, fields, field_types, sink_options)
+        while True:
+            batch = conn.recv()
+            if batch is None:
+                break
+            for row in batch:
+                sink.write_row(*row)
+        sink.close()
+        conn.send(None)
+    except Exception as e:
+        conn.send(f"{type(e).__name__}: {e}")
+
+
+class ShardedSink:
+    """
+    Spread rows over numbered shard files (OUTPUT-0001.xlsx, ...).
+
+    A new shard is started once the current one holds max_rows rows or
+    would pass max_bytes of cell data (an estimate of the uncompressed
+    size).  Every shard is written by its own process, which receives rows
+    in batches over a pipe, so a finished shard is saved and compressed
+    while the next one is already filling.  An index (OUTPUT.shards.csv)
+    records the shard and row of every PDF.
+    """
+
+    needs_fields = True
+    appendable = False
+    BATCH_SIZE = 500
+
+    def __init__(self, output_path, fields, field_types=None, sink_options=None,
+                 max_rows=None, max_bytes=None):
+        self.ctx = worker_context()
+        self.root, self.ext = os.path.splitext(output_path)
+        self.fields = fields
+        self.field_types = field_types
+        self.sink_options = sink_options
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+        self.shards = []  # (path, process, conn)
+        self.batch = []
+        self.shard_rows = 0
+        self.shard_bytes = 0
+
+        self.index_path = f"{self.root}.shards.csv"
+        self.index_fh = open(self.index_path, 'w', newline='', encoding='utf-8')
+        self.index = csv.writer(self.index_fh)
+        self.index.writerow(['Shard', 'Row', FILENAME_COLUMN])
+
+    @property
+    def paths(self):
+        return [path for path, _, _ in self.shards]
+
+    def _start_shard(self):
+        path = f"{self.root}-{len(self.shards) + 1:04d}{self.ext}"
+        parent_conn, child_conn = self.ctx.Pipe()
+        process = self.ctx.Process(target=_shard_writer_main,
+                                   args=(child_conn, path, self.fields, self.field_types,
+                                         self.sink_options),
+                                   daemon=True)
+        process.start()
+        child_conn.close()
+        self.shards.append((path, process, parent_conn))
+        self.shard_rows = 0
+        self.shard_bytes = 0
+
+    def _send(self, message):
+        conn = self.shards[-1][2]
+        try:
+            conn.send(message)
+        except (BrokenPipeError, ConnectionResetError):
+            # The writer failed; close() collects and reports its error.
+            pass
+
+    def _flush_batch(self):
+        if self.batch:
+            self._send(self.batch)
+            self.batch = []
+
+    def _finish_shard(self):
+        """Hand the current shard over to be saved; its writer finishes in the background."""
+        self._flush_batch()
+        self._send(None)
+
+    def write_row(self, filename, form_data, file_hash=None):
+        row_bytes = len(filename.encode('utf-8')) + sum(
+            len(str(value).encode('utf-8')) for value in form_data.values())
+        if self.shards and (
+                (self.max_rows and self.shard_rows >= self.max_rows) or
+                (self.max_bytes and self.shard_bytes + row_bytes > self.max_bytes)):
+            self._finish_shard()
+            self._start_shard()
+        elif not self.shards:
+            self._start_shard()
+        self.batch.append((filename, form_data, file_hash))
+        self.shard_rows += 1
+        self.shard_bytes += row_bytes
+        self.index.writerow([os.path.basename(self.shards[-1][0]), self.shard_rows, filename])
+        if len(self.batch) >= self.BATCH_SIZE:
+            self._flush_batch()
+
+    def close(self):
+        if self.shards:
+            self._finish_shard()
+        self.index_fh.close()
+        errors = []
+        for path, process, conn in self.shards:
+            try:
+                error = conn.recv()
+            except EOFError:
+                error = f"writer process exited with code {process.exitcode}"
+            process.join()
+            conn.close()
+            if error:
+                errors.append(f"{path}: {error}")
+        if errors:
+            raise RuntimeError("Failed to write shard(s): " + '; '.join(errors))
+
+    def discard(self):
+        self.index_fh.close()
+        for path, process, conn in self.shards:
+            process.kill()
+            process.join()
+            conn.close()
+            if os.path.exists(path):
+                os.remove(path)
+        os.remove(self.index_path)
+
+
+# --------------------------------------------------------------------------- #
+# Multi-node extraction (--shard i/N and the merge command)
+# --------------------------------------------------------------------------- #
+
+def parse_shard_spec(spec):
+    """Parse 'i/N' (1 <= i <= N) into (i, N); raises ValueError when malformed."""
+    match = re.fullmatch(r'\s*(\d+)\s*/\s*(\d+)\s*', spec)
+    if not match:
+        raise ValueError(f"invalid shard '{spec}' (expected i/N, e.g. 2/8)")
+    index, count = int(match.group(1)), int(match.group(2))
+    if not 1 <= index <= count:
+        raise ValueError(f"invalid shard '{spec}': i must be between 1 and N")
+    return index, count
+
+
+def shard_of(path, count):
+    """
+    Return the 1-based shard (of count) that path belongs to.
+
+    Based on a hash of the normalised path as given, so every node that is
+    handed the same input list assigns each file to the same shard, without
+    coordination and regardless of input order.
+    """
+    digest = hashlib.sha1(os.path.normpath(path).encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big') % count + 1
+
+
+def select_shard(paths, index, count):
+    """Return the paths that belong to shard index of count, in input order."""
+    return [path for path in paths if shard_of(path, count) == index]
+
+
+def write_empty_export(output_path, fields, field_types=None, sink_options=None,
+                       split=False):
+    """
+    Write an export with a header and no rows, for a shard that got no
+    inputs, so every node leaves an output that merge can read.  With split
+    only an empty OUTPUT.shards.csv index is written.
+    """
+    if split:
+        ShardedSink(output_path, fields or []).close()
+        print(f"No inputs in this shard; wrote an empty shard index → "
+              f"{os.path.splitext(output_path)[0]}.shards.csv")
+    else:
+        open_sink(output_path, fields or [], field_types, sink_options).close()
+        print(f"No inputs in this shard; wrote an empty export → {output_path}")
+
+
+def expand_merge_inputs(paths):
+    """Replace OUTPUT.shards.csv index files with the shard files they list."""
+    expanded = []
+    for path in paths:
+        if not path.endswith('.shards.csv'):
+            expanded.append(path)
+            continue
+        directory = os.path.dirname(path)
+        with open(path, newline='', encoding='utf-8') as fh:
+            shards = dict.fromkeys(row['Shard'] for row in csv.DictReader(fh))
+        expanded.extend(os.path.join(directory, shard) for shard in shards)
+    return expanded
+
+
+def _cell_text(value):
+    """
+    Export text for a cell value read back from an output file.  Undoes
+    --typed: booleans become Yes/No and dates ISO dates again; numbers were
+    only typed when str() gives back the original text.  Inputs may come
+    from other tools, so characters Excel rejects are dropped here, as
+    normalize_fields() does for extracted values.
+    """
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return 'Yes' if value else 'No'
+    if isinstance(value, datetime.datetime) and value.time() == datetime.time():
+        value = value.date()
+    if isinstance(value, datetime.date):
+        return value.isoformat()
+    return sanitize_value(str(value))
+
+
+def _rows_from_table(header, rows, path):
+    """Turn a header + value rows into (filename, form_data) pairs."""
+    header = [_cell_text(h) for h in header]
+    if not header or header[0] != FILENAME_COLUMN:
+        raise ValueError(f"{path} is not a combined export (no '{FILENAME_COLUMN}' column)")
+    fields = header[1:]
+    for row in rows:
+        values = [_cell_text(v) for v in row]
+        values.extend([''] * (len(header) - len(values)))
+        yield values[0], dict(zip(fields, values[1:]))
+
+
+def iter_output_rows(path, table=None):
+    """
+    Yield (filename, form_data) for every row of a combined export written
+    by this tool (.xlsx, .csv, .jsonl/.ndjson, .parquet or SQLite).
+    """
+    sink_cls = sink_for(path)
+    if sink_cls is XlsxSink:
+        wb = openpyxl.load_workbook(path, read_only=True)
+        try:
+            rows = wb.worksheets[0].iter_rows(values_only=True)
+            yield from _rows_from_table(next(rows, ()), rows, path)
+        finally:
+            wb.close()
+    elif sink_cls is CsvSink:
+        with open(path, newline='', encoding='utf-8') as fh:
+            rows = csv.reader(fh)
+            yield from _rows_from_table(next(rows, []), rows, path)
+    elif sink_cls is JsonLinesSink:
+        with open(path, encoding='utf-8') as fh:
+            for line in fh:
+                if line.strip():
+                    record = json.loads(line)
+                    filename = _cell_text(record.pop(FILENAME_COLUMN, ''))
+                    yield filename, {_cell_text(k): _cell_text(v) for k, v in record.items()}
+    elif sink_cls is ParquetSink:
+        if pq is None:
+            raise ValueError(f"pyarrow is required to read {path}")
+        parquet = pq.ParquetFile(path)
+        header = parquet.schema_arrow.names
+        for batch in parquet.iter_batches():
+            columns = batch.to_pydict()
+            yield from _rows_from_table(header, zip(*(columns[h] for h in header)), path)
+    else:
+        conn = sqlite3.connect(path)
+        try:
+            if table is None:
+                tables = [row[0] for row in conn.execute(
+                    "SELECT name FROM sqlite_master WHERE type = 'table' "
+                    "AND name NOT LIKE 'sqlite_%'")]
+                if len(tables) != 1:
+                    raise ValueError(f"{path} has {len(tables)} tables; choose one with --table")
+                table = tables[0]
+            cursor = conn.execute(f'SELECT * FROM {sql_name(table)} ORDER BY rowid')
+            names = [d[0] for d in cursor.description]
+            for row in cursor:
+                record = dict(zip(names, row))
+                filename = _cell_text(record.pop('_filename'))
+                for meta in SqliteSink.META_COLUMNS:
+                    record.pop(meta, None)
+                yield filename, {_cell_text(k): _cell_text(v) for k, v in record.items()}
+        finally:
+            conn.close()
+
+
+def merge_outputs(input_paths, output_path, md_fields=None, field_types=None,
+                  sink_options=None, table=None):
+    """
+    Combine several combined exports (e.g. one per --shard node) into one.
+
+    Nothing is re-extracted: rows are read from the inputs and streamed to
+    the output sink.  With md_fields the columns are exactly the MD fields
+    in MD order; otherwise they are the union of all input columns in the
+    order first seen.  Rows for a SQLite output are keyed on a hash of
+    their content, since the PDFs themselves are not at hand.
+    """
+    print(f"Merging {len(input_paths)} files...")
+
+    def rows():
+        for path in input_paths:
+            print(f"Reading: {path}")
+            for filename, form_data in iter_output_rows(path, table):
+                if md_fields is not None:
+                    form_data = {name: form_data.get(name, '') for name in md_fields}
+                file_hash = None
+                if getattr(sink_cls, 'needs_hash', False):
+                    file_hash = hashlib.sha256(json.dumps(
+                        [filename, form_data], sort_keys=True).encode('utf-8')).hexdigest()
+                yield filename, form_data, file_hash
+
+    sink_cls = sink_for(output_path)
+    merged = rows()
+    if md_fields is not None:
+        fields = list(md_fields)
+    elif sink_cls.needs_fields:
+        fields, merged = spool_rows(merged)
+    else:
+        fields = None
+
+    sink = open_sink(output_path, fields, field_types, sink_options)
+    n_rows = 0
+    try:
+        for filename, form_data, file_hash in merged:
+            sink.write_row(filename, form_data, file_hash)
+            n_rows += 1
+    except BaseException:
+        sink.discard()
+        raise
+
+    if not n_rows:
+        sink.discard()
+        print("No rows found in any input")
+        return False
+
+    sink.close()
+    n_fields = len(fields) if fields is not None else 'variable'
+    print(f"Merged {n_rows} rows × {n_fields} fields → {output_path}")
+    return True
@@ -0,0 +1,56 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+@pytest.fixture
+def demo_pdf():
+    """The filled demo form, with radio, checkbox, date and number fields."""
+    return os.path.join(ROOT, 'demo_form.pdf')
+
+
+@pytest.fixture
+def demo_md():
+    return os.path.join(ROOT, 'demo.md')
+
+
+def write_pdf(path, fields):
+    """Write a one-page PDF with a text field per {name: value} item."""
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R /AcroForm 4 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] >>",
+        f"<< /Fields [{' '.join(f'{n} 0 R' for n in range(5, 5 + len(fields)))}] >>".encode(),
+    ]
+    objects += [f"<< /FT /Tx /T ({name}) /V ({value}) >>".encode('latin-1')
+                for name, value in fields.items()]
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for num, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{num} 0 obj\n".encode() + body + b"\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += b"".join(f"{offset:010d} 00000 n \n".encode() for offset in offsets)
+    out += (f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\n"
+            f"startxref\n{xref}\n%%EOF\n").encode()
+    with open(path, 'wb') as fh:
+        fh.write(out)
+
+
+@pytest.fixture
+def run_cli(tmp_path):
+    """Run pdfform2excel.py in tmp_path; returns the CompletedProcess."""
+    def run(*args, check=True):
+        result = subprocess.run(
+            [sys.executable, os.path.join(ROOT, 'pdfform2excel.py'), *map(str, args)],
+            cwd=tmp_path, capture_output=True, text=True)
+        if check and result.returncode != 0:
+            raise AssertionError(f"exit {result.returncode}\n{result.stdout}\n{result.stderr}")
+        return result
+    return run
@@ -0,0 +1,28 @@
+import pytest
+from PyPDF2 import PdfReader
+
+from acroform_reader import SKIPPED, FastPathUnsupported, read_fdf_fields, read_pdf_fields
+from conftest import write_pdf
+
+
+def test_matches_pypdf2(demo_pdf):
+    expected = {name: field.get('/V', '') for name, field in PdfReader(demo_pdf).get_fields().items()}
+    assert read_pdf_fields(demo_pdf) == expected
+    with open(demo_pdf, 'rb') as fh:
+        assert read_pdf_fields(fh.read()) == expected
+
+
+def test_unwanted_fields_are_skipped(tmp_path):
+    write_pdf(tmp_path / 'form.pdf', {'a': 'one', 'b': 'two'})
+    assert read_pdf_fields(str(tmp_path / 'form.pdf'), wanted={'b'}) == {'a': SKIPPED, 'b': 'two'}
+
+
+def test_xref_stream_pdf_is_unsupported():
+    with pytest.raises(FastPathUnsupported):
+        read_pdf_fields(b'%PDF-1.5\ntrailer\n<< >>\nstartxref\n0\n%%EOF\n')
+
+
+def test_fdf():
+    data = (b'%FDF-1.2\n1 0 obj\n<< /FDF << /Fields [ << /T (name) /V (Ann) >> '
+            b'<< /T (choice) /V /Male >> ] >> >>\nendobj\ntrailer\n<< /Root 1 0 R >>\n%%EOF\n')
+    assert read_fdf_fields(data) == {'name': 'Ann', 'choice': '/Male'}
@@ -0,0 +1,30 @@
+import pytest
+
+import pdfform2excel
+from conftest import write_pdf
+
+
+def test_text_mode_file_is_rejected(demo_pdf):
+    with open(demo_pdf, encoding='utf-8') as fh:
+        with pytest.raises(TypeError, match='binary mode'):
+            pdfform2excel.extract_submission(fh)
+
+
+def test_binary_file_matches_path(demo_pdf, demo_md):
+    md_fields = pdfform2excel.extract_field_names_from_md(demo_md)
+    with open(demo_pdf, 'rb') as fh:
+        result = pdfform2excel.extract_submission(fh, md_fields=md_fields)
+    assert result.ok and result.name == 'demo_form.pdf'
+    assert result.fields == pdfform2excel.extract_form_data(demo_pdf, md_fields)
+
+
+def test_pypdf2_log_warnings_are_collected(tmp_path, capsys):
+    write_pdf(tmp_path / 'form.pdf', {'f': 'hi'})
+    data = (tmp_path / 'form.pdf').read_bytes()
+    damaged = data[:data.rfind(b'startxref')] + b'startxref\n5\n%%EOF\n'
+
+    result = pdfform2excel.extract_submission(damaged, name='damaged.pdf')
+    assert result.fields == {'f': 'hi'}
+    assert any('startxref' in w for w in result.warnings)
+    captured = capsys.readouterr()
+    assert captured.out == '' and 'startxref' not in captured.err
@@ -0,0 +1,143 @@
+import csv
+import os
+
+import pytest
+
+import form_extraction
+from conftest import write_pdf
+from manifest import Manifest, append_pdfs_to_output
+from output_sinks import FILENAME_COLUMN
+
+
+def read_csv(path):
+    with open(path, newline='', encoding='utf-8') as fh:
+        return [(row[FILENAME_COLUMN], row['name']) for row in csv.DictReader(fh)]
+
+
+def touch_later(path):
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 5_000_000_000))
+
+
+def test_manifest_status_and_reload(tmp_path):
+    pdf = tmp_path / 'a.pdf'
+    write_pdf(pdf, {'name': 'Ann'})
+    manifest = Manifest(str(tmp_path / 'm.jsonl'))
+    state, st, sha256 = manifest.status(str(pdf))
+    assert state == 'new'
+    manifest.record(str(pdf), st, sha256, 'a.pdf', {'name': 'Ann'})
+    manifest.close()
+
+    manifest = Manifest(str(tmp_path / 'm.jsonl'))
+    assert manifest.status(str(pdf))[0] == 'unchanged'
+    touch_later(pdf)
+    assert manifest.status(str(pdf))[0] == 'touched'
+    write_pdf(pdf, {'name': 'Bob'})
+    touch_later(pdf)
+    assert manifest.status(str(pdf))[0] == 'changed'
+    assert [e['data'] for e in manifest.iter_entries()] == [{'name': 'Ann'}]
+    manifest.close()
+
+
+def test_manifest_drops_torn_last_line(tmp_path):
+    pdf = tmp_path / 'a.pdf'
+    write_pdf(pdf, {'name': 'Ann'})
+    path = str(tmp_path / 'm.jsonl')
+    manifest = Manifest(path)
+    _, st, sha256 = manifest.status(str(pdf))
+    manifest.record(str(pdf), st, sha256, 'a.pdf', {'name': 'Ann'})
+    manifest.close()
+    size = os.path.getsize(path)
+    with open(path, 'ab') as fh:
+        fh.write(b'{"path": "/b.pdf", "si')
+
+    manifest = Manifest(path)
+    assert os.path.getsize(path) == size
+    assert len(list(manifest.iter_entries())) == 1
+    manifest.close()
+
+
+def test_append_reads_only_new_and_changed(tmp_path, monkeypatch):
+    out = str(tmp_path / 'out.csv')
+    a, b = tmp_path / 'a.pdf', tmp_path / 'b.pdf'
+    write_pdf(a, {'name': 'Ann'})
+    assert append_pdfs_to_output([str(a)], out, ['name'])
+
+    write_pdf(b, {'name': 'Bob'})
+    write_pdf(a, {'name': 'Amy'})
+    touch_later(a)
+    read = []
+    real = form_extraction._extract_form_data
+
+    def counting(pdf_path, md_fields=None):
+        read.append(os.path.basename(pdf_path))
+        return real(pdf_path, md_fields)
+
+    monkeypatch.setattr(form_extraction, '_extract_form_data', counting)
+    assert append_pdfs_to_output([str(a), str(b)], out, ['name'])
+    assert read == ['a.pdf', 'b.pdf']
+    # The changed file keeps its row position.
+    assert read_csv(out) == [('a.pdf', 'Amy'), ('b.pdf', 'Bob')]
+
+
+def test_append_retries_unreadable_files(tmp_path, monkeypatch, capsys):
+    out = str(tmp_path / 'out.csv')
+    good, bad = tmp_path / 'good.pdf', tmp_path / 'bad.pdf'
+    write_pdf(good, {'name': 'Ann'})
+    write_pdf(bad, {'name': 'Bob'})
+    real = form_extraction._extract_form_data
+
+    def flaky(pdf_path, md_fields=None):
+        if pdf_path.endswith('bad.pdf'):
+            raise OSError("read error")
+        return real(pdf_path, md_fields)
+
+    monkeypatch.setattr(form_extraction, '_extract_form_data', flaky)
+    assert append_pdfs_to_output([str(good), str(bad)], out, ['name'])
+    assert 'Error reading' in capsys.readouterr().out
+
+    # The same, unchanged file is read again on the next run.
+    monkeypatch.setattr(form_extraction, '_extract_form_data', real)
+    assert append_pdfs_to_output([str(good), str(bad)], out, ['name'])
+    assert read_csv(out) == [('good.pdf', 'Ann'), ('bad.pdf', 'Bob')]
+
+
+def test_append_skips_files_that_vanish(tmp_path, capsys):
+    out = str(tmp_path / 'out.csv')
+    a = tmp_path / 'a.pdf'
+    write_pdf(a, {'name': 'Ann'})
+    missing = str(tmp_path / 'gone.pdf')
+    assert append_pdfs_to_output([missing, str(a)], out, ['name'])
+    assert f'Skipping {missing}' in capsys.readouterr().out
+    assert read_csv(out) == [('a.pdf', 'Ann')]
+
+
+def test_interrupted_append_resumes(tmp_path, monkeypatch):
+    out = str(tmp_path / 'out.csv')
+    paths = []
+    for name in 'abc':
+        write_pdf(tmp_path / f'{name}.pdf', {'name': name.upper()})
+        paths.append(str(tmp_path / f'{name}.pdf'))
+
+    real = form_extraction._extract_form_data
+
+    def interrupted(pdf_path, md_fields=None):
+        if pdf_path.endswith('c.pdf'):
+            raise KeyboardInterrupt
+        return real(pdf_path, md_fields)
+
+    monkeypatch.setattr(form_extraction, '_extract_form_data', interrupted)
+    with pytest.raises(KeyboardInterrupt):
+        append_pdfs_to_output(paths, out, ['name'])
+    assert not os.path.exists(out)
+
+    read = []
+
+    def counting(pdf_path, md_fields=None):
+        read.append(os.path.basename(pdf_path))
+        return real(pdf_path, md_fields)
+
+    monkeypatch.setattr(form_extraction, '_extract_form_data', counting)
+    assert append_pdfs_to_output(paths, out, ['name'])
+    assert read == ['c.pdf']
+    assert read_csv(out) == [('a.pdf', 'A'), ('b.pdf', 'B'), ('c.pdf', 'C')]
@@ -0,0 +1,75 @@
+import io
+import tarfile
+import zipfile
+
+import pytest
+
+import form_extraction
+import pdfform2excel
+from conftest import write_pdf
+
+XFDF = ('<?xml version="1.0" encoding="UTF-8"?><xfdf xmlns="http://ns.adobe.com/xfdf/">'
+        '<fields><field name="name"><value>Bob</value></field></fields></xfdf>')
+
+
+@pytest.fixture
+def members(tmp_path):
+    write_pdf(tmp_path / 'a.pdf', {'name': 'Ann'})
+    return {'forms/a.pdf': (tmp_path / 'a.pdf').read_bytes(),
+            'forms/b.xfdf': XFDF.encode('utf-8'),
+            'notes.txt': b'not a form'}
+
+
+def write_archive(path, members):
+    if path.suffix == '.zip':
+        with zipfile.ZipFile(path, 'w') as zf:
+            zf.writestr('forms/', '')
+            for name, data in members.items():
+                zf.writestr(name, data)
+        return
+    with tarfile.open(path, 'w:gz' if path.suffix == '.gz' else 'w') as tar:
+        for name, data in members.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+
+
+@pytest.mark.parametrize('name', ['in.zip', 'in.tar', 'in.tar.gz'])
+def test_archive_members_are_read_in_memory(tmp_path, members, name):
+    path = tmp_path / name
+    write_archive(path, members)
+    listed = form_extraction.list_archive_members(str(path))
+
+    assert [m.member for m in listed] == ['forms/a.pdf', 'forms/b.xfdf']
+    assert [str(m) for m in listed] == [f'{path}/forms/a.pdf', f'{path}/forms/b.xfdf']
+    assert [m.read_bytes() for m in listed] == [members['forms/a.pdf'], members['forms/b.xfdf']]
+    assert [form_extraction.input_name(m) for m in listed] == ['forms/a.pdf', 'forms/b.xfdf']
+    assert [form_extraction.extract_form_data(m, ['name']) for m in listed] == [
+        {'name': 'Ann'}, {'name': 'Bob'}]
+
+
+def test_compressed_tar_is_read_in_one_pass(tmp_path, members, monkeypatch):
+    path = tmp_path / 'in.tar.gz'
+    write_archive(path, members)
+    modes = []
+    real_open = tarfile.open
+
+    def tracking_open(*args, **kwargs):
+        modes.append(kwargs.get('mode', args[1] if len(args) > 1 else 'r'))
+        return real_open(*args, **kwargs)
+
+    monkeypatch.setattr(tarfile, 'open', tracking_open)
+    listed = form_extraction.list_archive_members(str(path))
+    assert [form_extraction.extract_form_data(m, ['name']) for m in listed] == [
+        {'name': 'Ann'}, {'name': 'Bob'}]
+    assert modes == ['r|*']
+
+
+def test_archive_inputs_export_with_jobs(tmp_path, members):
+    path = tmp_path / 'in.tar.gz'
+    write_archive(path, members)
+    output = str(tmp_path / 'out.csv')
+    inputs = form_extraction.list_archive_members(str(path))
+    assert pdfform2excel.export_multiple_pdfs_to_excel(inputs, output, ['name'], jobs=2)
+    with open(output, encoding='utf-8') as fh:
+        assert fh.read().splitlines()[1:] == ['forms/a.pdf,Ann', 'forms/b.xfdf,Bob']
@@ -0,0 +1,19 @@
+import pytest
+
+
+@pytest.mark.parametrize('args, message', [
+    (('-o', 'out.csv'), '--mode single writes .xlsx workbooks only'),
+    (('-o', 'out.xlsx', '--split-rows', '10'), '--split-rows cannot be used with --mode single'),
+    (('-o', 'out.xlsx', '--append'), '--append cannot be used with --mode single'),
+])
+def test_mode_single_rejects_combined_only_options(run_cli, demo_pdf, args, message):
+    result = run_cli(demo_pdf, '--mode', 'single', *args, check=False)
+    assert result.returncode == 2
+    assert message in result.stderr
+
+
+def test_unknown_index_field_is_an_error(run_cli, demo_pdf, demo_md):
+    result = run_cli(demo_pdf, '--md', demo_md, '-o', 'out.sqlite', '--index', 'city,nope',
+                     check=False)
+    assert result.returncode == 1
+    assert '--index names unknown field(s): nope' in result.stdout
@@ -0,0 +1,47 @@
+import datetime
+
+import openpyxl
+
+from compact_xlsx import SST_MAX_LENGTH, SST_SAMPLE_CELLS, CompactWorkbook, header_cell, percent_cell
+
+
+def test_values_and_styles_read_back(tmp_path):
+    path = str(tmp_path / 'out.xlsx')
+    wb = CompactWorkbook(path)
+    ws = wb.create_sheet('Data')
+    ws.column_dimensions['A'].width = 30
+    long_text = 'x' * (SST_MAX_LENGTH + 1)
+    ws.append([header_cell(ws, 'name'), header_cell(ws, 'value')])
+    ws.append(['Yes', 25])
+    ws.append(['Yes', datetime.date(1990, 1, 15)])
+    ws.append([long_text, percent_cell(ws, 0.5)])
+    ws.append(['a < b & c', True])
+    wb.save()
+
+    sheet = openpyxl.load_workbook(path).worksheets[0]
+    assert [[c.value for c in row] for row in sheet.iter_rows()] == [
+        ['name', 'value'], ['Yes', 25], ['Yes', datetime.datetime(1990, 1, 15)],
+        [long_text, 0.5], ['a < b & c', True]]
+    assert sheet['A1'].font.b and sheet['B4'].number_format == '0.0%'
+    assert sheet.column_dimensions['A'].width == 30
+
+
+def test_discard_leaves_nothing(tmp_path):
+    wb = CompactWorkbook(str(tmp_path / 'out.xlsx'))
+    wb.create_sheet('Data').append(['a'])
+    wb.discard()
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_unique_columns_are_not_interned(tmp_path):
+    path = str(tmp_path / 'out.xlsx')
+    wb = CompactWorkbook(path)
+    ws = wb.create_sheet('Data')
+    for i in range(SST_SAMPLE_CELLS * 4):
+        ws.append([f'file{i}.pdf', 'Yes' if i % 2 else 'No'])
+    wb.save()
+
+    assert len(wb.strings) <= SST_SAMPLE_CELLS + 2  # the sample, then inline
+    assert {'Yes', 'No'} <= set(wb.strings)
+    rows = list(openpyxl.load_workbook(path, read_only=True).worksheets[0].values)
+    assert rows[-1] == (f'file{SST_SAMPLE_CELLS * 4 - 1}.pdf', 'Yes')
@@ -0,0 +1,69 @@
+import csv
+
+import openpyxl
+import pytest
+
+import pdfform2excel
+from conftest import write_pdf
+from output_sinks import FILENAME_COLUMN
+
+
+@pytest.mark.parametrize('output', ['out.xlsx', 'out.csv', 'out.jsonl'])
+def test_failed_export_leaves_no_files(tmp_path, monkeypatch, output):
+    def rows(*args, **kwargs):
+        yield 'a.pdf', {'f': 'one'}, None
+        raise RuntimeError("disk on fire")
+
+    monkeypatch.setattr(pdfform2excel, 'iter_rows', rows)
+    with pytest.raises(RuntimeError):
+        pdfform2excel.export_multiple_pdfs_to_excel(['a.pdf'], str(tmp_path / output), ['f'])
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_illegal_characters_are_dropped_from_names_and_filenames(tmp_path):
+    pdf = tmp_path / 'form\x01.pdf'
+    write_pdf(pdf, {'na\x02me': 'A\x03nn'})
+    output = str(tmp_path / 'out.xlsx')
+    assert pdfform2excel.export_multiple_pdfs_to_excel([str(pdf)], output)
+
+    rows = list(openpyxl.load_workbook(output, read_only=True).worksheets[0].values)
+    assert rows == [(FILENAME_COLUMN, 'name'), ('form.pdf', 'Ann')]
+
+
+def test_jobs_keep_input_order(tmp_path):
+    paths = []
+    for i in range(30):
+        write_pdf(tmp_path / f'{i:02}.pdf', {'n': str(i)})
+        paths.append(str(tmp_path / f'{i:02}.pdf'))
+    output = str(tmp_path / 'out.csv')
+    assert pdfform2excel.export_multiple_pdfs_to_excel(paths, output, jobs=3)
+
+    with open(output, newline='', encoding='utf-8') as fh:
+        rows = list(csv.reader(fh))
+    assert rows[1:] == [[f'{i:02}.pdf', str(i)] for i in range(30)]
+
+
+def test_sheet_title_makes_valid_unique_names():
+    taken = set()
+    assert pdfform2excel.sheet_title('a/b:c', taken) == 'a_b_c'
+    assert pdfform2excel.sheet_title('A_B_C', taken) == 'A_B_C (2)'
+    assert pdfform2excel.sheet_title('history', taken) == 'history (2)'
+    assert pdfform2excel.sheet_title("''", taken) == 'Sheet'
+    long_name = 'x' * 40
+    assert pdfform2excel.sheet_title(long_name, taken) == 'x' * 31
+    assert pdfform2excel.sheet_title(long_name, taken) == 'x' * 27 + ' (2)'
+
+
+def test_sheets_export_suffixes_colliding_names(tmp_path):
+    paths = []
+    for folder in ('one', 'two'):
+        (tmp_path / folder).mkdir()
+        write_pdf(tmp_path / folder / 'form.pdf', {'name': folder})
+        paths.append(str(tmp_path / folder / 'form.pdf'))
+    output = str(tmp_path / 'out.xlsx')
+    assert pdfform2excel.export_pdfs_to_sheets(paths, output)
+
+    wb = openpyxl.load_workbook(output)
+    assert wb.sheetnames == ['form', 'form (2)']
+    assert [[c.value for c in row] for row in wb['form (2)'].iter_rows()] == [
+        ['Field Name', 'Value'], ['name', 'two']]
@@ -0,0 +1,37 @@
+import form_extraction
+
+
+def _write_fdf(path, form_data, field_types):
+    """A minimal FDF file holding form_data, with PDF value types."""
+    def pdf_string(text):
+        return '(' + text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)') + ')'
+
+    entries = []
+    for name, value in form_data.items():
+        if field_types.get(name) == 'checkbox':
+            value = '/Yes' if value == 'Yes' else '/Off'
+        elif not value.startswith('/'):
+            value = pdf_string(value)
+        entries.append(f'<< /T {pdf_string(name)} /V {value} >>')
+    body = f"1 0 obj\n<< /FDF << /Fields [ {' '.join(entries)} ] >> >>\nendobj\n"
+    with open(path, 'wb') as fh:
+        fh.write(b'%FDF-1.2\n' + body.encode('latin-1') + b'trailer\n<< /Root 1 0 R >>\n%%EOF\n')
+
+
+def test_xfdf_and_fdf_rows_match_the_pdf(tmp_path, demo_pdf, demo_md):
+    md_fields = form_extraction.extract_field_names_from_md(demo_md)
+    field_types = form_extraction.extract_field_types_from_md(demo_md)
+    from_pdf = form_extraction.extract_form_data(demo_pdf, md_fields)
+    assert from_pdf['gender'] == '/Male'
+
+    xfdf = str(tmp_path / 'demo.xfdf')
+    fdf = str(tmp_path / 'demo.fdf')
+    form_extraction.write_xfdf(xfdf, from_pdf, 'demo_form.pdf', field_types)
+    _write_fdf(fdf, from_pdf, field_types)
+
+    assert form_extraction.extract_form_data(xfdf, md_fields) == from_pdf
+    assert form_extraction.extract_form_data(fdf, md_fields) == from_pdf
+
+    projection = form_extraction.project_fields('comm_pref,employment', md_fields)
+    assert form_extraction.extract_form_data(xfdf, projection) == {
+        'comm_pref': from_pdf['comm_pref'], 'employment': from_pdf['employment']}
@@ -0,0 +1,25 @@
+import errno
+
+import form_schema
+
+MD = "**Name:** {{text:name}}\n\n**Size:** {{radio:size:S|M}}\n"
+
+
+def test_cache_entry_round_trips(tmp_path):
+    schema = form_schema.compile_form_schema(MD, use_cache=False)
+    form_schema._write_cached(tmp_path / 'entry.json', schema)
+    cached = form_schema._read_cached(tmp_path / 'entry.json')
+    assert (cached.names, cached.types, cached.options) == (schema.names, schema.types,
+                                                            schema.options)
+    assert [p.name for p in tmp_path.iterdir()] == ['entry.json']
+
+
+def test_failed_cache_write_leaves_no_temp_file(tmp_path, monkeypatch):
+    schema = form_schema.compile_form_schema(MD, use_cache=False)
+
+    def full_disk(*args, **kwargs):
+        raise OSError(errno.ENOSPC, "No space left on device")
+
+    monkeypatch.setattr(form_schema.json, 'dump', full_disk)
+    form_schema._write_cached(tmp_path / 'entry.json', schema)
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,35 @@
+import csv
+import json
+
+import pytest
+
+import form_extraction
+import pdfform2excel
+from conftest import write_pdf
+
+
+@pytest.mark.skipif(pdfform2excel.resource is None, reason="needs setrlimit")
+def test_oversized_pdf_is_quarantined_under_max_memory(tmp_path, run_cli):
+    write_pdf(tmp_path / 'small.pdf', {'f': 'hello'})
+    write_pdf(tmp_path / 'huge.pdf', {'f': 'x' * (40 << 20)})
+    run_cli('small.pdf', 'huge.pdf', '--max-memory', 20, '-o', 'out.csv',
+            '--quarantine-report', 'q.json')
+
+    with open(tmp_path / 'out.csv', newline='', encoding='utf-8') as fh:
+        assert list(csv.reader(fh)) == [['PDF Filename', 'f'], ['small.pdf', 'hello']]
+    with open(tmp_path / 'q.json', encoding='utf-8') as fh:
+        report = json.load(fh)
+    assert [(e['path'], e['reason']) for e in report] == [('huge.pdf', 'memory')]
+
+
+def test_quarantine_list_and_report(tmp_path):
+    limits = form_extraction.ExtractionLimits(timeout=1)
+    limits.quarantine('a.pdf', 'timeout', 1.0004)
+    limits.quarantine('b.pdf', 'error', 0.2, 'bad xref')
+    assert limits.is_quarantined('a.pdf') and not limits.is_quarantined('c.pdf')
+
+    limits.write_report(str(tmp_path / 'q.csv'))
+    with open(tmp_path / 'q.csv', newline='', encoding='utf-8') as fh:
+        assert list(csv.DictReader(fh)) == [
+            {'path': 'a.pdf', 'reason': 'timeout', 'seconds': '1.0', 'detail': ''},
+            {'path': 'b.pdf', 'reason': 'error', 'seconds': '0.2', 'detail': 'bad xref'}]
@@ -0,0 +1,76 @@
+import csv
+import shutil
+
+import pytest
+
+import output_sinks
+from shards import iter_output_rows, parse_shard_spec, select_shard, shard_of
+
+
+def _read_csv(path):
+    with open(path, newline='', encoding='utf-8') as fh:
+        return list(csv.reader(fh))
+
+
+def test_typed_shards_merge_like_untyped(tmp_path, run_cli, demo_pdf, demo_md):
+    for name in ('a.pdf', 'b.pdf'):
+        shutil.copy(demo_pdf, tmp_path / name)
+    for out, extra in (('plain.xlsx', ()), ('typed.xlsx', ('--typed',))):
+        run_cli('a.pdf', 'b.pdf', '--md', demo_md, '--split-rows', 1, '-o', out, *extra)
+        run_cli('merge', out.replace('.xlsx', '.shards.csv'), '-o', out.replace('.xlsx', '.csv'))
+
+    plain = _read_csv(tmp_path / 'plain.csv')
+    typed = _read_csv(tmp_path / 'typed.csv')
+    assert len(plain) == 3
+    assert typed == plain
+    row = dict(zip(plain[0], plain[1]))
+    assert row['terms_agreement'] == 'Yes'
+    assert row['newsletter_subscription'] == 'No'
+    assert row['birth_date'] == '1990-01-15'
+    assert row['age'] == '25'
+
+
+def test_typed_numbers_keep_their_text():
+    assert output_sinks._to_number('25') == 25
+    assert output_sinks._to_number('2.5') == 2.5
+    for text in ('+5', '1.50', '1e3', '007', '1234567890123456'):
+        assert output_sinks._to_number(text) == text
+
+
+def test_merge_to_xlsx_drops_illegal_characters(tmp_path, run_cli):
+    with open(tmp_path / 'in.csv', 'w', newline='', encoding='utf-8') as fh:
+        csv.writer(fh).writerows([['PDF Filename', 'note'], ['a\x02.pdf', 'bad\x01value']])
+    run_cli('merge', 'in.csv', '-o', 'out.xlsx')
+
+    rows = list(iter_output_rows(str(tmp_path / 'out.xlsx')))
+    assert rows == [('a.pdf', {'note': 'badvalue'})]
+
+
+def test_empty_shard_still_merges(tmp_path, run_cli, demo_pdf, demo_md):
+    shutil.copy(demo_pdf, tmp_path / 'a.pdf')
+    for ext, extra in (('.xlsx', ()), ('.csv', ()), ('.jsonl', ()), ('.csv', ('--split-rows', 1))):
+        outputs = []
+        for i in (1, 2):
+            out = f'node{i}{ext}'
+            run_cli('a.pdf', '--md', demo_md, '--shard', f'{i}/2', '-o', out, *extra)
+            outputs.append(out.replace(ext, '.shards.csv') if extra else out)
+        run_cli('merge', *outputs, '-o', 'merged.csv')
+        rows = _read_csv(tmp_path / 'merged.csv')
+        assert [row[0] for row in rows[1:]] == ['a.pdf']
+
+
+def test_shards_are_stable_and_partition_the_inputs():
+    paths = [f'forms/{i}.pdf' for i in range(200)]
+    shards = [select_shard(paths, i, 8) for i in range(1, 9)]
+    assert sorted(p for shard in shards for p in shard) == sorted(paths)
+    assert all(shards)
+    # Same assignment whatever the input order, spelling or process.
+    assert select_shard(paths[::-1], 3, 8) == shards[2][::-1]
+    assert shard_of('./forms//c.pdf', 8) == shard_of('forms/c.pdf', 8)
+    assert [shard_of(p, 8) for p in ('forms/a.pdf', 'forms/b.pdf')] == [8, 6]
+
+
+@pytest.mark.parametrize('spec', ['0/4', '5/4', '2', 'a/b'])
+def test_parse_shard_spec_rejects_bad_specs(spec):
+    with pytest.raises(ValueError):
+        parse_shard_spec(spec)
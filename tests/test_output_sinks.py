@@ -0,0 +1,79 @@
+import csv
+import json
+
+import pytest
+
+import output_sinks
+
+
+ROWS = [('a.pdf', {'name': 'Ann', 'age': '25'}, 'h1'), ('b.pdf', {'name': 'Bo', 'age': ''}, 'h2')]
+
+
+@pytest.mark.parametrize('ext', ['.xlsx', '.csv', '.jsonl', '.sqlite'])
+def test_sink_for_extension(ext):
+    assert output_sinks.sink_for('out' + ext) is output_sinks.SINKS[ext]
+
+
+def test_csv_and_jsonl(tmp_path):
+    for ext in ('.csv', '.jsonl'):
+        sink = output_sinks.open_sink(str(tmp_path / ('out' + ext)), ['name', 'age'])
+        for row in ROWS:
+            sink.write_row(*row)
+        sink.close()
+    with open(tmp_path / 'out.csv', newline='', encoding='utf-8') as fh:
+        assert list(csv.reader(fh)) == [['PDF Filename', 'name', 'age'],
+                                        ['a.pdf', 'Ann', '25'], ['b.pdf', 'Bo', '']]
+    with open(tmp_path / 'out.jsonl', encoding='utf-8') as fh:
+        assert [json.loads(line)['name'] for line in fh] == ['Ann', 'Bo']
+
+
+def test_sqlite_upserts_on_hash(tmp_path):
+    path = str(tmp_path / 'out.sqlite')
+    for _ in range(2):
+        sink = output_sinks.open_sink(path, ['name', 'age'], {'age': 'number'})
+        for row in ROWS:
+            sink.write_row(*row)
+        sink.close()
+    sink = output_sinks.SqliteSink(path)
+    assert sink.conn.execute('SELECT name, age FROM submissions ORDER BY rowid').fetchall() == [
+        ('Ann', 25), ('Bo', None)]
+    sink.close()
+
+
+def test_parquet_dictionary_encodes_categorical_fields(tmp_path, monkeypatch):
+    pq = pytest.importorskip('pyarrow.parquet')
+    monkeypatch.setattr(output_sinks.ParquetSink, 'ROW_GROUP_SIZE', 2)
+    path = str(tmp_path / 'out.parquet')
+    sink = output_sinks.open_sink(path, ['name', 'size'], {'size': 'radio'})
+    for i in range(5):
+        sink.write_row(f'{i}.pdf', {'name': f'n{i}', 'size': 'S' if i % 2 else 'M'})
+    sink.close()
+
+    parquet = pq.ParquetFile(path)
+    assert parquet.metadata.num_row_groups == 3
+    schema = parquet.schema_arrow
+    assert str(schema.field('size').type) == 'dictionary<values=string, indices=int32, ordered=0>'
+    assert str(schema.field('name').type) == 'string'
+    table = parquet.read()
+    assert table.column('size').to_pylist() == ['M', 'S', 'M', 'S', 'M']
+    assert table.column('PDF Filename').to_pylist()[-1] == '4.pdf'
+
+
+def test_sqlite_disambiguates_names_that_differ_in_case(tmp_path):
+    path = str(tmp_path / 'out.sqlite')
+    for run in range(2):
+        sink = output_sinks.SqliteSink(path, ['Email', 'email'], index_fields=['email'])
+        sink.write_row('a.pdf', {'Email': 'A@X', 'email': 'a@x'}, f'h{run}')
+        sink.close()
+    sink = output_sinks.SqliteSink(path)
+    cursor = sink.conn.execute('SELECT * FROM submissions ORDER BY rowid')
+    assert [d[0] for d in cursor.description][3:] == ['Email', 'email_2']
+    assert [row[3:] for row in cursor] == [('A@X', 'a@x')] * 2
+    indexes = [row[1] for row in sink.conn.execute("PRAGMA index_list('submissions')")]
+    assert 'idx_submissions_email_2' in indexes
+    sink.close()
+
+
+def test_sqlite_rejects_unknown_index_fields(tmp_path):
+    with pytest.raises(ValueError, match='nmae'):
+        output_sinks.SqliteSink(str(tmp_path / 'out.sqlite'), ['name'], index_fields=['nmae'])
@@ -0,0 +1,62 @@
+import csv
+import time
+
+import pytest
+
+import pdfform2excel
+from form_schema import load_form_schema
+
+
+def test_prefetcher_stays_at_most_depth_ahead():
+    produced = []
+
+    def items():
+        for i in range(20):
+            produced.append(i)
+            yield i
+
+    seen = []
+    for item in pdfform2excel.Prefetcher(items(), depth=3):
+        time.sleep(0.01)
+        # depth queued, one the reader is waiting to put and the one in hand
+        assert len(produced) - len(seen) <= 3 + 1 + 1
+        seen.append(item)
+    assert seen == list(range(20))
+
+
+def test_prefetcher_reraises_producer_errors():
+    def items():
+        yield 1
+        raise ValueError("bad input")
+
+    seen = []
+    with pytest.raises(ValueError, match='bad input'):
+        for item in pdfform2excel.Prefetcher(items(), depth=2):
+            seen.append(item)
+    assert seen == [1]
+
+
+def test_prefetcher_stops_the_reader_when_the_consumer_stops():
+    produced = []
+
+    def items():
+        for i in range(1000):
+            produced.append(i)
+            yield i
+
+    prefetcher = pdfform2excel.Prefetcher(items(), depth=2)
+    for item in prefetcher:
+        if item == 1:
+            break
+    assert not prefetcher.thread.is_alive()
+    assert len(produced) < 10
+
+
+def test_run_pipeline_writes_md_order(tmp_path, demo_pdf, demo_md):
+    output = str(tmp_path / 'out.csv')
+    assert pdfform2excel.run_pipeline([demo_pdf, demo_pdf], output, demo_md, queue_size=1)
+
+    with open(output, newline='', encoding='utf-8') as fh:
+        rows = list(csv.reader(fh))
+    assert rows[0][1:] == list(load_form_schema(demo_md).names)
+    assert len(rows) == 3 and rows[1] == rows[2]
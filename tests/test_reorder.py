@@ -0,0 +1,148 @@
+import os
+import subprocess
+import sys
+
+import openpyxl
+import pytest
+from openpyxl.styles import Font
+
+import reorder_excel
+from conftest import ROOT
+from reorder_excel import Ordering, plan_order
+
+MD = """# Form
+
+**First:** {{text:first}}
+
+**Second:** {{text:second}}
+
+**Third:** {{text:third}}
+"""
+MD_FIELDS = ['first', 'second', 'third']
+
+
+@pytest.fixture
+def md_file(tmp_path):
+    path = tmp_path / 'form.md'
+    path.write_text(MD, encoding='utf-8')
+    return str(path)
+
+
+def write_multi(path, header, rows=(), widths=None, bold_column=None):
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = 'Form Data'
+    ws.append(['PDF Filename'] + header)
+    for row in rows:
+        ws.append(row)
+    for letter, width in (widths or {}).items():
+        ws.column_dimensions[letter].width = width
+    if bold_column:
+        for cell in ws[bold_column]:
+            cell.font = Font(bold=True)
+    wb.create_sheet('Summary').append(['Total', 2])
+    wb.save(path)
+    return str(path)
+
+
+def write_single(path, names):
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.append(['Field Name', 'Value'])
+    for name in names:
+        ws.append([name, f'{name} value'])
+    ws[f'B{names.index("third") + 2}'].font = Font(italic=True)
+    wb.save(path)
+    return str(path)
+
+
+def test_plan_order():
+    ordering = plan_order(['third', 'extra', 'first', 'first', 'second'], MD_FIELDS)
+    assert ordering == Ordering([2, 4, 0, 1, 3], ['extra'], ['first'])
+    assert not ordering.is_identity
+    assert plan_order(['first', 'second', 'other'], MD_FIELDS).is_identity
+
+
+def test_reorder_multi_moves_values_styles_and_widths(tmp_path):
+    path = write_multi(tmp_path / 'in.xlsx', ['third', 'first', 'second'],
+                       [['a.pdf', 3, 1, 2], ['b.pdf', 'c', 'a', 'b']],
+                       widths={'B': 33, 'C': 11}, bold_column='B')
+    out = str(tmp_path / 'out.xlsx')
+    results = reorder_excel.reorder_workbook(path, out, MD_FIELDS)
+    assert [(r.title, r.layout) for r in results] == [('Form Data', 'multi'), ('Summary', None)]
+
+    wb = openpyxl.load_workbook(out)
+    ws = wb['Form Data']
+    assert [[c.value for c in row] for row in ws.iter_rows()] == [
+        ['PDF Filename', 'first', 'second', 'third'],
+        ['a.pdf', 1, 2, 3], ['b.pdf', 'a', 'b', 'c']]
+    assert ws['D2'].font.b and not ws['B2'].font.b
+    assert ws.column_dimensions['B'].width == 11
+    assert ws.column_dimensions['D'].width == 33
+    assert [c.value for c in wb['Summary'][1]] == ['Total', 2]
+
+
+def test_reorder_single_moves_rows_and_styles(tmp_path):
+    path = write_single(tmp_path / 'in.xlsx', ['second', 'third', 'extra', 'first'])
+    reorder_excel.reorder_workbook(path, path, MD_FIELDS)
+
+    ws = openpyxl.load_workbook(path).active
+    assert [c.value for c in ws['A']] == ['Field Name', 'first', 'second', 'third', 'extra']
+    assert ws['B4'].value == 'third value' and ws['B4'].font.i
+    assert not ws['B3'].font.i
+
+
+def test_in_memory_reorder_matches(tmp_path):
+    path = write_multi(tmp_path / 'in.xlsx', ['second', 'first'], [['a.pdf', 2, 1]])
+    ws = openpyxl.load_workbook(path)['Form Data']
+    ordering = reorder_excel.reorder_multi(ws, MD_FIELDS)
+    assert ordering.order == [1, 0]
+    assert [c.value for c in ws[2]] == ['a.pdf', 1, 2]
+
+
+def test_style_map_registers_each_style_once(tmp_path):
+    path = write_multi(tmp_path / 'in.xlsx', ['first'], [['a.pdf', 1], ['b.pdf', 2]],
+                       bold_column='B')
+    src = openpyxl.load_workbook(path, read_only=True)
+    dst = openpyxl.Workbook(write_only=True)
+    out = dst.create_sheet('x')
+    styles = reorder_excel._StyleMap(dst)
+    rows = [styles.row(out, row) for row in src['Form Data'].iter_rows()]
+    src.close()
+    assert len(styles.styles) == 1
+    assert rows[1][0] == 'a.pdf'  # unstyled cells stay plain values
+    assert rows[1][1].font.b and rows[2][1].font.b
+
+
+def test_check_exit_codes(tmp_path, md_file):
+    def check(*paths):
+        return subprocess.run(
+            [sys.executable, os.path.join(ROOT, 'reorder_excel.py'), md_file, *paths, '--check'],
+            capture_output=True, text=True).returncode
+
+    in_order = write_multi(tmp_path / 'ok.xlsx', MD_FIELDS)
+    shuffled = write_multi(tmp_path / 'bad.xlsx', ['second', 'first'])
+    before = os.path.getmtime(shuffled)
+    broken = tmp_path / 'broken.xlsx'
+    broken.write_bytes(b'not a workbook')
+
+    assert check(in_order) == 0
+    assert check(in_order, shuffled) == 1
+    assert check(in_order, str(broken)) == 2
+    assert os.path.getmtime(shuffled) == before
+
+
+def test_reorder_many_with_jobs(tmp_path):
+    pairs = []
+    for i in range(4):
+        path = write_multi(tmp_path / f'{i}.xlsx', ['third', 'second', 'first'],
+                           [[f'{i}.pdf', 3, 2, 1]])
+        pairs.append((path, path))
+    pairs.append((write_multi(tmp_path / 'ok.xlsx', MD_FIELDS), str(tmp_path / 'copy.xlsx')))
+
+    results = {r['path']: r for r in reorder_excel.reorder_many(pairs, MD_FIELDS, jobs=2)}
+    assert [results[src]['status'] for src, _ in pairs] == ['reordered'] * 4 + ['in order']
+    for src, _ in pairs[:4]:
+        ws = openpyxl.load_workbook(src)['Form Data']
+        assert [c.value for c in ws[2]][1:] == [1, 2, 3]
+    assert os.path.exists(tmp_path / 'copy.xlsx')
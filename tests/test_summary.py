@@ -0,0 +1,44 @@
+import json
+
+import openpyxl
+
+import pdfform2excel
+from compact_xlsx import CompactWorkbook
+
+
+def make_summary(report_path=None):
+    summary = pdfform2excel.FormSummary(
+        ['name', 'size', 'agree'], {'size': 'radio', 'agree': 'checkbox'},
+        {'size': ['Small', 'Large']}, report_path)
+    summary.add({'name': 'Ann', 'size': '/Small', 'agree': 'Yes'})
+    summary.add({'name': '', 'size': 'Small', 'agree': 'No'})
+    summary.add({'name': 'Cy', 'size': 'Other'})
+    return summary
+
+
+def test_counts_fill_rates_and_options():
+    assert make_summary().as_dict() == {'rows': 3, 'fields': {
+        'name': {'type': 'text', 'filled': 2, 'fill_rate': 0.6667},
+        'size': {'type': 'radio', 'filled': 3, 'fill_rate': 1.0,
+                 'values': {'Small': 2, 'Large': 0, 'Other': 1}},
+        'agree': {'type': 'checkbox', 'filled': 1, 'fill_rate': 0.3333,
+                  'values': {'Yes': 1, 'No': 2}},
+    }}
+
+
+def test_emit_json_report(tmp_path):
+    path = tmp_path / 'summary.json'
+    make_summary(str(path)).emit()
+    assert json.loads(path.read_text(encoding='utf-8'))['fields']['size']['values']['Small'] == 2
+
+
+def test_emit_summary_sheet(tmp_path):
+    path = str(tmp_path / 'out.xlsx')
+    wb = CompactWorkbook(path)
+    make_summary().emit(wb)
+    wb.save()
+
+    rows = list(openpyxl.load_workbook(path, read_only=True)['Summary'].values)
+    assert rows[0] == ('Field', 'Type', 'Filled', 'Fill Rate', 'Value', 'Count', 'Share')
+    assert rows[1][:3] == ('name', 'text', 2)
+    assert rows[3][4:6] == ('Small', 2)
@@ -0,0 +1,96 @@
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+
+import openpyxl
+
+from conftest import ROOT, write_pdf
+from output_sinks import FILENAME_COLUMN
+
+
+def start_watch(tmp_path, output, *args):
+    return subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, 'pdfform2excel.py'), 'watch', 'inbox',
+         '-o', output, '--poll', '--settle', '1', '--batch-interval', '0.2', *args],
+        cwd=tmp_path, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+
+
+def stop(proc):
+    proc.send_signal(signal.SIGTERM)
+    out, _ = proc.communicate(timeout=30)
+    assert proc.returncode == 0, out
+    return out
+
+
+def wait_for(predicate, timeout=20):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.1)
+    return False
+
+
+def jsonl_names(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding='utf-8') as fh:
+        return [json.loads(line)[FILENAME_COLUMN] for line in fh if line.strip()]
+
+
+def test_watch_settles_batches_and_restarts_without_duplicates(tmp_path):
+    inbox = tmp_path / 'inbox'
+    inbox.mkdir()
+    output = str(tmp_path / 'out.jsonl')
+    proc = start_watch(tmp_path, 'out.jsonl', '--batch-size', '2')
+    try:
+        # A file still being written is not read until it stops changing.
+        write_pdf(tmp_path / 'a.pdf', {'name': 'Ann'})
+        data = (tmp_path / 'a.pdf').read_bytes()
+        with open(inbox / 'a.pdf', 'wb') as fh:
+            fh.write(data[:40])
+            fh.flush()
+            time.sleep(0.5)
+            fh.write(data[40:])
+        (inbox / 'b.xfdf').write_text(
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            '<xfdf xmlns="http://ns.adobe.com/xfdf/"><fields>'
+            '<field name="name"><value>Bob</value></field></fields></xfdf>',
+            encoding='utf-8')
+        (inbox / 'notes.txt').write_text('ignored')
+        assert wait_for(lambda: len(jsonl_names(output)) == 2)
+    finally:
+        out = stop(proc)
+    assert 'Error reading' not in out
+    assert sorted(jsonl_names(output)) == ['a.pdf', 'b.xfdf']
+
+    write_pdf(inbox / 'c.pdf', {'name': 'Cy'})
+    proc = start_watch(tmp_path, 'out.jsonl')
+    try:
+        assert wait_for(lambda: len(jsonl_names(output)) >= 3)
+        time.sleep(1.5)  # long enough to settle any duplicate
+    finally:
+        stop(proc)
+    assert sorted(jsonl_names(output)) == ['a.pdf', 'b.xfdf', 'c.pdf']
+
+
+def test_watch_rebuilds_xlsx_on_a_timer_and_on_exit(tmp_path):
+    inbox = tmp_path / 'inbox'
+    inbox.mkdir()
+    output = tmp_path / 'out.xlsx'
+    manifest = tmp_path / 'out.xlsx.manifest.jsonl'
+    proc = start_watch(tmp_path, 'out.xlsx', '--rebuild-interval', '3600')
+    try:
+        write_pdf(inbox / 'a.pdf', {'name': 'Ann'})
+        assert wait_for(output.exists)
+        write_pdf(inbox / 'b.pdf', {'name': 'Bob'})
+        assert wait_for(lambda: manifest.exists() and manifest.read_text().count('\n') == 2)
+        rows = list(openpyxl.load_workbook(output, read_only=True).worksheets[0].values)
+        assert len(rows) == 2  # header and a.pdf: b.pdf waits for the next rebuild
+    finally:
+        stop(proc)
+    rows = list(openpyxl.load_workbook(output, read_only=True).worksheets[0].values)
+    assert rows[1:] == [('a.pdf', 'Ann'), ('b.pdf', 'Bob')]